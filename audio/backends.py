@@ -0,0 +1,87 @@
+import sys
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+
+# Where ToneGenerator sends its blocks, chosen by AudioConfig.backend.
+# "sounddevice" plays them. "null" and "pipe" call the audio callback from a
+# timer thread at the sample clock (scaled by AudioConfig.speed), so the
+# whole playback path runs with no device; "null" discards the output and
+# "pipe" writes it to stdout as raw interleaved PCM in the sample format.
+CLOCK_BLOCKSIZE = 512  # Frames per callback for the clocked backends when the config leaves it to the host
+
+# The part of sounddevice's CallbackFlags that the callback reads
+StreamStatus = namedtuple("StreamStatus", ["output_underflow"])
+
+def open_stream(callback, config):
+    # A stream with start(), stop(), close(), `active` and `latency` that
+    # calls callback(outdata, frames, time, status) once per block
+    if config.backend == "sounddevice":
+        import sounddevice as sd  # Imported here so everything else works without PortAudio
+        return sd.OutputStream(callback=callback, samplerate=config.sample_rate, channels=config.channels,
+                               dtype=config.sample_format, device=config.device, blocksize=config.blocksize,
+                               latency=config.latency)
+    if config.backend == "null":
+        return ClockStream(callback, config)
+    if config.backend == "pipe":
+        return ClockStream(callback, config, sink=sys.stdout.buffer)
+    raise ValueError(f"Unsupported audio backend: {config.backend}")
+
+class ClockStream:
+    # Keeps pace with the sample clock by sleeping until each block is due.
+    # A block that starts more than a whole block late is reported as an
+    # underflow and the clock restarts from now instead of trying to catch
+    # up. At speed 0 blocks are produced back to back, and a pipe sink is
+    # paced by whatever reads it.
+    def __init__(self, callback, config, sink=None):
+        self.callback = callback
+        self.sink = sink
+        self.blocksize = config.blocksize or CLOCK_BLOCKSIZE
+        self.period = self.blocksize / (config.sample_rate * config.speed) if config.speed else 0.0
+        self.latency = self.blocksize / config.sample_rate
+        self.frames = 0  # Frames delivered so far
+        self.active = False
+        self._outdata = np.zeros((self.blocksize, config.channels), dtype=config.sample_format)
+        self._thread = None
+
+    def start(self):
+        self.active = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.active = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.sink is not None:
+            try:
+                self.sink.flush()
+            except BrokenPipeError:
+                pass
+
+    def close(self):
+        self.stop()
+
+    def _run(self):
+        due = time.perf_counter()
+        late = StreamStatus(output_underflow=True)
+        while self.active:
+            status = None
+            if self.period:
+                now = time.perf_counter()
+                if now < due:
+                    time.sleep(due - now)
+                elif now - due > self.period:
+                    status = late
+                    due = now
+                due += self.period
+            self.callback(self._outdata, self.blocksize, None, status)
+            self.frames += self.blocksize
+            if self.sink is not None:
+                try:
+                    self.sink.write(self._outdata.data)
+                except BrokenPipeError:
+                    # Whatever was reading has gone; stop producing
+                    self.active = False
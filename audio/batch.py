@@ -0,0 +1,153 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from audio.cache import WaveformCache
+from audio.oscillator import WAVE_TYPES, Oscillator
+from audio.render import render_to_file
+from audio.stimulus import NOISE_COLORS, STIMULUS_TYPES, MultiSine, NoiseSource
+from audio.waveform import LoopSource
+
+# Defaults for fields a manifest entry leaves out; match the CLI defaults
+SPEC_DEFAULTS = {
+    "wave_type": "sine",
+    "frequency": 440.0,
+    "duration": 1.0,
+    "volume": 0.5,
+    "phase_shift": 0.0,
+    "duty_cycle": 0.5,
+    "pan": 0.5,
+    "sample_rate": 44100,
+    "subtype": "PCM_16",
+    "oscillator": "direct",
+    "end_frequency": None,  # Top of a multisine, which spans frequency..end_frequency
+    "tones": 32,
+    "seed": 0,
+}
+NUMERIC_FIELDS = {"frequency", "duration", "volume", "phase_shift", "duty_cycle", "pan"}
+INTEGER_FIELDS = {"sample_rate", "tones", "seed"}
+CACHE_BYTES = 256 * 2 ** 20  # Memory tier of each worker's waveform cache
+
+_cache = None  # This process's WaveformCache, made on first use when caching is on
+
+def worker_cache(cache_dir, max_bytes=CACHE_BYTES):
+    global _cache
+    if _cache is None or _cache.directory != cache_dir:
+        _cache = WaveformCache(max_bytes, cache_dir)
+    return _cache
+
+def load_manifest(path):
+    # Read tone specs from a .json list, a .jsonl file or a .csv with a header row.
+    # Every spec needs an "output" file name; other fields default as above.
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="") as manifest:
+        if extension == ".json":
+            specs = json.load(manifest)
+            if isinstance(specs, dict):
+                specs = specs["tones"]
+        elif extension == ".jsonl":
+            specs = [json.loads(line) for line in manifest if line.strip()]
+        elif extension == ".csv":
+            specs = [{key: value for key, value in row.items() if value not in (None, "")}
+                     for row in csv.DictReader(manifest)]
+        else:
+            raise ValueError(f"Unsupported manifest format: {extension}")
+    return [normalize_spec(spec, index) for index, spec in enumerate(specs)]
+
+def normalize_spec(spec, index=0):
+    if "output" not in spec:
+        raise ValueError(f"Manifest entry {index} has no 'output'")
+    spec = {**SPEC_DEFAULTS, **spec}
+    for field in NUMERIC_FIELDS:
+        spec[field] = float(spec[field])
+    for field in INTEGER_FIELDS:
+        spec[field] = int(spec[field])
+    if spec["end_frequency"] is not None:
+        spec["end_frequency"] = float(spec["end_frequency"])
+    if spec["wave_type"] not in WAVE_TYPES + STIMULUS_TYPES:
+        raise ValueError(f"Manifest entry {index} has an unsupported wave_type: {spec['wave_type']}")
+    if spec["wave_type"] == "multisine" and (spec["end_frequency"] is None or spec["end_frequency"] <= spec["frequency"]
+                                             or spec["frequency"] <= 0):
+        raise ValueError(f"Manifest entry {index}: a multisine needs end_frequency above a positive frequency")
+    if spec["tones"] < 1:
+        raise ValueError(f"Manifest entry {index}: tones must be at least 1")
+    return spec
+
+def make_source(spec, cache=None):
+    # Stimuli are built directly rather than cached: noise is cheap to
+    # regenerate from its seed and a multisine already caches its period
+    if spec["wave_type"] in NOISE_COLORS:
+        return NoiseSource(spec["wave_type"], spec["sample_rate"], spec["volume"], seed=spec["seed"])
+    if spec["wave_type"] == "multisine":
+        return MultiSine(np.geomspace(spec["frequency"], spec["end_frequency"], spec["tones"]), spec["sample_rate"],
+                         spec["volume"])
+    if cache is not None:
+        return LoopSource(cache.tone(spec["wave_type"], spec["frequency"], spec["duration"], spec["sample_rate"],
+                                     spec["volume"], spec["phase_shift"], spec["duty_cycle"], spec["oscillator"]))
+    return Oscillator(spec["wave_type"], spec["frequency"], spec["sample_rate"], spec["volume"],
+                      spec["phase_shift"], spec["duty_cycle"], mode=spec["oscillator"])
+
+def render_spec(spec, output_dir=".", cache=None):
+    # Render one spec. Writes to a temporary name and renames on success so an
+    # interrupted run never leaves a truncated file under the final name. With
+    # a WaveformCache, specs that differ only in output, pan or file format
+    # reuse one render of the samples.
+    path = os.path.join(output_dir, spec["output"])
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial = path + ".partial"
+    source = make_source(spec, cache)
+    extension = os.path.splitext(path)[1].lstrip(".").lower() or "wav"
+    try:
+        frames = render_to_file(source, partial, spec["duration"], spec["sample_rate"], pan=spec["pan"],
+                                subtype=spec["subtype"], file_format="raw" if extension == "pcm" else extension)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return frames / spec["sample_rate"]
+
+def render_chunk(specs, output_dir, cache_dir=None):
+    # Render several specs in one task to amortise inter-process overhead.
+    # Returns (output, rendered seconds or None, error or None, cache hit) for each spec.
+    cache = worker_cache(cache_dir) if cache_dir else None
+    results = []
+    for spec in specs:
+        hits = cache.hits + cache.disk_hits if cache is not None else 0
+        try:
+            seconds = render_spec(spec, output_dir, cache)
+            results.append((spec["output"], seconds, None, cache is not None and cache.hits + cache.disk_hits > hits))
+        except Exception as error:
+            results.append((spec["output"], None, str(error), False))
+    return results
+
+def run_batch(specs, output_dir=".", workers=None, overwrite=False, progress=None, cache_dir=None):
+    # Render every spec across a process pool. Specs whose output already
+    # exists are skipped unless overwrite is set, so a partial run can be
+    # resumed by running the same manifest again. With a cache_dir, repeated
+    # sample renders are shared between workers and between runs.
+    pending = [spec for spec in specs
+               if overwrite or not os.path.exists(os.path.join(output_dir, spec["output"]))]
+    summary = {"total": len(specs), "skipped": len(specs) - len(pending), "rendered": 0,
+               "failed": [], "audio_seconds": 0.0, "cache_hits": 0}
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, min(64, len(pending) // (workers * 8)))
+    chunks = [pending[index:index + chunk_size] for index in range(0, len(pending), chunk_size)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(render_chunk, chunk, output_dir, cache_dir) for chunk in chunks]
+        for future in as_completed(futures):
+            for output, seconds, error, cached in future.result():
+                if error is None:
+                    summary["audio_seconds"] += seconds
+                    summary["rendered"] += 1
+                    summary["cache_hits"] += cached
+                else:
+                    summary["failed"].append((output, error))
+            if progress:
+                progress(summary)
+    summary["elapsed"] = time.perf_counter() - start
+    return summary
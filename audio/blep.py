@@ -0,0 +1,113 @@
+import numpy as np
+
+# Band-limited versions of the Oscillator shapes without oversampling. The
+# naive shape is computed as usual and each jump (square, sawtooth) or kink
+# (triangle) is smoothed with a two-sample polynomial residual: PolyBLEP for
+# jumps and its integral, PolyBLAMP, for kinks. Only the samples either side
+# of a discontinuity change, so the cost is a few vectorised passes per block
+# and the shape stays exact everywhere else.
+
+MIN_INCREMENT = 1e-9  # Cycles per sample; keeps the residuals finite at 0 Hz
+
+def polyblep(phase, increment, out, scratch):
+    # Residual of a rising unit jump (-1 to +1) at phase 0, for phase in
+    # cycles [0, 1) advancing `increment` cycles per sample. With x the
+    # distance from the jump in samples, it is -(x - 1)^2 just after the jump
+    # and (x + 1)^2 just before it; zero elsewhere.
+    _offset(phase, increment, out, scratch)
+    np.abs(out, out=scratch)
+    out *= scratch
+    return out
+
+def polyblamp(phase, increment, out, scratch):
+    # Integral of polyblep, for a kink whose slope rises by two per sample:
+    # -(x - 1)^3 / 3 just after phase 0 and (x + 1)^3 / 3 just before it
+    _offset(phase, increment, out, scratch)
+    np.abs(out, out=out)
+    np.square(out, out=scratch)
+    out *= scratch
+    out *= 1.0 / 3.0
+    return out
+
+def _offset(phase, increment, out, scratch):
+    # x - 1 just after phase 0, x + 1 just before it and 0 elsewhere. The two
+    # windows never overlap below Nyquist, so both residuals follow from this
+    # one value: y * |y| for polyblep and |y|^3 / 3 for polyblamp.
+    np.divide(phase, increment, out=out)
+    np.minimum(out, 1.0, out=out)
+    out -= 1.0
+    np.subtract(phase, 1.0, out=scratch)
+    scratch /= increment
+    np.maximum(scratch, -1.0, out=scratch)
+    scratch += 1.0
+    out += scratch
+
+class BandLimitedShaper:
+    # Shapes phase into the same waveforms as audio.oscillator.shape_wave,
+    # with the discontinuities band-limited. `increment` is cycles per sample,
+    # a scalar or one value per sample.
+    def __init__(self, max_frames=4096, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self._allocate(max_frames)
+
+    def _allocate(self, frames):
+        self._shifted = np.empty(frames, dtype=self.dtype)
+        self._residual = np.empty(frames, dtype=self.dtype)
+        self._corner = np.empty(frames, dtype=self.dtype)
+        self._increment = np.empty(frames, dtype=self.dtype)
+        self._scratch = np.empty(frames, dtype=self.dtype)
+        self._mask = np.empty(frames, dtype=bool)
+
+    def shape(self, wave_type, phase, increment, out, duty_cycle=0.5):
+        frames = len(phase)
+        if frames > len(self._scratch):
+            self._allocate(frames)
+        shifted = self._shifted[:frames]
+        residual = self._residual[:frames]
+        scratch = self._scratch[:frames]
+        if isinstance(increment, np.ndarray):
+            increment = np.maximum(increment, MIN_INCREMENT, out=self._increment[:frames])
+        else:
+            increment = max(increment, MIN_INCREMENT)
+        if wave_type == "sine":
+            np.multiply(phase, 2 * np.pi, out=out)
+            np.sin(out, out=out)
+        elif wave_type == "square":
+            # High for the first duty_cycle of each cycle: a rising jump at
+            # phase 0 and a falling one at duty_cycle
+            np.less(phase, duty_cycle, out=self._mask[:frames])
+            np.copyto(out, self._mask[:frames])
+            out *= 2.0
+            out -= 1.0
+            out += polyblep(phase, increment, residual, scratch)
+            np.subtract(phase, duty_cycle, out=shifted)
+            _wrap(shifted, scratch)
+            out -= polyblep(shifted, increment, residual, scratch)
+        elif wave_type == "sawtooth":
+            # Rises from 0 through +1, falls to -1 half way through the cycle
+            np.add(phase, 0.5, out=shifted)
+            _wrap(shifted, scratch)
+            np.multiply(shifted, 2.0, out=out)
+            out -= 1.0
+            out -= polyblep(shifted, increment, residual, scratch)
+        elif wave_type == "triangle":
+            # Starts at -1, peaks at +1 half way through the cycle; the slope
+            # changes by 8 per cycle at both corners
+            np.add(phase, 0.5, out=shifted)
+            _wrap(shifted, scratch)
+            np.multiply(shifted, 4.0, out=out)
+            out -= 2.0
+            np.abs(out, out=out)
+            out -= 1.0
+            polyblamp(phase, increment, residual, scratch)
+            residual -= polyblamp(shifted, increment, self._corner[:frames], scratch)
+            residual *= increment
+            residual *= 4.0
+            out += residual
+        else:
+            raise ValueError(f"Unsupported wave type: {wave_type}")
+        return out
+
+def _wrap(values, scratch):
+    np.floor(values, out=scratch)
+    values -= scratch
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from audio.oscillator import Oscillator
+
+CHUNK_FRAMES = 8192  # Frames rendered per call when filling a cached tone
+
+def cache_key(fields):
+    # Content address of a parameter tuple. Numbers are hashed by their exact
+    # float value, so 440 and 440.0 share an entry but 440.0000001 does not.
+    parts = [float(value).hex() if isinstance(value, (int, float)) and not isinstance(value, bool) else repr(value)
+             for value in fields]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+class WaveformCache:
+    # Read-only arrays keyed by the parameters that produced them, kept in
+    # memory up to `max_bytes` with least-recently-used eviction. With a
+    # `directory`, every array is also saved there as .npy and later misses
+    # memory-map it instead of rendering again, so processes sharing the
+    # directory share renders and load them without copying.
+    def __init__(self, max_bytes=256 * 2 ** 20, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # Key -> array, least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, fields, shape, dtype, create):
+        # Cached array for `fields`, calling create(out) on a miss to fill a
+        # new array of `shape` and `dtype`. With a directory, `out` is the
+        # .npy file itself mapped for writing, so a render never needs its
+        # whole size in memory however long it is.
+        key = cache_key(fields)
+        with self._lock:
+            array = self._entries.get(key)
+            if array is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return array
+        array = self._load(key)
+        with self._lock:
+            if array is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        if array is None:
+            array = self._create(key, shape, np.dtype(dtype), create)
+            array.setflags(write=False)
+        self._insert(key, array)
+        return array
+
+    def tone(self, wave_type, frequency, duration, sample_rate, amplitude, phase_shift=0, duty_cycle=0.5,
+             mode="direct", dtype=np.float32):
+        # `duration` seconds of an Oscillator's output, rendered exactly as a
+        # stream of blocks would be
+        frames = int(round(duration * sample_rate))
+        dtype = np.dtype(dtype)
+        def create(out):
+            oscillator = Oscillator(wave_type, frequency, sample_rate, amplitude, phase_shift, duty_cycle,
+                                    max_frames=CHUNK_FRAMES, mode=mode, dtype=dtype)
+            for start in range(0, frames, CHUNK_FRAMES):
+                oscillator.render(min(CHUNK_FRAMES, frames - start), out=out[start:start + CHUNK_FRAMES])
+        fields = ("tone", wave_type, frequency, amplitude, phase_shift, duty_cycle, sample_rate, frames, mode, dtype.str)
+        return self.get(fields, (frames,), dtype, create)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "evictions": self.evictions, "entries": len(self._entries), "bytes": self.bytes}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _insert(self, key, array):
+        if array.nbytes > self.max_bytes:
+            return  # Too big to keep in memory; still on disk if there is a directory
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = array
+            self.bytes += array.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    def _load(self, key):
+        if not self.directory or not os.path.exists(self._path(key)):
+            return None
+        return np.load(self._path(key), mmap_mode="r")
+
+    def _create(self, key, shape, dtype, create):
+        if not self.directory:
+            array = np.empty(shape, dtype=dtype)
+            create(array)
+            return array
+        # Filled under a temporary name and renamed, so other processes never
+        # map a half-written file
+        path = self._path(key)
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+        try:
+            mapped = np.lib.format.open_memmap(partial, mode="w+", dtype=dtype, shape=shape)
+            create(mapped)
+            mapped.flush()
+            del mapped
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        return np.load(path, mmap_mode="r")
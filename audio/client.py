@@ -0,0 +1,38 @@
+import json
+import os
+import socket
+import tempfile
+
+# Control socket of the tone server (audio.server). One JSON object per line
+# each way: a request names a "command" and may carry an "id", which is
+# echoed back; every response has "ok", plus "error" when it is false.
+DEFAULT_SOCKET = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "tone_generator.sock")
+
+class ToneClient:
+    # Blocking client for one connection to a running tone server. Kept to
+    # the standard library so controlling the server starts instantly.
+    def __init__(self, path=DEFAULT_SOCKET, timeout=5.0):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        try:
+            self._socket.connect(path)
+        except OSError:
+            self._socket.close()
+            raise
+        self._reader = self._socket.makefile("rb")
+
+    def request(self, command, **fields):
+        # Send one command and return the server's response fields; a
+        # command the server rejected raises RuntimeError with its reason
+        self._socket.sendall((json.dumps({"command": command, **fields}) + "\n").encode())
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Tone server closed the connection")
+        response = json.loads(line)
+        if not response.pop("ok"):
+            raise RuntimeError(response["error"])
+        return response
+
+    def close(self):
+        self._reader.close()
+        self._socket.close()
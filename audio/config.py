@@ -0,0 +1,57 @@
+from collections import namedtuple
+
+# Device sample formats. Audio is always generated and mixed in float32 and
+# converted to an integer format, if one is chosen, as the last step.
+SAMPLE_FORMATS = ("float32", "int16", "int32")
+# Where blocks go (see audio.backends): the sound device, nowhere, or raw PCM on stdout
+BACKENDS = ("sounddevice", "null", "pipe")
+
+# Everything about the output stream, in one place. Code that depends on the
+# sample rate takes it from here rather than assuming 44100. device None and
+# blocksize 0 leave the choice to the host API; latency is seconds or
+# "low"/"high", None for the device default. `speed` is how fast the null and
+# pipe backends run against the sample clock: 1 is real time, 0 as fast as
+# the engine can go.
+AudioConfig = namedtuple("AudioConfig", ["sample_rate", "device", "blocksize", "latency", "channels", "sample_format",
+                                         "backend", "speed"],
+                         defaults=(44100, None, 0, None, 2, "float32", "sounddevice", 1.0))
+
+def add_audio_arguments(parser):
+    parser.add_argument("--sample_rate", type=int, default=44100, help="Output sample rate in Hz")
+    parser.add_argument("--device", type=parse_device, default=None, help="Output device index or name (default is the system default)")
+    parser.add_argument("--blocksize", type=int, default=0, help="Frames per audio callback (0 lets the host choose)")
+    parser.add_argument("--latency", type=parse_latency, default=None, help="Output latency in seconds, or 'low' or 'high'")
+    parser.add_argument("--channels", type=int, default=2, help="Number of output channels")
+    parser.add_argument("--sample_format", type=str, choices=list(SAMPLE_FORMATS), default="float32", help="Sample format sent to the sound device")
+    parser.add_argument("--backend", type=str, choices=list(BACKENDS), default="sounddevice", help="Send audio to the sound device, nowhere (null) or stdout as raw PCM (pipe)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Clock rate of the null and pipe backends relative to real time (0 runs as fast as possible)")
+    parser.add_argument("--auto_tune", action="store_true", help="Find the smallest block size this machine plays without underflows, then use it")
+
+def config_from_args(args):
+    return AudioConfig(sample_rate=args.sample_rate, device=args.device, blocksize=args.blocksize,
+                       latency=args.latency, channels=args.channels, sample_format=args.sample_format,
+                       backend=args.backend, speed=args.speed)
+
+def check_config(config):
+    if config.sample_format not in SAMPLE_FORMATS:
+        raise ValueError(f"Unsupported sample format: {config.sample_format}")
+    if config.sample_rate <= 0:
+        raise ValueError(f"Sample rate must be positive, got {config.sample_rate}")
+    if config.channels < 1:
+        raise ValueError(f"Need at least one output channel, got {config.channels}")
+    if config.blocksize < 0:
+        raise ValueError(f"Block size cannot be negative, got {config.blocksize}")
+    if config.backend not in BACKENDS:
+        raise ValueError(f"Unsupported audio backend: {config.backend}")
+    if config.speed < 0:
+        raise ValueError(f"Speed cannot be negative, got {config.speed}")
+    return config
+
+def parse_device(value):
+    # Device indices are numbers; anything else is matched against device names
+    return int(value) if value.isdigit() else value
+
+def parse_latency(value):
+    if value in ("low", "high"):
+        return value
+    return float(value)
@@ -0,0 +1,97 @@
+import numpy as np
+
+SHAPES = ("cosine", "linear")
+# Stage that follows each timed stage once it completes
+NEXT_STAGE = {"attack": "decay", "decay": "sustain", "release": "idle"}
+
+class Envelope:
+    # ADSR gain envelope rendered a block at a time. Each stage is filled with
+    # a few vectorised calls; only the stage, the samples spent in it and the
+    # level it started from are carried between blocks. "cosine" segments are
+    # raised-cosine fades, which start and end with zero slope and so do not
+    # click even when very short.
+    def __init__(self, sample_rate, attack=0.005, decay=0.0, sustain=1.0, release=0.02, shape="cosine",
+                 max_frames=4096, dtype=np.float32):
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)  # Format of the gain blocks fill() writes
+        self._lengths = {}
+        self.configure(attack, decay, sustain, release, shape)
+        self._ramp = np.arange(1, max_frames + 1, dtype=self.dtype)
+
+    def configure(self, attack=0.005, decay=0.0, sustain=1.0, release=0.02, shape="cosine"):
+        # Set new stage times and return to idle, reusing this envelope's buffers
+        if shape not in SHAPES:
+            raise ValueError(f"Unsupported envelope shape: {shape}")
+        self.sustain = float(sustain)
+        self.shape = shape
+        self._lengths["attack"] = int(round(attack * self.sample_rate))
+        self._lengths["decay"] = int(round(decay * self.sample_rate))
+        self._lengths["release"] = int(round(release * self.sample_rate))
+        self.stage = "idle"
+        self.level = 0.0  # Gain at the end of the last rendered sample
+        self._elapsed = 0  # Samples spent in the current stage
+        self._from = 0.0  # Level the current stage started at
+
+    @property
+    def release_time(self):
+        return self._lengths["release"] / self.sample_rate
+
+    @property
+    def finished(self):
+        # Silent and not waiting for a gate
+        return self.stage == "idle"
+
+    def gate_on(self):
+        # Start (or retrigger) the attack from whatever level we are at
+        self._enter("attack")
+
+    def gate_off(self):
+        if self.stage != "idle":
+            self._enter("release")
+
+    def _enter(self, stage):
+        self.stage = stage
+        self._elapsed = 0
+        self._from = self.level
+
+    def _target(self, stage):
+        return {"attack": 1.0, "decay": self.sustain, "release": 0.0}[stage]
+
+    def fill(self, out):
+        # Write the gain for the next len(out) samples into `out` and advance.
+        # Returns the scalar level instead when it is constant for the whole
+        # block (sustaining or idle), so callers can skip the multiply.
+        frames = len(out)
+        if frames > len(self._ramp) or self._ramp.dtype != out.dtype:
+            # Kept in the caller's dtype: a mixed-dtype ufunc allocates cast buffers
+            self._ramp = np.arange(1, max(frames, len(self._ramp)) + 1, dtype=out.dtype)
+        written = 0
+        while written < frames:
+            if self.stage in ("idle", "sustain"):
+                if written == 0:
+                    return self.level
+                out[written:] = self.level
+                break
+            length = self._lengths[self.stage]
+            target = self._target(self.stage)
+            count = min(frames - written, length - self._elapsed)
+            if count > 0:
+                segment = out[written:written + count]
+                # Position through the stage, in (0, 1]
+                np.add(self._ramp[:count], self._elapsed, out=segment)
+                segment *= 1.0 / length
+                if self.shape == "cosine":
+                    segment *= np.pi
+                    np.cos(segment, out=segment)
+                    segment *= -0.5
+                    segment += 0.5
+                segment *= target - self._from
+                segment += self._from
+                self._elapsed += count
+                written += count
+            if self._elapsed >= length:
+                self.level = target
+                self._enter(NEXT_STAGE[self.stage])
+            else:
+                self.level = float(out[written - 1])
+        return out
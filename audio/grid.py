@@ -0,0 +1,141 @@
+import multiprocessing
+import sys
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from audio.blep import BandLimitedShaper
+from audio.oscillator import WAVE_TYPES, shape_wave
+from audio.waveform import BLOCK_FRAMES
+
+# Renders many tones at once for analysis jobs: each parameter may be an
+# array, the arrays are broadcast together, and every combination becomes a
+# row of one (rows, frames) array. The time axis is shared, so one pass of
+# numpy work covers a tile of rows and frames at a time instead of one
+# Python call per tone. Output can go straight into shared memory or a
+# memory-mapped .npy file for other processes to read without copying.
+
+GRID_BYTES = 64 * 2 ** 20  # Working memory per pass; the output itself is not counted
+# Bytes of temporaries per tile element: phase, block and scratch in float64
+# plus a mask, and when band-limited also the per-element increment and duty
+# cycle and the shaper's five buffers and mask
+ELEMENT_BYTES = 3 * 8 + 1
+BAND_LIMITED_BYTES = ELEMENT_BYTES + 7 * 8 + 1
+
+def grid_shape(*parameters):
+    # Broadcast shape of the parameter arrays; rows are its elements in C order
+    return np.broadcast_shapes(*(np.shape(parameter) for parameter in parameters))
+
+def grid_frames(duration, sample_rate):
+    return int(sample_rate * duration)  # Same rounding as the generate_*_wave functions
+
+def render_grid(wave_type, frequency, amplitude, phase_shift, duration, sample_rate, duty_cycle=0.5, out=None,
+                dtype=np.float32, band_limited=True, max_bytes=GRID_BYTES):
+    # Row r is the samples generate_<wave_type>_wave would give for the r-th
+    # combination of frequency, amplitude, phase_shift (degrees) and
+    # duty_cycle, computed in float64 the same way. `out` may be any
+    # C-contiguous array of rows * frames elements, e.g. from
+    # create_shared_grid or open_memmap_grid; it is filled tile by tile so
+    # temporaries stay within max_bytes however large the grid is.
+    if wave_type not in WAVE_TYPES:
+        raise ValueError(f"Unsupported wave type: {wave_type}")
+    shape = grid_shape(frequency, amplitude, phase_shift, duty_cycle)
+    rows, frames = int(np.prod(shape)), grid_frames(duration, sample_rate)
+    if out is None:
+        out = np.empty((rows, frames), dtype=dtype)
+    elif out.size != rows * frames or not out.flags.c_contiguous:
+        raise ValueError(f"out must be a C-contiguous array of {rows} x {frames} samples")
+    grid = out.reshape(rows, frames)  # A view, so writes land in out
+    if not rows or not frames:
+        return out
+
+    def column(parameter):
+        return np.broadcast_to(np.asarray(parameter, dtype=np.float64), shape).reshape(rows, 1)
+    frequency, amplitude = column(frequency), column(amplitude)
+    phase_shift, duty_cycle = column(phase_shift), column(duty_cycle)
+    band_limited = band_limited and wave_type != "sine"
+
+    # Tiles span whole rows when the budget allows, so each write to out is contiguous
+    elements = max(max_bytes // (BAND_LIMITED_BYTES if band_limited else ELEMENT_BYTES), 1)
+    columns = min(frames, elements)
+    tile_rows = min(rows, max(elements // columns, 1))
+    size = tile_rows * columns
+    phase, block, scratch = np.empty(size), np.empty(size), np.empty(size)
+    mask = np.empty(size, dtype=bool)
+    if band_limited:
+        shaper = BandLimitedShaper(size)
+        increment, duty = np.empty(size), np.empty(size)
+
+    # The time axis audio.waveform._render builds, block by block, so rows
+    # match the generate_*_wave functions to the bit
+    step = duration / frames
+    ramp = np.arange(min(frames, BLOCK_FRAMES), dtype=np.float64) * step
+    t = np.empty(columns)
+    for row in range(0, rows, tile_rows):
+        count = min(tile_rows, rows - row)
+        selected = slice(row, row + count)
+        for start in range(0, frames, columns):
+            width = min(columns, frames - start)
+            time_axis(start, width, step, ramp, t[:width])
+            tile = (count, width)
+            phase_tile = phase[:count * width].reshape(tile)
+            block_tile = block[:count * width].reshape(tile)
+            if wave_type == "sine":
+                # sin(2 pi f t + phase) exactly as generate_sine_wave, without wrapping
+                np.multiply(t[:width], 2 * np.pi * frequency[selected], out=block_tile)
+                block_tile += np.deg2rad(phase_shift[selected])
+                np.sin(block_tile, out=block_tile)
+            else:
+                np.multiply(t[:width], frequency[selected], out=phase_tile)
+                phase_tile += phase_shift[selected] / 360.0
+                scratch_tile = scratch[:count * width].reshape(tile)
+                np.floor(phase_tile, out=scratch_tile)
+                phase_tile -= scratch_tile
+                if band_limited:
+                    # The shaper works on flat blocks with one increment and duty cycle per sample
+                    np.copyto(increment[:count * width].reshape(tile), frequency[selected] / sample_rate)
+                    np.copyto(duty[:count * width].reshape(tile), duty_cycle[selected])
+                    shaper.shape(wave_type, phase[:count * width], increment[:count * width],
+                                 block[:count * width], duty[:count * width])
+                else:
+                    shape_wave(wave_type, phase_tile, block_tile, duty_cycle[selected], scratch_tile,
+                               mask[:count * width].reshape(tile))
+            block_tile *= amplitude[selected]
+            grid[selected, start:start + width] = block_tile
+    return out
+
+def time_axis(start, frames, step, ramp, out):
+    # Times of frames start..start + frames, each computed as offset into its
+    # BLOCK_FRAMES block plus the block's start time, like audio.waveform._render
+    done = 0
+    while done < frames:
+        frame = start + done
+        offset = frame % BLOCK_FRAMES
+        count = min(frames - done, BLOCK_FRAMES - offset)
+        np.add(ramp[offset:offset + count], (frame - offset) * step, out=out[done:done + count])
+        done += count
+    return out
+
+def create_shared_grid(rows, frames, dtype=np.float32):
+    # A (rows, frames) array in a new shared memory block. Workers attach
+    # with attach_shared_grid(shm.name, ...). The creator unlinks the block
+    # when everyone is done; each process drops its array before close().
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(rows * frames * dtype.itemsize, 1))
+    return shm, np.ndarray((rows, frames), dtype=dtype, buffer=shm.buf)
+
+def attach_shared_grid(name, rows, frames, dtype=np.float32):
+    # The block must stay registered only with its creator's resource
+    # tracker, or it is unlinked when this process exits
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        shm = shared_memory.SharedMemory(name=name)
+        if multiprocessing.parent_process() is None:
+            # Not a multiprocessing child, so the tracker that just
+            # registered the block is this process's own
+            resource_tracker.unregister(shm._name, "shared_memory")
+    return shm, np.ndarray((rows, frames), dtype=np.dtype(dtype), buffer=shm.buf)
+
+def open_memmap_grid(path, rows, frames, dtype=np.float32):
+    # A (rows, frames) .npy file mapped for writing; readers open it with
+    # np.load(path, mmap_mode="r") and get the shape and dtype from its header
+    return np.lib.format.open_memmap(path, mode="w+", dtype=np.dtype(dtype), shape=(rows, frames))
@@ -0,0 +1,293 @@
+from collections import deque
+import numpy as np
+from audio.oscillator import WAVE_TYPES, shape_wave, wrap_phase
+from audio.routing import pan_gains
+
+RELEASE_TIME = 0.2  # Seconds for the limiter to recover after a peak
+
+class Mixer:
+    # Renders a bank of voices into one block of `channels` channels, each
+    # voice panned across them with an equal-power law. Voice parameters are kept
+    # as parallel arrays (one row per voice, grouped by wave type) so every
+    # voice is synthesised with the same few NumPy calls. Voice changes are
+    # queued by the control thread and applied by render() at a block
+    # boundary, so the bank is only ever touched by the audio thread.
+    def __init__(self, sample_rate, capacity=256, max_frames=1024, ceiling=1.0, dtype=np.float32, channels=2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)  # Sample format of the rendered blocks
+        self.ceiling = ceiling  # Peak level the limiter holds the mix under
+        self.limiter_gain = 1.0
+        self._release = 1.0 - np.exp(-1.0 / (RELEASE_TIME * sample_rate))
+
+        # Bank of voices; only the first `self.count` rows are live. Phase,
+        # shaping and mixing all run in float64 (a float32 phase ramp leaves a
+        # -68 dB error floor at 15 kHz); the mix is narrowed to self.dtype as it
+        # is written to out.
+        self.count = 0
+        self.voice_ids = np.zeros(capacity, dtype=np.int64)
+        self.wave_ids = np.zeros(capacity, dtype=np.int64)
+        self.increment = np.zeros(capacity)  # Cycles per sample
+        self.phase = np.zeros(capacity)  # Phase accumulators in cycles
+        self.offset = np.zeros(capacity)  # Phase shift in cycles
+        self.duty_cycle = np.full(capacity, 0.5)
+        self.amplitude = np.zeros(capacity)
+        self.pan = np.full(capacity, 0.5)
+        self._groups = []  # (wave type, first row, end row) for each wave type present
+        self._gains = np.zeros((capacity, channels))  # Per-voice gain into each channel
+        self._previous_gains = np.zeros((capacity, channels))
+        self._voice_scratch = np.zeros(capacity)
+        self._phase_terms = np.zeros((capacity, 2))  # Increment and start phase of each voice this block
+        self._gains_changed = False
+
+        self._commands = deque()  # Appended by the control thread, drained by render()
+        self._next_voice = 0
+        self._live_voices = set()  # Control-thread view of which voice ids exist
+        self._allocate(max_frames)
+
+    def _allocate(self, frames):
+        # Scratch buffers reused by every block
+        self._ramp = np.arange(frames + 1, dtype=np.float64)
+        # Sample index and a row of ones, so one matrix product gives every voice's phase
+        self._ramp_rows = np.stack([self._ramp[:frames], np.ones(frames)])
+        self._phase_block = np.empty(self.capacity * frames)
+        self._wave_block = np.empty(self.capacity * frames)
+        self._scratch = np.empty(self.capacity * frames)
+        self._mask = np.empty(self.capacity * frames, dtype=bool)
+        self._duty_block = np.empty(self.capacity * frames)
+        self._mix = np.empty(self.channels * frames)
+        self._previous_mix = np.empty(self.channels * frames)
+        self._envelope = np.empty(frames)
+
+    @staticmethod
+    def _view(buffer, rows, frames):
+        # Contiguous (rows, frames) view at the start of a flat scratch buffer
+        return buffer[:rows * frames].reshape(rows, frames)
+
+    # Control thread API
+
+    def add_voice(self, wave_type, frequency, amplitude, pan=0.5, phase_shift=0, duty_cycle=0.5):
+        if wave_type not in WAVE_TYPES:
+            raise ValueError(f"Unsupported wave type: {wave_type}")
+        if len(self._live_voices) >= self.capacity:
+            raise ValueError(f"Mixer is full ({self.capacity} voices)")
+        voice = self._next_voice
+        self._next_voice += 1
+        self._live_voices.add(voice)
+        self._commands.append(("add", voice, dict(wave_type=wave_type, frequency=frequency, amplitude=amplitude,
+                                                  pan=pan, phase_shift=phase_shift, duty_cycle=duty_cycle)))
+        return voice
+
+    def update_voice(self, voice, **params):
+        if voice not in self._live_voices:
+            raise KeyError(f"No such voice: {voice}")
+        self._commands.append(("update", voice, params))
+
+    def remove_voice(self, voice):
+        self._live_voices.discard(voice)
+        self._commands.append(("remove", voice, None))
+
+    @property
+    def voices(self):
+        # Ids of the voices added and not yet removed, as the control thread sees them
+        return sorted(self._live_voices)
+
+    def clear(self):
+        for voice in list(self._live_voices):
+            self.remove_voice(voice)
+
+    # Audio thread
+
+    def _apply_commands(self):
+        changed_layout = False
+        while self._commands:
+            command, voice, params = self._commands.popleft()
+            rows = np.flatnonzero(self.voice_ids[:self.count] == voice)
+            if command == "add":
+                if self.count == self.capacity:
+                    self._drop_removed()
+                row = self.count
+                self.count += 1
+                self.voice_ids[row] = voice
+                self.phase[row] = 0.0
+                self._set_row(row, params)
+                self._previous_gains[row] = 0.0  # Fade new voices in
+                changed_layout = True
+            elif command == "update" and len(rows):
+                self._set_row(rows[0], params)
+                changed_layout = changed_layout or "wave_type" in params
+            elif command == "remove" and len(rows):
+                # Fade the voice out this block, then drop its row
+                self.amplitude[rows[0]] = 0.0
+                self.voice_ids[rows[0]] = -1
+                self._gains_changed = True
+        if self._gains_changed:
+            self._update_gains()
+        if changed_layout:
+            self._sort_by_wave()
+
+    def _set_row(self, row, params):
+        if "wave_type" in params:
+            self.wave_ids[row] = WAVE_TYPES.index(params["wave_type"])
+        if "frequency" in params:
+            self.increment[row] = params["frequency"] / self.sample_rate
+        if "amplitude" in params:
+            self.amplitude[row] = params["amplitude"]
+        if "pan" in params:
+            self.pan[row] = params["pan"]
+        if "phase_shift" in params:
+            self.offset[row] = params["phase_shift"] / 360.0
+        if "duty_cycle" in params:
+            self.duty_cycle[row] = params["duty_cycle"]
+        self._gains_changed = True
+
+    def _update_gains(self):
+        count = self.count
+        np.multiply(pan_gains(self.pan[:count], self.channels), self.amplitude[:count, None], out=self._gains[:count])
+
+    def _sort_by_wave(self):
+        # Keep rows of the same wave type contiguous so each type is shaped with
+        # one call on a slice. Only runs when voices are added or change type.
+        count = self.count
+        order = np.argsort(self.wave_ids[:count], kind="stable")
+        for bank in (self.voice_ids, self.wave_ids, self.increment, self.phase, self.offset, self.duty_cycle,
+                     self.amplitude, self.pan, self._gains, self._previous_gains):
+            bank[:count] = bank[:count][order]
+        self._groups = []
+        for wave_id in np.unique(self.wave_ids[:count]):
+            rows = np.flatnonzero(self.wave_ids[:count] == wave_id)
+            self._groups.append((WAVE_TYPES[wave_id], int(rows[0]), int(rows[-1]) + 1))
+
+    def _drop_removed(self):
+        keep = np.flatnonzero(self.voice_ids[:self.count] >= 0)
+        if len(keep) == self.count:
+            return
+        for bank in (self.voice_ids, self.wave_ids, self.increment, self.phase, self.offset, self.duty_cycle,
+                     self.amplitude, self.pan, self._gains, self._previous_gains):
+            bank[:len(keep)] = bank[keep]
+        self.count = len(keep)
+        self._sort_by_wave()
+
+    def render(self, frames, out=None):
+        # Render the next `frames` samples of every voice into `out` (frames x channels)
+        if frames >= len(self._ramp):
+            self._allocate(frames)
+        if out is None:
+            out = np.empty((frames, self.channels), dtype=self.dtype)
+        if self._commands:
+            self._apply_commands()
+
+        count = self.count
+        mix = self._view(self._mix, self.channels, frames)
+        if count == 0:
+            mix.fill(0.0)
+        else:
+            phase = self._view(self._phase_block, count, frames)
+            waves = self._view(self._wave_block, count, frames)
+            scratch = self._view(self._scratch, count, frames)
+            mask = self._view(self._mask, count, frames)
+            terms = self._phase_terms[:count]
+            terms[:, 0] = self.increment[:count]
+            np.add(self.phase[:count], self.offset[:count], out=terms[:, 1])
+            for wave_type, first, end in self._groups:
+                if wave_type == "sine" and self._sines(first, end, frames, phase, scratch, waves):
+                    continue
+                # increment * n + start as a matrix product, which writes straight into
+                # `phase` where the broadcast form allocates a block-sized temporary
+                np.dot(terms[first:end], self._ramp_rows[:, :frames], out=phase[first:end])
+                wrap_phase(phase[first:end], scratch[first:end])
+                duty_cycle = self.duty_cycle[first:end, None]
+                if wave_type == "square":
+                    # Spread across the block, as comparing against a broadcast column allocates buffers
+                    duty_cycle = self._view(self._duty_block, end - first, frames)
+                    np.dot(self.duty_cycle[first:end, None], self._ramp_rows[1:, :frames], out=duty_cycle)
+                shape_wave(wave_type, phase[first:end], waves[first:end], duty_cycle, scratch[first:end],
+                           mask[first:end])
+
+            # Sum every voice into every channel with one matrix product
+            np.dot(self._gains[:count].T, waves, out=mix)
+            if self._gains_changed:
+                # Crossfade from the previous gains so level and pan changes, and
+                # voices starting or stopping, do not click. Raised-cosine, like
+                # audio.envelope, so the gain starts and ends with zero slope.
+                previous = self._view(self._previous_mix, self.channels, frames)
+                np.dot(self._previous_gains[:count].T, waves, out=previous)
+                mix -= previous
+                fade = self._envelope[:frames]
+                np.multiply(self._ramp[1:frames + 1], np.pi / frames, out=fade)
+                np.cos(fade, out=fade)
+                fade *= -0.5
+                fade += 0.5
+                for channel in mix:
+                    channel *= fade
+                mix += previous
+                self._previous_gains[:count] = self._gains[:count]
+                self._gains_changed = False
+                self._drop_removed()
+
+            advance = self._voice_scratch[:count]
+            np.multiply(self.increment[:count], frames, out=advance)
+            self.phase[:count] += advance
+            wrap_phase(self.phase[:count], advance)
+
+        self._limit(mix, frames)
+        out[:] = mix.T
+        return out
+
+    def _sines(self, first, end, frames, phase, scratch, waves):
+        # Sine voices without a float64 np.sin per sample, which costs more than
+        # the rest of the block. Sample n = q * span + r splits each voice's
+        # angle into a coarse part per q and a fine part per r, and
+        # sin(A + B) = sin A cos B + cos A sin B over every (q, r) is one
+        # batched matrix product. These rows of `phase` and `scratch` hold the
+        # parts. Returns False, leaving the rows to shape_wave, for block
+        # sizes that do not split into such tiles.
+        span = 1 << (frames.bit_length() - 1) // 2  # Largest power of two up to sqrt(frames)
+        tiles = frames // span
+        if frames % span or 3 * tiles > frames:
+            return False
+        rows = end - first
+        # sin and cos each fill one contiguous block; a strided output makes the
+        # ufunc allocate buffers. matmul reads them through transposed views.
+        work = phase[first:end].reshape(-1)
+        coarse = work[:rows * tiles].reshape(rows, tiles)
+        left = work[rows * tiles:3 * rows * tiles].reshape(2, rows, tiles)
+        work = scratch[first:end].reshape(-1)
+        fine = work[:rows * span].reshape(rows, span)
+        right = work[rows * span:3 * rows * span].reshape(2, rows, span)
+
+        # Start phase plus increment * q * span and increment * r, both wrapped
+        # as np.sin is twice as slow past 2 pi
+        np.dot(self._phase_terms[first:end], self._ramp_rows[:, :frames:span], out=coarse)
+        wrap_phase(coarse, left[0])  # `left` is filled after
+        coarse *= 2 * np.pi
+        np.sin(coarse, out=left[0])
+        np.cos(coarse, out=left[1])
+        np.dot(self.increment[first:end, None], self._ramp_rows[:1, :span], out=fine)
+        wrap_phase(fine, right[0])
+        fine *= 2 * np.pi
+        np.cos(fine, out=right[0])
+        np.sin(fine, out=right[1])
+        np.matmul(left.transpose(1, 2, 0), right.transpose(1, 0, 2), out=waves[first:end].reshape(rows, tiles, span))
+        return True
+
+    def _limit(self, mix, frames):
+        # Glide the limiter gain towards whatever keeps this block under the
+        # ceiling, recovering slowly once the peaks have passed. Anything that
+        # still overshoots while the gain is moving is clipped.
+        peak = max(mix.max(), -mix.min())
+        target = min(1.0, self.ceiling / peak) if peak > 0 else 1.0
+        if target < self.limiter_gain:
+            new_gain = target
+        else:
+            new_gain = self.limiter_gain + (target - self.limiter_gain) * (1.0 - (1.0 - self._release) ** frames)
+        if new_gain == 1.0 and self.limiter_gain == 1.0:
+            return
+        envelope = self._envelope[:frames]
+        np.multiply(self._ramp[1:frames + 1], (new_gain - self.limiter_gain) / frames, out=envelope)
+        envelope += self.limiter_gain
+        for channel in mix:  # Row by row; a broadcast allocates buffers on the audio thread
+            channel *= envelope
+        np.clip(mix, -self.ceiling, self.ceiling, out=mix)
+        self.limiter_gain = new_gain
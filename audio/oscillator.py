@@ -0,0 +1,243 @@
+import numpy as np
+from audio.blep import BandLimitedShaper
+from audio.smoothing import SmoothedValue
+from audio.waveform import SWEEP_METHODS, sweep_phase
+from audio.wavetable import WavetableReader
+
+WAVE_TYPES = ("sine", "square", "triangle", "sawtooth")
+MODES = ("direct", "wavetable", "polyblep")
+SMOOTHING_TIME = 0.01  # Seconds taken to glide to a new frequency, amplitude or phase
+# The phase accumulator counts 2^-PHASE_BITS of a cycle. Integer sums do not
+# depend on how the stream is split into blocks, so a tone rendered in any
+# block size is the same sample for sample, and every count converts to
+# float64 exactly.
+PHASE_BITS = 52
+PHASE_MASK = (1 << PHASE_BITS) - 1
+
+class Oscillator:
+    def __init__(self, wave_type, frequency, sample_rate, amplitude, phase_shift=0, duty_cycle=0.5, max_frames=4096,
+                 mode="direct", dtype=np.float32):
+        if wave_type not in WAVE_TYPES:
+            raise ValueError(f"Unsupported wave type: {wave_type}")
+        if mode not in MODES:
+            raise ValueError(f"Unsupported oscillator mode: {mode}")
+        self.wave_type = wave_type
+        self.frequency = frequency
+        self.sample_rate = sample_rate
+        self.amplitude = amplitude
+        self.phase_shift = phase_shift  # Degrees
+        self.duty_cycle = duty_cycle  # Fraction of the period spent high (square only)
+        self.phase = 0  # Phase accumulator in 2^-PHASE_BITS cycles, carried between blocks
+        self.dtype = np.dtype(dtype)  # Sample format of the blocks this oscillator fills
+
+        ramp_frames = sample_rate * SMOOTHING_TIME
+        self._increment = SmoothedValue(frequency / sample_rate, ramp_frames)
+        self._amplitude = SmoothedValue(amplitude, ramp_frames)
+        self._phase_shift = SmoothedValue(phase_shift / 360.0, ramp_frames)
+        self._fade_from = None  # Previous wave type while crossfading to a new one
+        # "wavetable" reads band-limited tables instead of computing the shape directly;
+        # "polyblep" computes it directly and smooths the discontinuities
+        self._wavetable = WavetableReader(sample_rate, max_frames) if mode == "wavetable" else None
+        self._shaper = BandLimitedShaper(max_frames) if mode == "polyblep" else None
+        self._allocate(max_frames)
+
+    def _allocate(self, frames):
+        # Scratch buffers reused by every block. Phase and shaping run in
+        # float64 like audio.waveform: in float32, ramp * increment is off by
+        # up to 2^-24 of a whole block's phase, a -68 dB floor at 15 kHz.
+        # Samples are narrowed to self.dtype only as they are written to out.
+        self._ramp = np.arange(frames + 1, dtype=np.float64)
+        self._steps = np.arange(frames + 1, dtype=np.uint64)
+        self._count_buffer = np.empty(frames, dtype=np.uint64)
+        self._phase_buffer = np.empty(frames)
+        self._control_buffer = np.empty(frames)
+        self._increment_buffer = np.empty(frames)  # Kept until shaping, which may need it
+        self._wave_buffer = np.empty(frames)
+        self._fade_buffer = np.empty(frames)
+        self._shape_buffer = np.empty(frames)
+        self._mask = np.empty(frames, dtype=bool)
+
+    def reset(self, wave_type, frequency, amplitude, phase_shift=0, duty_cycle=0.5):
+        # Restart from phase zero with new parameters and no glide, reusing
+        # this oscillator's buffers (and its wavetable or shaper)
+        if wave_type not in WAVE_TYPES:
+            raise ValueError(f"Unsupported wave type: {wave_type}")
+        self.wave_type = wave_type
+        self.frequency = frequency
+        self.amplitude = amplitude
+        self.phase_shift = phase_shift
+        self.duty_cycle = duty_cycle
+        self.phase = 0
+        self._increment.reset(frequency / self.sample_rate)
+        self._amplitude.reset(amplitude)
+        self._phase_shift.reset(phase_shift / 360.0)
+        self._fade_from = None
+
+    def set(self, frequency=None, amplitude=None, phase_shift=None, duty_cycle=None, wave_type=None, ramp_frames=None):
+        # Change parameters of a running oscillator. Frequency, amplitude and phase
+        # glide to their new values (over ramp_frames samples if given, otherwise
+        # SMOOTHING_TIME); a new wave type is crossfaded in over one block.
+        if wave_type is not None and wave_type != self.wave_type:
+            if wave_type not in WAVE_TYPES:
+                raise ValueError(f"Unsupported wave type: {wave_type}")
+            self._fade_from = self.wave_type
+            self.wave_type = wave_type
+        if frequency is not None and frequency != self.frequency:
+            self.frequency = frequency
+            self._increment.set(frequency / self.sample_rate, ramp_frames)
+        if amplitude is not None and amplitude != self.amplitude:
+            self.amplitude = amplitude
+            self._amplitude.set(amplitude, ramp_frames)
+        if phase_shift is not None and phase_shift != self.phase_shift:
+            self.phase_shift = phase_shift
+            self._phase_shift.set(phase_shift / 360.0, ramp_frames)
+        if duty_cycle is not None:
+            self.duty_cycle = duty_cycle
+
+    def render(self, frames, out=None):
+        # Produce the next `frames` samples and advance the phase accumulator
+        if frames >= len(self._ramp):
+            self._allocate(frames)
+        if out is None:
+            out = np.empty(frames, dtype=self.dtype)
+
+        phase = self._phase_buffer[:frames]
+        control = self._control_buffer[:frames]
+        counts = self._ramp[1:frames + 1]
+
+        increment = self._increment.fill(self._increment_buffer[:frames], counts)
+        if isinstance(increment, np.ndarray):
+            # Frequency is gliding: integrate the per-sample increments
+            np.cumsum(increment, out=phase)
+            advance = int(round(phase[-1] * 2 ** PHASE_BITS))
+            phase -= increment
+            phase += self.phase / 2 ** PHASE_BITS
+        else:
+            # n * increment + phase in fixed point; uint64 wraps modulo 2^64,
+            # a whole number of cycles
+            step = int(round(increment * 2 ** PHASE_BITS)) & PHASE_MASK
+            counts_fixed = self._count_buffer[:frames]
+            np.multiply(self._steps[:frames], np.uint64(step), out=counts_fixed)
+            counts_fixed += np.uint64(self.phase)
+            counts_fixed &= np.uint64(PHASE_MASK)
+            np.copyto(phase, counts_fixed, casting="unsafe")
+            phase *= 2.0 ** -PHASE_BITS
+            advance = step * frames
+        phase += self._phase_shift.fill(control, counts)
+        wrap_phase(phase, self._shape_buffer[:frames])
+
+        wave = out if out.dtype == np.float64 else self._wave_buffer[:frames]
+        self._shape(self.wave_type, phase, wave, increment)
+        if self._fade_from is not None:
+            fade = self._fade_buffer[:frames]
+            self._shape(self._fade_from, phase, fade, increment)
+            wave -= fade
+            wave *= counts
+            wave /= frames
+            wave += fade
+            self._fade_from = None
+        wave *= self._amplitude.fill(control, counts)
+        if wave is not out:
+            np.copyto(out, wave, casting="same_kind")
+
+        self.phase = (self.phase + advance) & PHASE_MASK
+        return out
+
+    def _shape(self, wave_type, phase, out, increment):
+        if self._shaper is not None:
+            self._shaper.shape(wave_type, phase, increment, out, self.duty_cycle)
+        elif self._wavetable is not None:
+            # Pick tables for the highest frequency reached during this block
+            frequency = max(self._increment.value, self._increment.target) * self.sample_rate
+            self._wavetable.shape(wave_type, frequency, phase, out, self.duty_cycle)
+        else:
+            shape_wave(wave_type, phase, out, self.duty_cycle, self._shape_buffer[:len(phase)], self._mask[:len(phase)])
+
+class Sweep:
+    # Streams a frequency sweep block by block. Phase is evaluated in closed
+    # form from the sample index, so sweeps of any length stay exact and have
+    # no discontinuities. Silent once the sweep is over.
+    def __init__(self, start_frequency, end_frequency, duration, sample_rate, amplitude, method="linear", steps=10,
+                 wave_type="sine", duty_cycle=0.5, max_frames=4096, dtype=np.float32):
+        if method not in SWEEP_METHODS:
+            raise ValueError(f"Unsupported sweep method: {method}")
+        if wave_type not in WAVE_TYPES:
+            raise ValueError(f"Unsupported wave type: {wave_type}")
+        self.start_frequency = start_frequency
+        self.end_frequency = end_frequency
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.amplitude = amplitude
+        self.method = method
+        self.steps = steps
+        self.wave_type = wave_type
+        self.duty_cycle = duty_cycle
+        self.dtype = np.dtype(dtype)
+        self.position = 0  # Samples rendered so far
+        self.length = int(round(duration * sample_rate))
+        self._allocate(max_frames)
+
+    def _allocate(self, frames):
+        self._ramp = np.arange(frames, dtype=np.float64)
+        self._time = np.empty(frames, dtype=np.float64)
+        self._phase = np.empty(frames, dtype=np.float64)
+        self._shape_phase = np.empty(frames, dtype=self.dtype)
+        self._scratch = np.empty(frames, dtype=self.dtype)
+        self._mask = np.empty(frames, dtype=bool)
+
+    @property
+    def finished(self):
+        return self.position >= self.length
+
+    def render(self, frames, out=None):
+        if frames > len(self._ramp):
+            self._allocate(frames)
+        if out is None:
+            out = np.empty(frames, dtype=self.dtype)
+        active = min(frames, max(self.length - self.position, 0))
+        out[active:] = 0.0
+        if active:
+            t = self._time[:active]
+            np.add(self._ramp[:active], self.position, out=t)
+            t /= self.sample_rate
+            phase = sweep_phase(t, self.start_frequency, self.end_frequency, self.duration, self.method, self.steps,
+                                out=self._phase[:active])
+            wrap_phase(phase, t)
+            shape_phase = self._shape_phase[:active]
+            np.copyto(shape_phase, phase, casting="same_kind")
+            shape_wave(self.wave_type, shape_phase, out[:active], self.duty_cycle, self._scratch[:active], self._mask[:active])
+            out[:active] *= self.amplitude
+        self.position += frames
+        return out
+
+def wrap_phase(values, scratch):
+    # values %= 1.0, using floor which is many times faster than np.mod
+    np.floor(values, out=scratch)
+    values -= scratch
+
+def shape_wave(wave_type, phase, out, duty_cycle, scratch, mask):
+    # Map phase in cycles [0, 1) to a unit amplitude waveform. Works on blocks of
+    # any shape; duty_cycle may be a scalar or broadcast against phase, and
+    # scratch/mask are buffers the same shape as phase.
+    if wave_type == "sine":
+        np.multiply(phase, 2 * np.pi, out=out)
+        np.sin(out, out=out)
+    elif wave_type == "square":
+        np.less(phase, duty_cycle, out=mask)
+        np.copyto(out, mask)
+        out *= 2.0
+        out -= 1.0
+    elif wave_type == "triangle":
+        # Starts at -1, peaks at +1 half way through the cycle
+        np.add(phase, 0.5, out=out)
+        wrap_phase(out, scratch)
+        out *= 4.0
+        out -= 2.0
+        np.abs(out, out=out)
+        out -= 1.0
+    elif wave_type == "sawtooth":
+        # Rises from 0 through +1, wraps to -1 half way through the cycle
+        np.add(phase, 0.5, out=out)
+        wrap_phase(out, scratch)
+        out *= 2.0
+        out -= 1.0
@@ -1,37 +1,253 @@
-import sounddevice as sd
+import threading
+import time
+from time import perf_counter_ns
 import numpy as np
+from collections import namedtuple
+from audio.backends import open_stream
+from audio.config import AudioConfig, check_config
+from audio.envelope import Envelope
+from audio.oscillator import WAVE_TYPES, Oscillator
+from audio.routing import SMOOTHING_TIME, Router, default_routing, pan_gains
+from audio.stats import CallbackStats
+from audio.waveform import LoopSource
+
+# Immutable block of the most recently requested tone parameters. The control
+# thread publishes a new block by swapping a single reference, and the audio
+# callback picks it up at the start of the next block, so neither side needs a
+# lock. None means "leave unchanged". `routing` is the gain matrix from
+# source channels to device channels, worked out by the control thread.
+ToneParams = namedtuple("ToneParams", ["frequency", "volume", "pan", "phase_shift", "duty_cycle", "wave_type",
+                                       "routing"], defaults=(None,) * 7)
+
+AUTO_TUNE_BLOCKSIZES = (2048, 1024, 512, 256, 128, 64, 32)
 
 class ToneGenerator:
-    def __init__(self, sample_rate=44100):
+    # Plays a source through the output device, or other backend, described
+    # by an audio.config.AudioConfig (the defaults if none is given)
+    def __init__(self, config=None, max_frames=4096, envelope=None):
+        self.config = check_config(config or AudioConfig())
+        sample_rate = self.config.sample_rate
         self.sample_rate = sample_rate
+        self.sample_format = self.config.sample_format
+        self.channels = self.config.channels
+        max_frames = max(max_frames, self.config.blocksize)
+        self.dtype = np.dtype(np.float32)  # Format sources render in
         self.stream = None
-        self.waveform = None
+        self.source = None
         self.is_playing = False
+        self.max_frames = max_frames
+        # Routes the source's channels to the device's: a pan law for mono
+        # sources, replaced in start() to suit the source being played
+        self.router = Router(self.pan_routing(0.5), sample_rate * SMOOTHING_TIME, max_frames)
+        # Output envelope: fades in on start() and releases on stop(), so the
+        # stream never starts or ends at an arbitrary sample value
+        self.envelope = envelope or Envelope(sample_rate, max_frames=max_frames, dtype=self.dtype)
+        self._release_requested = False  # Set by stop(), acted on by the callback
+        self._drained = threading.Event()  # Set by the callback once the release has finished
+        self.stats = CallbackStats(sample_rate)
+        self._allocate(max_frames)
+        self.tap = np.zeros(sample_rate, dtype=self.dtype)  # Ring of the most recently played samples
+        self.tap_position = 0
+        self._params = ToneParams()  # Latest parameters, written only by the control thread
+        self._applied_params = self._params  # Parameters in effect, written only by the callback
+
+    def _allocate(self, frames):
+        # Scratch buffers reused by every callback
+        self._block = np.zeros(frames, dtype=self.dtype)  # Mono render
+        self._envelope = np.zeros(frames, dtype=self.dtype)  # Per-sample envelope gain
+        self._inputs = np.zeros((frames, self.router.inputs), dtype=self.dtype)  # Multichannel source render
+        self._downmix = np.full(self.router.inputs, 1 / self.router.inputs, dtype=self.dtype)  # Mean of the inputs
+        self._output = np.zeros((frames, self.channels), dtype=self.dtype)  # Float mix ahead of integer conversion
+        self._integer = np.zeros((frames, self.channels), dtype=np.float64)  # Integer scaling, exact in float64
 
-    def start(self, waveform, pan=0.5):
-        self.waveform = waveform
-        self.stream = sd.OutputStream(callback=self.audio_callback, samplerate=self.sample_rate, channels=2)
+    def pan_routing(self, pan):
+        # Equal-power routing of a mono source across the device's channels
+        return pan_gains(pan, self.channels)[None, :].astype(self.dtype)
+
+    def start(self, source, pan=0.5, routing=None):
+        # `source` is either a waveform array to loop, or an object with a
+        # render(frames, out) method such as audio.oscillator.Oscillator or
+        # audio.mixer.Mixer. A mono source is panned across the device's
+        # channels; a multichannel one is routed channel for channel unless
+        # a (source channels x device channels) `routing` matrix is given.
+        self.prepare(source, pan, routing)
+        self.stream = open_stream(self.audio_callback, self.config)
         self.is_playing = True
-        
-        # Adjust waveform for panning
-        self.adjust_pan(pan)
-        
         self.stream.start()
 
+    def prepare(self, source, pan=0.5, routing=None):
+        # Everything start() does short of opening the stream, so the callback
+        # can also be driven by something other than a sound device
+        if isinstance(source, np.ndarray):
+            source = LoopSource(source)
+        self.source = source
+        source_channels = getattr(source, "channels", 1)
+        if routing is None:
+            routing = self.pan_routing(pan) if source_channels == 1 else default_routing(source_channels, self.channels)
+        self.router = Router(routing, self.router.ramp_frames, self.max_frames)
+        if self.router.inputs != source_channels:
+            raise ValueError(f"Routing matrix has {self.router.inputs} inputs but the source has {source_channels} channels")
+        self._allocate(len(self._block))
+        self._params = self._applied_params = ToneParams(pan=pan, routing=self.router.matrix)
+        self._release_requested = False
+        self._drained.clear()
+        self.envelope.gate_on()
+
     def stop(self):
+        # Release the envelope and close the stream once the tail has been
+        # played. The wait is bounded in case the callback has stopped running.
         if self.stream:
+            if self.stream.active:
+                self._release_requested = True
+                self._drained.wait(self.envelope.release_time + 0.5)
             self.stream.stop()
             self.stream.close()
+            self.stream = None
         self.is_playing = False
 
     def audio_callback(self, outdata, frames, time, status):
-        if self.waveform is not None:
-            outdata[:, 0] = self.waveform[:frames] * self.left_gain  # Left channel
-            outdata[:, 1] = self.waveform[:frames] * self.right_gain  # Right channel
-            self.waveform = np.roll(self.waveform, -frames)
+        started = perf_counter_ns()
+        self._render(outdata, frames)
+        self.stats.record(frames, perf_counter_ns() - started, bool(status and status.output_underflow))
+
+    def _render(self, outdata, frames):
+        source = self.source
+        if source is None:
+            outdata.fill(0)
+            return
+
+        params = self._params
+        if params is not self._applied_params:
+            self._apply_params(source, params)
+
+        if frames > len(self._block):
+            self._allocate(frames)
+        envelope = self.envelope
+        if self._release_requested:
+            self._release_requested = False
+            envelope.gate_off()
+        if envelope.finished:
+            # Release has drained; play silence until stop() closes the stream
+            outdata.fill(0)
+            self._drained.set()
+            return
+        gain = envelope.fill(self._envelope[:frames])
+        # Route straight into the device buffer when it is float32
+        target = outdata if outdata.dtype == self.dtype else self._output[:frames]
+        if self.router.inputs > 1:
+            # Sources such as audio.mixer.Mixer render their own channels
+            inputs = source.render(frames, out=self._inputs[:frames])
+            if isinstance(gain, np.ndarray):
+                # One channel at a time: a broadcast gain column makes numpy allocate buffers
+                for channel in inputs.T:
+                    channel *= gain
+            elif gain != 1.0:
+                inputs *= gain
+            block = np.dot(inputs, self._downmix, out=self._block[:frames])
+        else:
+            block = source.render(frames, out=self._block[:frames])
+            if isinstance(gain, np.ndarray) or gain != 1.0:
+                block *= gain
+            inputs = block[:, None]
+        # One product (or crossfade between two) maps every source channel to every device channel
+        self.router.process(inputs, target)
+        self._write_tap(block)
+        if target is not outdata:
+            self._to_integer(target, outdata)
+
+    def _to_integer(self, samples, outdata):
+        # Scale, round and then clip in float64, where the integer bounds are
+        # exact; clipping first let 32767.998 round up to 32768 and wrap
+        scale = float(2 ** (8 * outdata.dtype.itemsize - 1))
+        scaled = self._integer[:len(samples)]
+        np.copyto(scaled, samples)  # Widened first: a mixed-dtype multiply allocates cast buffers
+        scaled *= scale
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, -scale, scale - 1, out=scaled)
+        np.copyto(outdata, scaled, casting="unsafe")
+
+    def _write_tap(self, block):
+        tap = self.tap
+        frames = min(len(block), len(tap))
+        block = block[-frames:]
+        position = self.tap_position
+        first = min(frames, len(tap) - position)
+        tap[position:position + first] = block[:first]
+        tap[:frames - first] = block[first:]
+        self.tap_position = (position + frames) % len(tap)
+
+    def _apply_params(self, source, params):
+        # Runs on the audio thread at a block boundary
+        if params.routing is not self._applied_params.routing:
+            self.router.set(params.routing)
+        if hasattr(source, "set"):
+            source.set(frequency=params.frequency, amplitude=params.volume, phase_shift=params.phase_shift,
+                       duty_cycle=params.duty_cycle, wave_type=params.wave_type)
+        self._applied_params = params
+
+    def update(self, frequency=None, volume=None, pan=None, phase_shift=None, duty_cycle=None, wave_type=None,
+               routing=None):
+        # Change the running tone in place; takes effect from the next block and the
+        # stream stays open. Must be called from a single control thread. Pan and
+        # routing changes are crossfaded; pan applies to mono sources only.
+        # Values are checked here: once published, a bad one would make every
+        # callback raise.
+        if wave_type is not None and wave_type not in WAVE_TYPES:
+            raise ValueError(f"Unsupported wave type: {wave_type}")
+        numbers = dict(frequency=frequency, volume=volume, pan=pan, phase_shift=phase_shift, duty_cycle=duty_cycle)
+        for name, value in numbers.items():
+            if value is not None and not np.isfinite(float(value)):
+                raise ValueError(f"{name} must be a finite number")
+        if min(frequency or 0.0, volume or 0.0) < 0:
+            raise ValueError("Frequency and volume must not be negative")
+        if not 0.0 <= (0.5 if pan is None else pan) <= 1.0:
+            raise ValueError("Pan must be between 0 and 1")
+        if not 0.0 <= (0.5 if duty_cycle is None else duty_cycle) <= 1.0:
+            raise ValueError("Duty cycle must be between 0 and 1")
+        if routing is not None:
+            routing = np.array(routing, dtype=self.dtype)
+            if routing.shape != self.router.matrix.shape:
+                raise ValueError(f"Routing matrix must be {self.router.matrix.shape}, got {routing.shape}")
+        elif pan is not None and self.router.inputs == 1:
+            routing = self.pan_routing(pan)
+        changes = dict(frequency=frequency, volume=volume, pan=pan, phase_shift=phase_shift,
+                       duty_cycle=duty_cycle, wave_type=wave_type, routing=routing)
+        self._params = self._params._replace(**{name: value for name, value in changes.items() if value is not None})
 
-    def adjust_pan(self, pan):
-        # Calculate left and right channel gains based on pan
-        self.left_gain = np.cos(pan * np.pi / 2)
-        self.right_gain = np.sin(pan * np.pi / 2)
+    def snapshot(self, length):
+        # Copy of the last `length` samples that were sent to the device. The
+        # callback keeps writing while we copy, so retry if it lapped the region.
+        if self.source is None:
+            return None
+        length = min(length, len(self.tap) // 2)
+        while True:
+            position = self.tap_position
+            indices = np.arange(position - length, position)
+            snapshot = np.take(self.tap, indices, mode="wrap")
+            if (self.tap_position - position) % len(self.tap) <= len(self.tap) - length:
+                return snapshot
 
+def auto_tune(config, probe_time=1.0, max_load=0.5, blocksizes=AUTO_TUNE_BLOCKSIZES):
+    # Play silence through the real render path at decreasing block sizes
+    # with low latency, and settle on the smallest one that ran for
+    # probe_time with no underflows and its worst callback under max_load
+    # of the block's duration. Returns the config to use and the stream
+    # latency in seconds that it achieved.
+    chosen = None
+    for blocksize in blocksizes:
+        candidate = config._replace(blocksize=blocksize, latency="low")
+        tone_generator = ToneGenerator(candidate)
+        tone_generator.start(Oscillator("sine", 440, config.sample_rate, 0.0))
+        time.sleep(0.2)  # Let the stream settle before counting
+        tone_generator.stats.reset()  # Racing one callback here skews at most a single block
+        time.sleep(probe_time)
+        stats = tone_generator.stats.snapshot()
+        latency = tone_generator.stream.latency
+        tone_generator.stop()
+        if stats["underflows"] or stats["max_load"] > max_load or not stats["callbacks"]:
+            break
+        chosen = (candidate, latency)
+    if chosen is None:
+        # Even the largest block was unstable; leave the choice to the host
+        return config, None
+    return chosen
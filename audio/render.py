@@ -0,0 +1,37 @@
+import numpy as np
+from audio.routing import pan_gains
+from audio.writers import open_writer
+
+CHUNK_FRAMES = 8192
+
+def render_to_file(source, path, duration, sample_rate, pan=0.5, subtype="PCM_16", file_format=None,
+                   chunk_frames=CHUNK_FRAMES, channels=2):
+    # Render `duration` seconds of `source` to `path` one chunk at a time, so
+    # memory use is bounded by the chunk size however long the render is.
+    # Mono sources are panned across `channels` like ToneGenerator does;
+    # sources with their own channels (audio.mixer.Mixer) are written as rendered.
+    if getattr(source, "channels", 1) == 1:
+        gains = pan_gains(pan, channels).astype(getattr(source, "dtype", np.float32))
+    else:
+        channels = source.channels
+        gains = None
+
+    total = int(round(duration * sample_rate))
+    dtype = getattr(source, "dtype", np.float32)
+    mono = np.empty(chunk_frames, dtype=dtype)
+    block = np.empty((chunk_frames, channels), dtype=dtype)
+    writer = open_writer(path, sample_rate, channels, subtype, file_format)
+    try:
+        remaining = total
+        while remaining > 0:
+            frames = min(chunk_frames, remaining)
+            if gains is None:
+                source.render(frames, out=block[:frames])
+            else:
+                source.render(frames, out=mono[:frames])
+                np.multiply(mono[:frames, None], gains, out=block[:frames])
+            writer.write(block[:frames])
+            remaining -= frames
+    finally:
+        writer.close()
+    return total
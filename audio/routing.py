@@ -0,0 +1,106 @@
+import numpy as np
+
+SMOOTHING_TIME = 0.01  # Seconds taken to crossfade to a new routing matrix
+
+def pan_gains(position, channels, ring=False):
+    # Equal-power gains placing a source at `position` (0 to 1) along a row
+    # of `channels` speakers, or around a ring of them. The source sounds
+    # from the two nearest speakers with cos/sin gains, so its power is the
+    # same wherever it is; with two speakers this is the usual stereo pan
+    # law. `position` may be an array, giving one row of gains per entry.
+    position = np.asarray(position, dtype=np.float64)
+    gains = np.zeros(position.shape + (channels,))
+    if channels == 1:
+        gains[...] = 1.0
+        return gains
+    spread = channels if ring else channels - 1
+    place = position * spread
+    if ring:
+        place %= channels
+    first = np.minimum(np.floor(place), spread - 1).astype(np.intp)
+    fraction = place - first
+    second = (first + 1) % channels
+    np.put_along_axis(gains, first[..., None], np.cos(fraction * np.pi / 2)[..., None], axis=-1)
+    np.put_along_axis(gains, second[..., None], np.sin(fraction * np.pi / 2)[..., None], axis=-1)
+    return gains
+
+def default_routing(inputs, outputs):
+    # Input i to output i; a mono device gets the average of every input
+    if outputs == 1:
+        return np.full((inputs, 1), 1.0 / inputs)
+    return np.eye(inputs, outputs)
+
+class Router:
+    # Mixes `inputs` channels into `outputs` channels through a gain matrix
+    # with one matrix product per block. A new matrix is crossfaded in over
+    # `ramp_frames` samples, so routing and pan changes do not click; only
+    # the matrices and the crossfade position are carried between blocks.
+    def __init__(self, matrix, ramp_frames=441, max_frames=4096, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        self.matrix = np.array(matrix, dtype=self.dtype)
+        self.inputs, self.outputs = self.matrix.shape
+        self.ramp_frames = max(int(ramp_frames), 1)
+        self._from = self.matrix.copy()  # Matrix being faded out
+        self._delta = np.empty_like(self.matrix)
+        self._elapsed = self.ramp_frames  # Samples into the current crossfade
+        self._identity = self._is_identity(self.matrix)  # Lets a matching source pass straight through
+        self._allocate(max_frames)
+
+    def _allocate(self, frames):
+        self._ramp = np.arange(1, frames + 1, dtype=self.dtype)
+        self._fade = np.empty(frames, dtype=self.dtype)
+        self._previous = np.empty((frames, self.outputs), dtype=self.dtype)
+
+    @property
+    def is_ramping(self):
+        return self._elapsed < self.ramp_frames
+
+    def set(self, matrix, smooth=True):
+        # The router keeps a reference to `matrix`, which must not be changed afterwards
+        matrix = np.asarray(matrix, dtype=self.dtype)
+        if matrix.shape != self.matrix.shape:
+            raise ValueError(f"Routing matrix must be {self.matrix.shape}, got {matrix.shape}")
+        if smooth:
+            # Start from wherever a crossfade still in progress has got to
+            np.subtract(self.matrix, self._from, out=self._delta)
+            self._delta *= min(self._elapsed / self.ramp_frames, 1.0)
+            self._from += self._delta
+            self._elapsed = 0
+        else:
+            self._from[...] = matrix
+            self._elapsed = self.ramp_frames
+        self.matrix = matrix
+        self._identity = self._is_identity(self.matrix)
+
+    def _is_identity(self, matrix):
+        return self.inputs == self.outputs and np.array_equal(matrix, np.eye(self.inputs))
+
+    def process(self, inputs, out):
+        # inputs is (frames, self.inputs) and out (frames, self.outputs), C-contiguous
+        frames = len(inputs)
+        if frames > len(self._ramp):
+            self._allocate(frames)
+        if self.is_ramping:
+            previous = self._previous[:frames]
+            self._apply(inputs, self._from, previous)
+            self._apply(inputs, self.matrix, out)
+            fade = self._fade[:frames]
+            np.add(self._ramp[:frames], self._elapsed, out=fade)
+            fade /= self.ramp_frames
+            np.minimum(fade, 1.0, out=fade)
+            out -= previous
+            for channel in out.T:  # Not a broadcast, which allocates buffers on the audio thread
+                channel *= fade
+            out += previous
+            self._elapsed += frames
+        elif self._identity:
+            np.copyto(out, inputs)
+        else:
+            self._apply(inputs, self.matrix, out)
+        return out
+
+    @staticmethod
+    def _apply(inputs, matrix, out):
+        # np.dot writes straight into `out`, even for a mono input, where a
+        # broadcast multiply would allocate a temporary the size of the block
+        np.dot(inputs, matrix, out=out)
@@ -0,0 +1,240 @@
+import json
+import os
+from bisect import bisect_left
+import numpy as np
+from audio.envelope import SHAPES, Envelope
+from audio.oscillator import WAVE_TYPES, Oscillator
+from audio.routing import pan_gains
+
+# Defaults for fields an event leaves out; match the CLI defaults
+EVENT_DEFAULTS = {
+    "wave_type": "sine",
+    "frequency": 440.0,
+    "volume": 0.5,
+    "pan": 0.5,
+    "phase_shift": 0.0,
+    "duty_cycle": 0.5,
+    "attack": 0.005,
+    "decay": 0.0,
+    "sustain": 1.0,
+    "release": 0.005,
+    "envelope": "cosine",
+}
+NUMERIC_FIELDS = ("start", "duration", "frequency", "volume", "pan", "phase_shift", "duty_cycle", "attack", "decay",
+                  "sustain", "release")
+RAMP_FIELDS = ("frequency", "volume", "phase_shift", "duty_cycle", "wave_type")
+# Order of actions that fall on the same sample: free voices before starting new ones
+ACTION_ORDER = {"stop": 0, "start": 1, "ramp": 2, "release": 3}
+
+def load_sequence(path):
+    # Read tone events from a .json file (a list, or an object with "events")
+    # or a .jsonl file with one event per line. Each event needs "start" and
+    # "duration" in seconds and may carry "ramps": a list of parameter glides
+    # with "time" (seconds after the event starts), "duration" and new values.
+    # "attack", "decay", "sustain" and "release" shape each event's envelope,
+    # whose segments are raised-cosine unless "envelope" is "linear".
+    extension = os.path.splitext(path)[1].lower()
+    with open(path) as sequence:
+        if extension == ".json":
+            events = json.load(sequence)
+            if isinstance(events, dict):
+                if "events" not in events:
+                    raise ValueError("A sequence object needs an 'events' list")
+                events = events["events"]
+        elif extension == ".jsonl":
+            events = [json.loads(line) for line in sequence if line.strip()]
+        else:
+            raise ValueError(f"Unsupported sequence format: {extension}")
+    if not isinstance(events, list):
+        raise ValueError("A sequence must be a list of events")
+    return [normalize_event(event, index) for index, event in enumerate(events)]
+
+def normalize_event(event, index=0):
+    # Check and coerce every value here, so nothing invalid reaches the
+    # audio thread; errors name the event
+    if not isinstance(event, dict):
+        raise ValueError(f"Sequence event {index} is not an object")
+    for field in ("start", "duration"):
+        if field not in event:
+            raise ValueError(f"Sequence event {index} has no '{field}'")
+    event = {**EVENT_DEFAULTS, **event}
+    if event["wave_type"] not in WAVE_TYPES:
+        raise ValueError(f"Sequence event {index} has unsupported wave type: {event['wave_type']}")
+    if event["envelope"] not in SHAPES:
+        raise ValueError(f"Sequence event {index} has unsupported envelope shape: {event['envelope']}")
+    for field in NUMERIC_FIELDS:
+        event[field] = _number(event[field], field, index)
+    if event["start"] < 0 or event["duration"] <= 0:
+        raise ValueError(f"Sequence event {index} needs start >= 0 and duration > 0")
+    if min(event["attack"], event["decay"], event["release"]) < 0 or not 0 <= event["sustain"] <= 1:
+        raise ValueError(f"Sequence event {index} needs attack, decay and release >= 0 and sustain from 0 to 1")
+    if not 0 <= event["duty_cycle"] <= 1:
+        raise ValueError(f"Sequence event {index} needs a duty_cycle from 0 to 1")
+    if not isinstance(event.get("ramps", []), list):
+        raise ValueError(f"Sequence event {index} has 'ramps' that is not a list")
+    event["ramps"] = [_normalize_ramp(ramp, event, index) for ramp in event.get("ramps", [])]
+    return event
+
+def _normalize_ramp(ramp, event, index):
+    if not isinstance(ramp, dict):
+        raise ValueError(f"Sequence event {index} has a ramp that is not an object")
+    unknown = set(ramp) - set(RAMP_FIELDS) - {"time", "duration"}
+    if unknown:
+        raise ValueError(f"Sequence event {index} ramps unsupported fields: {', '.join(sorted(unknown))}")
+    if "time" not in ramp:
+        raise ValueError(f"Sequence event {index} has a ramp with no 'time'")
+    ramp = {"duration": 0.0, **ramp}
+    for field in ramp:
+        if field != "wave_type":
+            ramp[field] = _number(ramp[field], f"ramp {field}", index)
+    if "wave_type" in ramp and ramp["wave_type"] not in WAVE_TYPES:
+        raise ValueError(f"Sequence event {index} ramps to unsupported wave type: {ramp['wave_type']}")
+    if not 0 <= ramp["time"] < event["duration"] or ramp["duration"] < 0:
+        raise ValueError(f"Sequence event {index} has a ramp outside the event")
+    if not 0 <= ramp.get("duty_cycle", 0.5) <= 1:
+        raise ValueError(f"Sequence event {index} ramps to a duty_cycle outside 0 to 1")
+    return ramp
+
+def _number(value, field, index):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+    if isinstance(value, bool) or number is None or not np.isfinite(number):
+        raise ValueError(f"Sequence event {index} has a non-numeric '{field}': {value!r}")
+    return number
+
+class _Voice:
+    # One sounding event: an oscillator, its envelope and its fixed pan
+    # gains. Voices are pooled and reassigned, so starting an event on the
+    # audio thread allocates nothing.
+    def __init__(self, sample_rate, max_frames, dtype):
+        self.envelope = Envelope(sample_rate, max_frames=max_frames, dtype=dtype)
+        self.oscillator = Oscillator("sine", 440.0, sample_rate, 0.0, max_frames=max_frames, dtype=dtype)
+        self.gains = None
+
+    def assign(self, event, gains):
+        self.envelope.configure(event["attack"], event["decay"], event["sustain"], event["release"],
+                                event["envelope"])
+        self.envelope.gate_on()
+        self.oscillator.reset(event["wave_type"], event["frequency"], event["volume"], event["phase_shift"],
+                              event["duty_cycle"])
+        self.gains = gains
+
+class Sequencer:
+    # Plays a timeline of tone events with sample-accurate timing. Starts,
+    # stops and ramps are precomputed into one sorted list of sample
+    # positions; each block finds the actions due in it with a binary search
+    # and renders the spans between them, so timing never depends on when
+    # the callback runs. Works as a `channels` channel source for
+    # ToneGenerator or render_to_file; each event is panned across them.
+    def __init__(self, events, sample_rate, max_frames=4096, dtype=np.float32, channels=2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.max_frames = max_frames
+        self.events = events
+        self.position = 0  # Samples rendered so far
+
+        actions = []
+        for index, event in enumerate(events):
+            start = int(round(event["start"] * sample_rate))
+            length = max(int(round(event["duration"] * sample_rate)), 1)
+            actions.append((start, ACTION_ORDER["start"], index, "start", length))
+            actions.append((start + length, ACTION_ORDER["stop"], index, "stop", None))
+            # Release early enough that the tail has faded out by the stop
+            release = min(int(round(event["release"] * sample_rate)), length)
+            actions.append((start + length - release, ACTION_ORDER["release"], index, "release", None))
+            for ramp in event["ramps"]:
+                params = {("amplitude" if key == "volume" else key): value
+                          for key, value in ramp.items() if key in RAMP_FIELDS}
+                params["ramp_frames"] = float(ramp["duration"]) * sample_rate
+                actions.append((start + int(round(float(ramp["time"]) * sample_rate)), ACTION_ORDER["ramp"],
+                                index, "ramp", params))
+        actions.sort(key=lambda action: action[:3])
+        # Enough pooled voices for the most events that ever sound at once
+        sounding = voices = 0
+        for action in actions:
+            if action[3] in ("start", "stop"):
+                sounding += 1 if action[3] == "start" else -1
+                voices = max(voices, sounding)
+        self._free = [_Voice(sample_rate, max_frames, self.dtype) for _ in range(voices)]
+        self._gains = [pan_gains(event["pan"], channels)[None, :].astype(self.dtype) for event in events]
+        self._frames = [action[0] for action in actions]  # Sample position of each action, ascending
+        self._actions = actions
+        self._cursor = 0  # Index of the first action not yet applied
+        self.length = max((action[0] for action in actions), default=0)
+        self._voices = {}  # Event index -> _Voice, for events currently sounding
+        self._allocate(max_frames)
+
+    def _allocate(self, frames):
+        self._envelope = np.empty(frames, dtype=self.dtype)
+        self._block = np.empty(frames, dtype=self.dtype)
+        self._spread = np.empty((frames, self.channels), dtype=self.dtype)
+
+    @property
+    def finished(self):
+        return self.position >= self.length
+
+    def seek(self, seconds):
+        # Jump to a point on the timeline. Events already under way there are
+        # restarted from that point with their initial parameters.
+        self.position = int(round(seconds * self.sample_rate))
+        self._cursor = bisect_left(self._frames, self.position)  # Actions at the new position are still to come
+        self._free.extend(self._voices.values())
+        self._voices = {}
+        for start, _, index, kind, length in self._actions[:self._cursor]:
+            if kind == "start" and start + length > self.position:
+                self._start(index)
+            elif kind == "release" and index in self._voices:
+                self._voices[index].envelope.gate_off()
+
+    def render(self, frames, out=None):
+        if frames > len(self._block):
+            self._allocate(frames)
+        if out is None:
+            out = np.empty((frames, self.channels), dtype=self.dtype)
+        out[:frames] = 0.0
+
+        # Actions due before the end of this block
+        last = bisect_left(self._frames, self.position + frames, lo=self._cursor)
+        offset = 0
+        while self._cursor < last:
+            due = self._frames[self._cursor] - self.position
+            if due > offset:
+                self._render_span(out, offset, due)
+                offset = due
+            self._apply(self._actions[self._cursor])
+            self._cursor += 1
+        if offset < frames:
+            self._render_span(out, offset, frames)
+        self.position += frames
+        return out
+
+    def _apply(self, action):
+        start, _, index, kind, argument = action
+        if kind == "start":
+            self._start(index)
+        elif kind == "stop":
+            if index in self._voices:
+                self._free.append(self._voices.pop(index))
+        elif kind == "release" and index in self._voices:
+            self._voices[index].envelope.gate_off()
+        elif index in self._voices:
+            self._voices[index].oscillator.set(**argument)
+
+    def _start(self, index):
+        voice = self._free.pop()
+        voice.assign(self.events[index], self._gains[index])
+        self._voices[index] = voice
+
+    def _render_span(self, out, begin, end):
+        frames = end - begin
+        block = self._block[:frames]
+        spread = self._spread[:frames]
+        envelope = self._envelope[:frames]
+        for voice in self._voices.values():
+            voice.oscillator.render(frames, out=block)
+            block *= voice.envelope.fill(envelope)
+            np.dot(block[:, None], voice.gains, out=spread)  # A broadcast multiply allocates a temporary
+            out[begin:end] += spread
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import math
+import os
+import socket
+from collections import deque
+import numpy as np
+from audio.client import DEFAULT_SOCKET
+from audio.mixer import Mixer
+from audio.oscillator import WAVE_TYPES
+from audio.playback import ToneGenerator
+from audio.sequencer import Sequencer, load_sequence, normalize_event
+
+# Fields a client may set on a voice, with the values a new voice starts from.
+# "volume" is the voice amplitude, named as in the CLI and sequence files.
+VOICE_DEFAULTS = {"wave_type": "sine", "frequency": 440.0, "volume": 0.5, "pan": 0.5, "phase_shift": 0.0,
+                  "duty_cycle": 0.5}
+# Longest request line a client may send; asyncio's default of 64 KiB is
+# only a few hundred inline sequence events
+REQUEST_LIMIT = 16 * 2 ** 20
+
+class EngineSource:
+    # Everything the server plays, as one multichannel source: a Mixer of
+    # client-controlled voices plus at most one Sequencer. Commands from all
+    # clients queue up between blocks and the whole batch is applied at the
+    # start of the next block, so a burst of changes lands on one sample.
+    def __init__(self, sample_rate, channels=2, capacity=64, max_frames=4096):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.max_frames = max_frames
+        self.mixer = Mixer(sample_rate, capacity, max_frames, channels=channels)
+        self.sequence = None  # Read and replaced only by the audio thread
+        self._sequences = deque()  # Sequences to switch to, queued by the control thread
+        self._scratch = np.zeros((max_frames, channels), dtype=np.float32)
+
+    def play_sequence(self, sequence):
+        # None stops the current sequence
+        self._sequences.append(sequence)
+
+    def render(self, frames, out):
+        while self._sequences:
+            self.sequence = self._sequences.popleft()
+        self.mixer.render(frames, out)
+        sequence = self.sequence
+        if sequence is not None:
+            if frames > len(self._scratch):
+                self._scratch = np.zeros((frames, self.channels), dtype=np.float32)
+            out += sequence.render(frames, self._scratch[:frames])
+            if sequence.finished:
+                self.sequence = None
+        return out
+
+class ToneServer:
+    # Long-running owner of one audio stream, controlled by any number of
+    # clients over a Unix domain socket (see audio.client for the protocol).
+    # Commands are handled on the event loop thread, which is therefore the
+    # single control thread the Mixer and ToneGenerator expect.
+    def __init__(self, config=None, path=DEFAULT_SOCKET, capacity=64):
+        self.tone_generator = ToneGenerator(config)
+        self.sample_rate = self.tone_generator.sample_rate
+        self.source = EngineSource(self.sample_rate, self.tone_generator.channels, capacity,
+                                   self.tone_generator.max_frames)
+        self.path = path
+        self.clients = 0
+        self.commands = 0
+        self._stopped = asyncio.Event()
+        self._handlers = {
+            "ping": self._ping,
+            "start": self._start,
+            "update": self._update,
+            "stop": self._stop,
+            "sequence": self._sequence,
+            "stats": self._stats,
+            "shutdown": self._shutdown,
+        }
+
+    async def serve(self, ready=None):
+        # Play until a client sends "shutdown" or shutdown() is called.
+        # `ready` is called once clients can connect.
+        self._remove_stale_socket()
+        server = await asyncio.start_unix_server(self._serve_client, path=self.path, limit=REQUEST_LIMIT)
+        self.tone_generator.start(self.source)
+        try:
+            if ready:
+                ready()
+            await self._stopped.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            self.tone_generator.stop()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def shutdown(self):
+        # Must be called on the event loop thread (e.g. from a signal handler)
+        self._stopped.set()
+
+    def _remove_stale_socket(self):
+        # A socket file left by a server that died; refuse to start over a live one
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+        else:
+            raise RuntimeError(f"A tone server is already listening on {self.path}")
+        finally:
+            probe.close()
+
+    async def _serve_client(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as error:
+                    line = error.partial  # A last request without a newline, or b"" at the end
+                except asyncio.LimitOverrunError:
+                    # Answered like any other bad request; the connection stays usable
+                    await self._skip_request(reader)
+                    response = {"ok": False, "error": f"Request is longer than {REQUEST_LIMIT} bytes"}
+                    writer.write((json.dumps(response) + "\n").encode())
+                    await writer.drain()
+                    continue
+                if not line:
+                    break
+                writer.write(self.handle(line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    @staticmethod
+    async def _skip_request(reader):
+        # Drop an over-long request up to and including its newline
+        while True:
+            try:
+                await reader.readuntil(b"\n")
+                return
+            except asyncio.LimitOverrunError as error:
+                await reader.readexactly(error.consumed)
+            except asyncio.IncompleteReadError:
+                return
+
+    def handle(self, line):
+        # One request line in, one response line out; a bad request gets an
+        # error response rather than closing the connection
+        request = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("A request must be a JSON object")
+            handler = self._handlers.get(request.get("command"))
+            if handler is None:
+                raise ValueError(f"Unknown command: {request.get('command')}")
+            response = {"ok": True, **handler(request)}
+            self.commands += 1
+        except (ValueError, TypeError, OSError) as error:
+            response = {"ok": False, "error": str(error)}
+        except KeyError as error:
+            response = {"ok": False, "error": f"Missing field: {error}"}
+        if "id" in request:
+            response["id"] = request["id"]
+        return (json.dumps(response) + "\n").encode()
+
+    # Commands
+
+    def _ping(self, request):
+        return {}
+
+    def _start(self, request):
+        params = {**VOICE_DEFAULTS, **voice_params(request)}
+        params["amplitude"] = params.pop("volume")
+        return {"voice": self.source.mixer.add_voice(**params)}
+
+    def _update(self, request):
+        voice = self._voice(request)
+        params = voice_params(request)
+        if "volume" in params:
+            params["amplitude"] = params.pop("volume")
+        self.source.mixer.update_voice(voice, **params)
+        return {}
+
+    def _stop(self, request):
+        # Stop one voice, or everything when no voice is given
+        if request.get("voice") is None:
+            self.source.mixer.clear()
+            self.source.play_sequence(None)
+        else:
+            self.source.mixer.remove_voice(self._voice(request))
+        return {}
+
+    def _sequence(self, request):
+        # Replace the playing sequence with the events in `path` (a file the
+        # server can read) or inline `events`
+        if "path" in request:
+            events = load_sequence(request["path"])
+        elif "events" in request:
+            if not isinstance(request["events"], list):
+                raise ValueError("'events' must be a list")
+            events = [normalize_event(event, index) for index, event in enumerate(request["events"])]
+        else:
+            raise ValueError("A sequence needs a 'path' or 'events'")
+        sequence = Sequencer(events, self.sample_rate, self.source.max_frames, channels=self.source.channels)
+        self.source.play_sequence(sequence)
+        return {"events": len(events), "duration": sequence.length / self.sample_rate}
+
+    def _stats(self, request):
+        sequence = self.source.sequence
+        return {
+            "stats": self.tone_generator.stats.snapshot(),
+            "voices": self.source.mixer.voices,
+            "sequence_remaining": (sequence.length - sequence.position) / self.sample_rate if sequence else 0.0,
+            "clients": self.clients,
+            "commands": self.commands,
+        }
+
+    def _shutdown(self, request):
+        self.shutdown()
+        return {}
+
+    def _voice(self, request):
+        voice = request.get("voice")
+        if voice not in self.source.mixer.voices:
+            raise ValueError(f"No such voice: {voice}")
+        return voice
+
+def voice_params(request):
+    # Checked here so nothing invalid ever reaches the audio thread
+    params = {}
+    for field, value in request.items():
+        if field in ("command", "id", "voice"):
+            continue
+        if field not in VOICE_DEFAULTS:
+            raise ValueError(f"Unknown voice field: {field}")
+        if field == "wave_type":
+            if value not in WAVE_TYPES:
+                raise ValueError(f"Unsupported wave type: {value}")
+            params[field] = value
+        else:
+            params[field] = float(value)
+            if not math.isfinite(params[field]):
+                raise ValueError(f"{field} must be a finite number")
+    if not 0.0 <= params.get("pan", 0.5) <= 1.0:
+        raise ValueError("Pan must be between 0 and 1")
+    if not 0.0 < params.get("duty_cycle", 0.5) <= 1.0:
+        raise ValueError("Duty cycle must be greater than 0 and at most 1")
+    return params
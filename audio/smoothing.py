@@ -0,0 +1,42 @@
+import numpy as np
+
+class SmoothedValue:
+    # A control value that glides linearly to a new target over `ramp_frames`
+    # samples instead of jumping, so parameter changes do not click
+    def __init__(self, value, ramp_frames=441):
+        self.value = float(value)
+        self.target = float(value)
+        self.ramp_frames = max(int(ramp_frames), 1)
+        self._step = 0.0
+        self._remaining = 0
+
+    def reset(self, value):
+        # Jump straight to `value`, abandoning any glide
+        self.value = self.target = float(value)
+        self._step = 0.0
+        self._remaining = 0
+
+    def set(self, target, ramp_frames=None):
+        # ramp_frames overrides the glide length for this change only
+        self.target = float(target)
+        self._remaining = self.ramp_frames if ramp_frames is None else max(int(ramp_frames), 1)
+        self._step = (self.target - self.value) / self._remaining
+
+    @property
+    def is_ramping(self):
+        return self._remaining > 0
+
+    def fill(self, out, ramp):
+        # Write per-sample values for the next len(out) samples into `out` and
+        # advance. `ramp` must hold 1, 2, 3, ... for at least len(out) entries.
+        # Returns the scalar value instead when no ramp is in progress.
+        if not self._remaining:
+            return self.value
+        frames = len(out)
+        steps = min(frames, self._remaining)
+        np.multiply(ramp[:steps], self._step, out=out[:steps])
+        out[:steps] += self.value
+        out[steps:] = self.target
+        self._remaining -= steps
+        self.value = self.target if not self._remaining else self.value + self._step * steps
+        return out
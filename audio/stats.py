@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+
+BUCKETS = 24  # Render time histogram: bucket i counts callbacks under 2**(i + 10) ns (1 µs up to about 8 s)
+
+class CallbackStats:
+    # Timing and underflow counters for the audio callback. Only the audio
+    # thread writes, with plain integer updates and no locks or allocation;
+    # readers take a snapshot(), which may be a block out of date but never
+    # blocks the callback.
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self._ns_per_frame = 1e9 / sample_rate
+        self.reset()
+
+    def reset(self):
+        self.callbacks = 0
+        self.underflows = 0
+        self.frames = 0
+        self.busy_ns = 0  # Total time spent rendering
+        self.max_ns = 0
+        self.max_load = 0.0  # Worst render time as a fraction of its block's duration
+        self.block_size = 0  # Frames in the most recent callback
+        self.histogram = [0] * BUCKETS
+
+    def record(self, frames, elapsed_ns, underflow=False):
+        self.callbacks += 1
+        self.frames += frames
+        self.busy_ns += elapsed_ns
+        self.block_size = frames
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        if frames:
+            load = elapsed_ns / (frames * self._ns_per_frame)
+            if load > self.max_load:
+                self.max_load = load
+        self.histogram[min((elapsed_ns >> 10).bit_length(), BUCKETS - 1)] += 1
+        if underflow:
+            self.underflows += 1
+
+    def snapshot(self):
+        histogram = list(self.histogram)
+        callbacks = sum(histogram)
+        audio_ns = self.frames * self._ns_per_frame
+        return {
+            "callbacks": callbacks,
+            "underflows": self.underflows,
+            "block_size": self.block_size,
+            "sample_rate": self.sample_rate,
+            "mean_load": self.busy_ns / audio_ns if audio_ns else 0.0,
+            "max_load": self.max_load,
+            "mean_us": self.busy_ns / max(callbacks, 1) / 1000,
+            "max_us": self.max_ns / 1000,
+            "p50_us": _percentile(histogram, callbacks, 0.5),
+            "p99_us": _percentile(histogram, callbacks, 0.99),
+            "histogram": histogram,
+        }
+
+def bucket_bound_us(bucket):
+    # Upper bound of a histogram bucket in microseconds
+    return 2 ** (bucket + 10) / 1000
+
+def _percentile(histogram, total, fraction):
+    # Upper bound of the bucket holding the given fraction of callbacks
+    if not total:
+        return 0.0
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if seen >= fraction * total:
+            return bucket_bound_us(bucket)
+    return bucket_bound_us(len(histogram) - 1)
+
+def format_summary(snapshot):
+    return (f"{snapshot['callbacks']} callbacks, {snapshot['underflows']} underflows, "
+            f"block {snapshot['block_size']}, load {snapshot['mean_load']:.1%} mean / {snapshot['max_load']:.1%} max, "
+            f"render p99 < {snapshot['p99_us']:.0f} µs")
+
+def format_json(snapshot):
+    return json.dumps(snapshot, indent=2) + "\n"
+
+def format_prometheus(snapshot, prefix="tone_generator"):
+    # Prometheus text exposition format, with render time as a histogram in seconds
+    lines = [
+        f"# TYPE {prefix}_callbacks_total counter", f"{prefix}_callbacks_total {snapshot['callbacks']}",
+        f"# TYPE {prefix}_underflows_total counter", f"{prefix}_underflows_total {snapshot['underflows']}",
+        f"# TYPE {prefix}_block_size gauge", f"{prefix}_block_size {snapshot['block_size']}",
+        f"# TYPE {prefix}_load_ratio gauge",
+        f'{prefix}_load_ratio{{stat="mean"}} {snapshot["mean_load"]:.6f}',
+        f'{prefix}_load_ratio{{stat="max"}} {snapshot["max_load"]:.6f}',
+        f"# TYPE {prefix}_render_seconds histogram",
+    ]
+    cumulative = 0
+    for bucket, count in enumerate(snapshot["histogram"]):
+        cumulative += count
+        lines.append(f'{prefix}_render_seconds_bucket{{le="{bucket_bound_us(bucket) / 1e6:.9f}"}} {cumulative}')
+    lines.append(f'{prefix}_render_seconds_bucket{{le="+Inf"}} {cumulative}')
+    lines.append(f"{prefix}_render_seconds_sum {snapshot['mean_us'] * snapshot['callbacks'] / 1e6:.9f}")
+    lines.append(f"{prefix}_render_seconds_count {cumulative}")
+    return "\n".join(lines) + "\n"
+
+def write_stats(stats, path):
+    # Prometheus text for .prom files, JSON otherwise. Written to a temporary
+    # name and renamed, so a scraper never reads a half-written file.
+    snapshot = stats.snapshot()
+    text = format_prometheus(snapshot) if path.endswith(".prom") else format_json(snapshot)
+    partial = path + ".partial"
+    with open(partial, "w") as output:
+        output.write(text)
+    os.replace(partial, path)
+
+class StatsWriter:
+    # Rewrites a stats file every `interval` seconds on a background thread
+    def __init__(self, stats, path, interval=1.0):
+        self.stats = stats
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        write_stats(self.stats, self.path)  # Final counts
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            write_stats(self.stats, self.path)
@@ -0,0 +1,177 @@
+from functools import lru_cache
+import numpy as np
+from audio.waveform import LoopSource
+
+# Test stimuli that are not periodic waveforms: noise in three colours and
+# multi-sine signals. They are streaming sources like Oscillator, with
+# render(frames, out), so they can be played or rendered offline.
+NOISE_COLORS = ("white", "pink", "brown")
+STIMULUS_TYPES = NOISE_COLORS + ("multisine",)
+# Noise is scaled so its standard deviation is amplitude / NOISE_CREST. A
+# Gaussian still passes 4 sigma about 3 times a second at 48 kHz, so those
+# samples are clipped to +-amplitude, a change of well under 0.01 dB in level.
+NOISE_CREST = 4.0
+FILTER_CHUNK = 256  # Samples per matrix product in FilterBank
+
+# Paul Kellet's pink noise filter: parallel one-pole lowpasses plus a direct
+# and a one-sample-delayed path. Designed at 44.1 kHz, where it is within
+# 0.05 dB of -3 dB/octave from 9 Hz up; at other rates the fit holds over
+# the same range scaled by rate / 44.1 kHz, which still covers 20 Hz up at 96 kHz.
+PINK_POLES = (0.99886, 0.99332, 0.96900, 0.86650, 0.55000, -0.7616)
+PINK_GAINS = (0.0555179, 0.0750759, 0.1538520, 0.3104856, 0.5329522, -0.0168980)
+PINK_TAPS = (0.5362, 0.115926)
+BROWN_CUTOFF = 10.0  # Hz; brown noise is white noise through a leaky integrator with this corner
+
+MULTISINE_ITERATIONS = 50  # Crest factor refinement passes, about 6 ms each for a one second frame
+MULTISINE_NORMS = (4, 8, 16, 32, 64)  # L_p norms minimised in turn; larger p weighs the peak more
+MULTISINE_STEP = 0.15  # Largest phase change per pass, radians
+
+class FilterBank:
+    # Parallel one-pole filters, y_i[n] = pole_i * y_i[n-1] + gain_i * x[n],
+    # summed with a short FIR part `taps`. A sample-by-sample recursion
+    # cannot be vectorised, so each chunk of samples is filtered with a
+    # precomputed lower-triangular matrix of the bank's impulse response,
+    # plus the decaying contribution of the filter states, which are then
+    # advanced past the chunk. Exact for any poles inside the unit circle.
+    def __init__(self, poles, gains, taps=(0.0,), chunk=FILTER_CHUNK):
+        poles = np.asarray(poles, dtype=np.float64)
+        gains = np.asarray(gains, dtype=np.float64)
+        self.chunk = chunk
+        n = np.arange(chunk)
+        response = (poles[None, :] ** n[:, None]) @ gains
+        response[:len(taps)] += taps
+        lags = n[:, None] - n[None, :]
+        self._response = np.where(lags >= 0, response[np.maximum(lags, 0)], 0.0)  # (chunk, chunk)
+        self._from_state = poles[None, :] ** (n[:, None] + 1)  # Row n: pole ** (n + 1)
+        self._to_state = gains[None, :] * poles[None, :] ** (chunk - 1 - n[:, None])  # (chunk, poles)
+        self._taps = np.asarray(taps[1:], dtype=np.float64)
+        self.state = np.zeros(len(poles))
+        self.history = np.zeros(len(self._taps))  # Most recent inputs, newest first, for the delayed taps
+        # Scratch for process, which updates state and history in place
+        self._scratch = np.empty(chunk)
+        self._state_scratch = np.empty(len(poles))
+        # Output standard deviation for unit white noise input
+        energy = gains @ (1.0 / (1.0 - np.outer(poles, poles))) @ gains
+        energy += np.sum(np.asarray(taps) ** 2)
+        energy += 2 * sum(tap * ((poles ** lag) @ gains) for lag, tap in enumerate(taps))
+        self.gain = float(np.sqrt(energy))
+
+    def process(self, x, out):
+        # Filter x into out (both float64 and the same length), carrying state
+        for start in range(0, len(x), self.chunk):
+            chunk = x[start:start + self.chunk]
+            frames = len(chunk)
+            y = out[start:start + frames]
+            scratch = self._scratch[:frames]
+            # matmul, as np.dot copies the strided corner of the matrix a short chunk uses
+            np.matmul(self._response[:frames, :frames], chunk, out=y)
+            np.dot(self._from_state[:frames], self.state, out=scratch)
+            y += scratch
+            for lag, tap in enumerate(self._taps, 1):
+                # Delayed taps reach back into the previous chunk
+                reach = min(lag, frames)
+                np.multiply(self.history[lag - reach:lag][::-1], tap, out=scratch[:reach])
+                y[:reach] += scratch[:reach]
+            self.state *= self._from_state[frames - 1]
+            np.dot(chunk, self._to_state[self.chunk - frames:], out=self._state_scratch)
+            self.state += self._state_scratch
+            history = self.history
+            count = min(frames, len(history))
+            history[count:] = history[:len(history) - count]
+            history[:count] = chunk[::-1][:count]
+        return out
+
+class NoiseSource:
+    # Gaussian noise from a seeded numpy.random.Generator, so the same seed
+    # gives the same samples whatever the block sizes. Pink (-3 dB/octave)
+    # and brown (-6 dB/octave) noise are white noise through a FilterBank
+    # whose state runs across blocks. Every colour has the same level, and
+    # `amplitude` is a hard peak like every other source's.
+    def __init__(self, color, sample_rate, amplitude, seed=0, max_frames=4096, dtype=np.float32):
+        if color not in NOISE_COLORS:
+            raise ValueError(f"Unsupported noise colour: {color}")
+        self.color = color
+        self.sample_rate = sample_rate
+        self.amplitude = amplitude
+        self.seed = seed
+        self.dtype = np.dtype(dtype)
+        self._rng = np.random.default_rng(seed)
+        if color == "pink":
+            self._filter = FilterBank(PINK_POLES, PINK_GAINS, PINK_TAPS)
+        elif color == "brown":
+            pole = np.exp(-2 * np.pi * BROWN_CUTOFF / sample_rate)
+            self._filter = FilterBank([pole], [1.0 - pole])
+        else:
+            self._filter = None
+        self._scale = amplitude / NOISE_CREST / (self._filter.gain if self._filter else 1.0)
+        self._allocate(max_frames)
+
+    def _allocate(self, frames):
+        self._white = np.empty(frames, dtype=np.float64)
+        self._filtered = np.empty(frames, dtype=np.float64)
+
+    def render(self, frames, out=None):
+        if frames > len(self._white):
+            self._allocate(frames)
+        if out is None:
+            out = np.empty(frames, dtype=self.dtype)
+        noise = self._rng.standard_normal(out=self._white[:frames])
+        if self._filter is not None:
+            noise = self._filter.process(noise, self._filtered[:frames])
+        # Scaled in the float64 scratch: a float64 ufunc writing float32 out
+        # allocates conversion buffers on the audio thread
+        noise *= self._scale
+        np.copyto(out, noise, casting="same_kind")
+        np.clip(out, -self.amplitude, self.amplitude, out=out)
+        return out
+
+class MultiSine:
+    # Equal-amplitude sines at `frequencies`, each moved to the nearest bin
+    # of a `size` sample period so the signal repeats exactly. One period is
+    # made by an inverse FFT with phases chosen for a low crest factor,
+    # cached, and looped; `amplitude` is the peak level.
+    def __init__(self, frequencies, sample_rate, amplitude, size=None, dtype=np.float32):
+        size = int(size or sample_rate)  # One second, i.e. 1 Hz bins, by default
+        bins = np.unique(np.rint(np.asarray(frequencies, dtype=np.float64) * size / sample_rate).astype(int))
+        bins = bins[(bins > 0) & (bins < size // 2)]
+        if not len(bins):
+            raise ValueError("A multisine needs at least one frequency between 0 Hz and Nyquist")
+        self.sample_rate = sample_rate
+        self.amplitude = amplitude
+        self.dtype = np.dtype(dtype)
+        self.frequencies = bins * sample_rate / size  # Frequencies actually played
+        frame = multisine_frame(tuple(bins.tolist()), size)
+        self.crest_factor = float(1.0 / np.sqrt(np.mean(frame ** 2)))  # Peak over RMS
+        self._loop = LoopSource((frame * amplitude).astype(self.dtype))
+
+    def render(self, frames, out=None):
+        if out is None:
+            out = np.empty(frames, dtype=self.dtype)
+        return self._loop.render(frames, out)
+
+@lru_cache(maxsize=32)
+def multisine_frame(bins, size, iterations=MULTISINE_ITERATIONS):
+    # One period of unit sines at FFT `bins`, scaled to a peak of 1. The
+    # phases start as Schroeder's, generalised to uneven spacing (each tone's
+    # group delay proportional to its index, over the signal's true period),
+    # then follow the gradient of the signal's L_p norm with p doubling
+    # towards the peak; whichever pass had the lowest crest factor is kept.
+    bins = np.asarray(bins)
+    count = len(bins)
+    spacing = np.diff(bins, prepend=bins[0]) / np.gcd.reduce(bins)
+    phases = -2 * np.pi * np.cumsum(spacing * np.arange(count) / count)
+    spectrum = np.zeros(size // 2 + 1, dtype=np.complex128)
+    best, best_crest = None, np.inf
+    for p in np.repeat(MULTISINE_NORMS, -(-iterations // len(MULTISINE_NORMS)))[:iterations]:
+        spectrum[bins] = np.exp(1j * phases)
+        frame = np.fft.irfft(spectrum, n=size)
+        frame /= np.max(np.abs(frame))
+        crest = 1.0 / np.sqrt(np.mean(frame ** 2))
+        if crest < best_crest:
+            best, best_crest = frame, crest
+        # d/dphase_k of sum(frame ** p) is -p * Im(exp(i phase_k) * conj(F_k)),
+        # F the spectrum of frame ** (p - 1); step against it
+        gradient = np.imag(np.exp(1j * phases) * np.conj(np.fft.rfft(frame ** (p - 1))[bins]))
+        phases += MULTISINE_STEP * gradient / max(np.max(np.abs(gradient)), 1e-30)
+    best.setflags(write=False)
+    return best
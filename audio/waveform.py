@@ -1,18 +1,163 @@
 import numpy as np
+from audio.blep import BandLimitedShaper
 
-def generate_sine_wave(frequency, duration, sample_rate, amplitude, phase_shift):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    return amplitude * np.sin(2 * np.pi * frequency * t + np.deg2rad(phase_shift))
+BLOCK_FRAMES = 65536  # Samples evaluated per pass; bounds the float64 temporaries
 
-def generate_square_wave(frequency, duration, sample_rate, amplitude, duty_cycle):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    return amplitude * np.sign(np.sin(2 * np.pi * frequency * t)) * (t < duty_cycle)
+class LoopSource:
+    # Plays a precomputed waveform on repeat using a ring-buffer read cursor
+    def __init__(self, waveform):
+        self.waveform = waveform
+        self.dtype = waveform.dtype
+        self.position = 0
 
-def generate_triangle_wave(frequency, duration, sample_rate, amplitude, phase_shift):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    return amplitude * 2 * np.abs(2 * (t * frequency - np.floor(1/2 + t * frequency)))
+    def render(self, frames, out):
+        # Copy the next `frames` samples, wrapping around the end of the waveform.
+        # Only the requested block is touched, so the cost does not depend on the
+        # length of the buffer.
+        waveform = self.waveform
+        length = len(waveform)
+        position = self.position
+        written = 0
+        while written < frames:
+            chunk = min(frames - written, length - position)
+            out[written:written + chunk] = waveform[position:position + chunk]
+            written += chunk
+            position += chunk
+            if position == length:
+                position = 0
+        self.position = position
+        return out
 
-def generate_sawtooth_wave(frequency, duration, sample_rate, amplitude, phase_shift):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    return amplitude * (2 * (t * frequency - np.floor(1/2 + t * frequency)))
+def _render(duration, sample_rate, out, dtype, kernel):
+    # Evaluate kernel(t, block) over the time axis one block at a time in
+    # float64 and store each block into `out`. Phase is therefore computed at
+    # full precision even for float32 output, and temporaries stay bounded
+    # however long the buffer is. Pass `out` to reuse an existing array.
+    frames = int(sample_rate * duration)
+    if out is None:
+        out = np.empty(frames, dtype=dtype)
+    elif len(out) != frames:
+        raise ValueError(f"out has {len(out)} samples, expected {frames}")
+    if frames == 0:
+        return out
 
+    step = duration / frames  # Same spacing as np.linspace(0, duration, frames, endpoint=False)
+    ramp = np.arange(min(frames, BLOCK_FRAMES), dtype=np.float64) * step
+    t = np.empty_like(ramp)
+    block = np.empty_like(ramp)
+    for start in range(0, frames, BLOCK_FRAMES):
+        count = min(BLOCK_FRAMES, frames - start)
+        np.add(ramp[:count], start * step, out=t[:count])
+        kernel(t[:count], block[:count])
+        out[start:start + count] = block[:count]
+    return out
+
+def generate_sine_wave(frequency, duration, sample_rate, amplitude, phase_shift, out=None, dtype=np.float32):
+    def kernel(t, block):
+        np.multiply(t, 2 * np.pi * frequency, out=block)
+        block += np.deg2rad(phase_shift)
+        np.sin(block, out=block)
+        block *= amplitude
+    return _render(duration, sample_rate, out, dtype, kernel)
+
+def generate_square_wave(frequency, duration, sample_rate, amplitude, duty_cycle, out=None, dtype=np.float32,
+                         phase_shift=0, band_limited=True):
+    # Pulse wave high for `duty_cycle` (a fraction, 0 to 1) of each period
+    return _periodic("square", frequency, duration, sample_rate, amplitude, phase_shift, duty_cycle, out, dtype,
+                     band_limited)
+
+def generate_triangle_wave(frequency, duration, sample_rate, amplitude, phase_shift, out=None, dtype=np.float32,
+                           band_limited=True):
+    return _periodic("triangle", frequency, duration, sample_rate, amplitude, phase_shift, 0.5, out, dtype,
+                     band_limited)
+
+def generate_sawtooth_wave(frequency, duration, sample_rate, amplitude, phase_shift, out=None, dtype=np.float32,
+                           band_limited=True):
+    return _periodic("sawtooth", frequency, duration, sample_rate, amplitude, phase_shift, 0.5, out, dtype,
+                     band_limited)
+
+def _periodic(wave_type, frequency, duration, sample_rate, amplitude, phase_shift, duty_cycle, out, dtype,
+              band_limited):
+    # The same shapes as audio.oscillator.Oscillator, phase shift in degrees.
+    # band_limited smooths every jump and corner with PolyBLEP/PolyBLAMP so
+    # high notes do not alias; otherwise the shapes are the naive ones.
+    from audio.oscillator import shape_wave  # audio.oscillator imports this module
+
+    frames = min(int(sample_rate * duration), BLOCK_FRAMES)
+    phase = np.empty(frames)
+    scratch = np.empty(frames)
+    mask = np.empty(frames, dtype=bool)
+    shaper = BandLimitedShaper(frames) if band_limited else None
+    def kernel(t, block):
+        count = len(t)
+        np.multiply(t, frequency, out=phase[:count])
+        phase[:count] += phase_shift / 360.0
+        np.floor(phase[:count], out=scratch[:count])
+        phase[:count] -= scratch[:count]
+        if shaper is not None:
+            shaper.shape(wave_type, phase[:count], frequency / sample_rate, block, duty_cycle)
+        else:
+            shape_wave(wave_type, phase[:count], block, duty_cycle, scratch[:count], mask[:count])
+        block *= amplitude
+    return _render(duration, sample_rate, out, dtype, kernel)
+
+SWEEP_METHODS = ("linear", "exponential", "stepped")
+
+def sweep_frequency(t, start_frequency, end_frequency, duration, method="linear", steps=10):
+    # Instantaneous frequency in Hz at times t (seconds) of a sweep
+    t = np.asarray(t, dtype=np.float64)
+    if method == "linear":
+        return start_frequency + (end_frequency - start_frequency) * t / duration
+    if method == "exponential":
+        return start_frequency * (end_frequency / start_frequency) ** (t / duration)
+    if method == "stepped":
+        step = np.minimum((t * steps / duration).astype(np.intp), steps - 1)
+        return _step_frequencies(start_frequency, end_frequency, steps)[step]
+    raise ValueError(f"Unsupported sweep method: {method}")
+
+def _step_frequencies(start_frequency, end_frequency, steps):
+    # Stepped sweeps hold `steps` log-spaced frequencies for equal times
+    return np.geomspace(start_frequency, end_frequency, steps)
+
+def sweep_phase(t, start_frequency, end_frequency, duration, method="linear", steps=10, out=None):
+    # Phase in cycles at times t: the closed-form integral of sweep_frequency,
+    # so the phase is exact at every sample and never accumulates error
+    t = np.asarray(t, dtype=np.float64)
+    if out is None:
+        out = np.empty_like(t)
+    if method == "linear":
+        # f0 t + (f1 - f0) t^2 / 2T
+        np.multiply(t, (end_frequency - start_frequency) / (2 * duration), out=out)
+        out += start_frequency
+        out *= t
+    elif method == "exponential":
+        # f0 T / ln k * (k^(t/T) - 1), with k = f1 / f0
+        rate = np.log(end_frequency / start_frequency)
+        if rate == 0:
+            return np.multiply(t, start_frequency, out=out)
+        np.multiply(t, rate / duration, out=out)
+        np.expm1(out, out=out)
+        out *= start_frequency * duration / rate
+    elif method == "stepped":
+        # Phase at the start of each step plus the time spent in the current one
+        frequencies = _step_frequencies(start_frequency, end_frequency, steps)
+        step_time = duration / steps
+        step_phase = np.concatenate(([0.0], np.cumsum(frequencies[:-1] * step_time)))
+        step = np.minimum((t / step_time).astype(np.intp), steps - 1)
+        np.multiply(step, -step_time, out=out)
+        out += t
+        out *= frequencies[step]
+        out += step_phase[step]
+    else:
+        raise ValueError(f"Unsupported sweep method: {method}")
+    return out
+
+def generate_sweep(start_frequency, end_frequency, duration, sample_rate, amplitude, method="linear", steps=10,
+                   out=None, dtype=np.float32):
+    def kernel(t, block):
+        sweep_phase(t, start_frequency, end_frequency, duration, method, steps, out=block)
+        block -= np.floor(block)
+        block *= 2 * np.pi
+        np.sin(block, out=block)
+        block *= amplitude
+    return _render(duration, sample_rate, out, dtype, kernel)
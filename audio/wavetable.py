@@ -0,0 +1,120 @@
+from functools import lru_cache
+import numpy as np
+
+TABLE_SIZE = 2048
+LOWEST_FREQUENCY = 20.0  # Bottom of the first octave of tables
+
+@lru_cache(maxsize=None)
+def wavetables(wave_type, sample_rate, table_size=TABLE_SIZE, dtype="float32"):
+    # One table per octave, each holding only the harmonics that stay below
+    # Nyquist for the highest frequency in that octave. Entries are complex:
+    # the sample in the real part and the step to the next sample (wrapping at
+    # the end) in the imaginary part, so one np.take fetches everything
+    # linear interpolation needs.
+    octaves = int(np.ceil(np.log2(sample_rate / 2 / LOWEST_FREQUENCY)))
+    tables = np.empty((octaves, table_size), dtype=np.result_type(dtype, np.complex64))
+    for octave in range(octaves):
+        top_frequency = LOWEST_FREQUENCY * 2 ** (octave + 1)
+        harmonics = min(int(sample_rate / 2 / top_frequency), table_size // 2 - 1)
+        cycle = _band_limited_cycle(wave_type, max(harmonics, 1), table_size)
+        tables[octave].real = cycle
+        tables[octave].imag = np.roll(cycle, -1) - cycle
+    tables.setflags(write=False)
+    return tables
+
+def _band_limited_cycle(wave_type, harmonics, table_size):
+    # Fourier series of the shapes produced by Oscillator, truncated to `harmonics`
+    spectrum = np.zeros(table_size // 2 + 1, dtype=np.complex128)
+    k = np.arange(1, harmonics + 1)
+    if wave_type == "sawtooth":
+        # 2/pi * sum (-1)^(k+1) sin(2 pi k p) / k
+        spectrum[k] = -1j * (2 / np.pi) * (-1.0) ** (k + 1) / k
+    elif wave_type == "triangle":
+        # -8/pi^2 * sum over odd k of cos(2 pi k p) / k^2
+        odd = k[k % 2 == 1]
+        spectrum[odd] = -(8 / np.pi ** 2) / odd ** 2
+    else:
+        raise ValueError(f"No wavetable for wave type: {wave_type}")
+    # irfft divides by the table size and splits each harmonic across +/- bins
+    return np.fft.irfft(spectrum, n=table_size) * table_size / 2
+
+class WavetableReader:
+    # Reads band-limited tables with linear interpolation into caller buffers.
+    # Sine needs no table: it has no harmonics to remove.
+    def __init__(self, sample_rate, max_frames=4096, table_size=TABLE_SIZE, dtype=np.float64):
+        if table_size & (table_size - 1):
+            raise ValueError("Wavetable size must be a power of two")
+        self.sample_rate = sample_rate
+        self.table_size = table_size
+        self.dtype = np.dtype(dtype)
+        self._pulse = np.empty(table_size, dtype=np.result_type(self.dtype, np.complex64))
+        self._pulse_key = None  # Octave and shift the pulse table was built for
+        self._allocate(max_frames)
+
+    def _allocate(self, frames):
+        self._position = np.empty(frames, dtype=self.dtype)
+        self._fraction = np.empty(frames, dtype=self.dtype)
+        self._entries = np.empty(frames, dtype=self._pulse.dtype)
+        self._index = np.empty(frames, dtype=np.intp)
+
+    def table(self, wave_type, frequency):
+        tables = wavetables(wave_type, self.sample_rate, self.table_size, self.dtype.name)
+        return tables[self._octave(tables, frequency)]
+
+    def _octave(self, tables, frequency):
+        octave = int(np.log2(max(frequency, LOWEST_FREQUENCY) / LOWEST_FREQUENCY))
+        return min(octave, len(tables) - 1)
+
+    def read(self, table, phase, out):
+        # Interpolate `table` at `phase` into `out`. Phase is in cycles and may run
+        # past 1; whole cycles are masked off the table index (the size is a power
+        # of two) which is much cheaper than np.mod.
+        frames = len(phase)
+        if frames > len(self._index):
+            self._allocate(frames)
+        position = self._position[:frames]
+        fraction = self._fraction[:frames]
+        entries = self._entries[:frames]
+        index = self._index[:frames]
+
+        np.multiply(phase, self.table_size, out=position)
+        np.floor(position, out=fraction)
+        np.copyto(index, fraction, casting="unsafe")
+        np.subtract(position, fraction, out=fraction)
+        np.bitwise_and(index, self.table_size - 1, out=index)
+        np.take(table, index, out=entries, mode="clip")
+        fraction *= entries.imag
+        np.add(entries.real, fraction, out=out)
+        return out
+
+    def shape(self, wave_type, frequency, phase, out, duty_cycle=0.5):
+        # Band-limited version of Oscillator._shape
+        if wave_type == "sine":
+            np.multiply(phase, 2 * np.pi, out=out)
+            return np.sin(out, out=out)
+        if wave_type == "square":
+            return self.read(self.pulse_table(frequency, duty_cycle), phase, out)
+        return self.read(self.table(wave_type, frequency), phase, out)
+
+    def pulse_table(self, frequency, duty_cycle):
+        # A pulse of any duty cycle is the difference of two sawtooth cycles
+        # offset by the duty cycle, read at phase + 0.5 - duty_cycle and at
+        # phase + 0.5. The offset is rounded to whole table entries (1/2048
+        # of a cycle by default) so the difference is one table, rebuilt only
+        # when the octave or duty cycle changes.
+        tables = wavetables("sawtooth", self.sample_rate, self.table_size, self.dtype.name)
+        size = self.table_size
+        shift = round((0.5 - duty_cycle) * size)
+        key = (self._octave(tables, frequency), shift)
+        if key != self._pulse_key:
+            table = tables[key[0]]
+            pulse = self._pulse
+            start = shift % size
+            pulse[:size - start] = table[start:]
+            pulse[size - start:] = table[:start]
+            half = size // 2
+            pulse[:half] -= table[half:]
+            pulse[half:] -= table[:half]
+            pulse += 2 * (0.5 - shift / size) - 1  # 2 * duty_cycle - 1, for the rounded duty cycle
+            self._pulse_key = key
+        return self._pulse
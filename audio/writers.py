@@ -0,0 +1,177 @@
+import importlib.util
+import os
+import struct
+import numpy as np
+
+# Sample formats, named as in libsndfile: (bytes per sample, is float)
+SUBTYPES = {
+    "PCM_16": (2, False),
+    "PCM_24": (3, False),
+    "PCM_32": (4, False),
+    "FLOAT": (4, True),
+}
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+RIFF_LIMIT = 0xFFFFFFFF
+
+def encode_samples(block, subtype):
+    # Convert a float block in [-1, 1] (frames x channels) to interleaved
+    # little-endian bytes in the given sample format
+    width, is_float = SUBTYPES[subtype]
+    if is_float:
+        return np.ascontiguousarray(block, dtype="<f4").tobytes()
+    # float64 holds every integer bound exactly; in float32, 2**31 - 1 rounds
+    # up to 2**31 and full-scale PCM_32 samples would wrap negative
+    scale = 2 ** (8 * width - 1)
+    samples = np.multiply(block, scale, dtype=np.float64)
+    np.rint(samples, out=samples)
+    np.clip(samples, -scale, scale - 1, out=samples)
+    if width == 3:
+        # No 24-bit dtype: keep the low three bytes of each little-endian int32
+        samples = samples.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3]
+        return samples.tobytes()
+    return samples.astype(f"<i{width}").tobytes()
+
+class WavWriter:
+    # Streams a WAV file chunk by chunk. The header is written up front with
+    # placeholder sizes and patched on close. A JUNK chunk reserves room for the
+    # RF64 ds64 chunk so files over 4 GB can be promoted in place (EBU 3306).
+    def __init__(self, path, sample_rate, channels, subtype="PCM_16"):
+        if subtype not in SUBTYPES:
+            raise ValueError(f"Unsupported WAV subtype: {subtype}")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.subtype = subtype
+        self.frames = 0
+        self._data_bytes = 0
+        self._file = open(path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        width, is_float = SUBTYPES[self.subtype]
+        block_align = width * self.channels
+        header = b"RIFF" + struct.pack("<I", 0) + b"WAVE"
+        header += b"JUNK" + struct.pack("<I", 28) + bytes(28)
+        if is_float:
+            # Non-PCM formats need cbSize in fmt and a fact chunk with the frame count
+            header += b"fmt " + struct.pack("<IHHIIHHH", 18, WAVE_FORMAT_IEEE_FLOAT, self.channels, self.sample_rate,
+                                            self.sample_rate * block_align, block_align, 8 * width, 0)
+            header += b"fact" + struct.pack("<I", 4)
+            self._fact_offset = len(header)
+            header += struct.pack("<I", 0)
+        else:
+            header += b"fmt " + struct.pack("<IHHIIHH", 16, WAVE_FORMAT_PCM, self.channels, self.sample_rate,
+                                            self.sample_rate * block_align, block_align, 8 * width)
+            self._fact_offset = None
+        header += b"data" + struct.pack("<I", 0)
+        self._data_offset = len(header)
+        self._file.write(header)
+
+    def write(self, block):
+        data = encode_samples(block, self.subtype)
+        self._file.write(data)
+        self._data_bytes += len(data)
+        self.frames += len(block)
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self._data_bytes % 2:
+            self._file.write(b"\0")  # Chunks are word aligned
+        riff_size = self._data_offset - 8 + self._data_bytes + self._data_bytes % 2
+        if self._fact_offset is not None:
+            self._file.seek(self._fact_offset)
+            self._file.write(struct.pack("<I", min(self.frames, RIFF_LIMIT)))  # RF64 keeps the full count in ds64
+        if riff_size <= RIFF_LIMIT:
+            self._file.seek(4)
+            self._file.write(struct.pack("<I", riff_size))
+            self._file.seek(self._data_offset - 4)
+            self._file.write(struct.pack("<I", self._data_bytes))
+        else:
+            self._file.seek(0)
+            self._file.write(b"RF64" + struct.pack("<I", RIFF_LIMIT) + b"WAVE")
+            self._file.write(b"ds64" + struct.pack("<IQQQI", 28, riff_size, self._data_bytes, self.frames, 0))
+            self._file.seek(self._data_offset - 4)
+            self._file.write(struct.pack("<I", RIFF_LIMIT))
+        self._file.close()
+
+class RawWriter:
+    # Headerless interleaved PCM, to a path or an already open binary stream
+    def __init__(self, path, sample_rate, channels, subtype="PCM_16"):
+        if subtype not in SUBTYPES:
+            raise ValueError(f"Unsupported raw subtype: {subtype}")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.subtype = subtype
+        self.frames = 0
+        self._owns_file = isinstance(path, (str, os.PathLike))
+        self._file = open(path, "wb") if self._owns_file else path
+
+    def write(self, block):
+        self._file.write(encode_samples(block, self.subtype))
+        self.frames += len(block)
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+class FlacWriter:
+    # FLAC needs the optional soundfile package (libsndfile)
+    def __init__(self, path, sample_rate, channels, subtype="PCM_16"):
+        try:
+            import soundfile
+        except ImportError:
+            raise RuntimeError("Writing FLAC requires the 'soundfile' package (pip install soundfile)")
+        if subtype not in ("PCM_16", "PCM_24"):
+            raise ValueError("FLAC supports PCM_16 and PCM_24 only")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.subtype = subtype
+        self.frames = 0
+        self._file = soundfile.SoundFile(path, "w", samplerate=sample_rate, channels=channels,
+                                         format="FLAC", subtype=subtype)
+
+    def write(self, block):
+        self._file.write(block)
+        self.frames += len(block)
+
+    def close(self):
+        self._file.close()
+
+WRITERS = {
+    "wav": WavWriter,
+    "raw": RawWriter,
+    "flac": FlacWriter,
+}
+
+def output_format(path, file_format=None):
+    # The explicit format, or the one the file extension names
+    if file_format is None:
+        file_format = os.path.splitext(str(path))[1].lstrip(".").lower() or "wav"
+        if file_format == "pcm":
+            file_format = "raw"
+    if file_format not in WRITERS:
+        raise ValueError(f"Unsupported output format: {file_format}")
+    return file_format
+
+def check_output(path, subtype="PCM_16", file_format=None):
+    # Raise ValueError if open_writer could not write this file, without creating it
+    file_format = output_format(path, file_format)
+    if subtype not in SUBTYPES:
+        raise ValueError(f"Unsupported subtype: {subtype}")
+    if file_format == "flac":
+        if importlib.util.find_spec("soundfile") is None:
+            raise ValueError("Writing FLAC requires the 'soundfile' package (pip install soundfile)")
+        if subtype not in ("PCM_16", "PCM_24"):
+            raise ValueError("FLAC supports PCM_16 and PCM_24 only")
+    return file_format
+
+def open_writer(path, sample_rate, channels, subtype="PCM_16", file_format=None):
+    file_format = output_format(path, file_format)
+    return WRITERS[file_format](path, sample_rate, channels, subtype)
@@ -0,0 +1,36 @@
+import numpy as np
+from audio.config import AudioConfig
+from audio.playback import LoopSource, ToneGenerator
+from audio.waveform import generate_sine_wave
+from benchmarks.common import time_per_call
+
+SAMPLE_RATE = 44100
+BUFFER_SECONDS = [1, 10, 60, 600]
+BLOCK_SIZES = [64, 256, 1024]
+
+def legacy_callback(tone_generator, outdata, frames):
+    # The original np.roll based callback, kept for comparison
+    outdata[:, 0] = tone_generator.legacy_waveform[:frames] * tone_generator.router.matrix[0, 0]
+    outdata[:, 1] = tone_generator.legacy_waveform[:frames] * tone_generator.router.matrix[0, 1]
+    tone_generator.legacy_waveform = np.roll(tone_generator.legacy_waveform, -frames)
+
+def main():
+    print(f"{'buffer (s)':>10} {'block':>6} {'roll (us)':>12} {'cursor (us)':>12}")
+    for seconds in BUFFER_SECONDS:
+        waveform = generate_sine_wave(440, seconds, SAMPLE_RATE, 0.5, 0)
+        for frames in BLOCK_SIZES:
+            outdata = np.zeros((frames, 2), dtype=np.float32)
+
+            tone_generator = ToneGenerator(AudioConfig(sample_rate=SAMPLE_RATE))
+            tone_generator.legacy_waveform = waveform
+            calls = 20 if seconds >= 60 else 200
+            legacy = time_per_call(lambda: legacy_callback(tone_generator, outdata, frames), calls=calls)
+
+            tone_generator.source = LoopSource(waveform)
+            tone_generator.envelope.gate_on()
+            cursor = time_per_call(lambda: tone_generator.audio_callback(outdata, frames, None, None))
+
+            print(f"{seconds:>10} {frames:>6} {legacy:>12.1f} {cursor:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import numpy as np
+from audio.mixer import Mixer
+from audio.oscillator import WAVE_TYPES
+from benchmarks.common import time_per_call
+
+SAMPLE_RATE = 48000
+BLOCK_SIZE = 256
+VOICE_COUNTS = [1, 16, 64, 256, 512]
+
+def main():
+    budget = BLOCK_SIZE / SAMPLE_RATE * 1e6
+    print(f"{BLOCK_SIZE} frames at {SAMPLE_RATE} Hz, callback budget {budget:.0f} us")
+    print(f"{'voices':>7} {'block (us)':>11} {'load':>7}")
+    rng = np.random.default_rng(0)
+    for voices in VOICE_COUNTS:
+        mixer = Mixer(SAMPLE_RATE, capacity=voices, max_frames=BLOCK_SIZE)
+        for voice in range(voices):
+            mixer.add_voice(WAVE_TYPES[voice % len(WAVE_TYPES)], rng.uniform(20, 20000), 1.0 / voices,
+                            pan=rng.uniform(), duty_cycle=rng.uniform(0.1, 0.9))
+        out = np.zeros((BLOCK_SIZE, 2), dtype=np.float32)
+        mixer.render(BLOCK_SIZE, out)
+        block = time_per_call(lambda: mixer.render(BLOCK_SIZE, out))
+        print(f"{voices:>7} {block:>11.1f} {block / budget:>7.1%}")
+
+if __name__ == "__main__":
+    main()
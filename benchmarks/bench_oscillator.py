@@ -0,0 +1,28 @@
+import time
+import tracemalloc
+from audio.oscillator import Oscillator
+from audio.waveform import generate_sine_wave
+
+SAMPLE_RATE = 44100
+DURATIONS = [1, 60, 600]
+BLOCK_SIZE = 512
+
+def first_block(make_source):
+    # Time until the first block is available and peak memory allocated on the way
+    tracemalloc.start()
+    start = time.perf_counter()
+    make_source()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed * 1e3, peak / 1e6
+
+def main():
+    print(f"{'duration (s)':>12} {'buffer (ms)':>12} {'buffer (MB)':>12} {'stream (ms)':>12} {'stream (MB)':>12}")
+    for duration in DURATIONS:
+        buffer_ms, buffer_mb = first_block(lambda: generate_sine_wave(440, duration, SAMPLE_RATE, 0.5, 0)[:BLOCK_SIZE])
+        stream_ms, stream_mb = first_block(lambda: Oscillator("sine", 440, SAMPLE_RATE, 0.5).render(BLOCK_SIZE))
+        print(f"{duration:>12} {buffer_ms:>12.2f} {buffer_mb:>12.2f} {stream_ms:>12.2f} {stream_mb:>12.2f}")
+
+if __name__ == "__main__":
+    main()
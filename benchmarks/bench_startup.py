@@ -0,0 +1,55 @@
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROJECT_PACKAGES = ("audio", "cli", "gui", "waveform_visualizer")
+
+# Module imported by each entry point, and modules it must never pull in
+ENTRY_POINTS = {
+    "cli": ("cli.main_cli", ["tkinter", "matplotlib"]),
+    "render": ("audio.render", ["sounddevice", "tkinter", "matplotlib"]),
+    "batch": ("cli.batch_cli", ["sounddevice", "tkinter", "matplotlib"]),
+    "server": ("cli.server_cli", ["sounddevice", "tkinter", "matplotlib"]),
+    "client": ("cli.client_cli", ["numpy", "sounddevice", "tkinter", "matplotlib"]),
+}
+
+def import_profile(module):
+    # Run a fresh interpreter with -X importtime and return {module: cumulative us}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import time and forbidden imports of each entry point")
+    parser.add_argument("--budget_ms", type=float, default=250.0, help="Maximum import time per entry point")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'entry':>7} {'import (ms)':>12} {'slowest third-party':>30}")
+    for entry, (module, forbidden) in ENTRY_POINTS.items():
+        profile = import_profile(module)
+        total = profile[module] / 1e3
+        slowest = max((name for name in profile if name.split(".")[0] not in PROJECT_PACKAGES),
+                      key=profile.get, default="")
+        print(f"{entry:>7} {total:>12.1f} {slowest:>30}")
+        loaded = [name for name in forbidden if name in profile]
+        if loaded:
+            failures.append(f"{entry} imports {', '.join(loaded)}")
+        if total > args.budget_ms:
+            failures.append(f"{entry} took {total:.1f} ms to import (budget {args.budget_ms:.0f} ms)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
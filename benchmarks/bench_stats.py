@@ -0,0 +1,28 @@
+import sys
+from time import perf_counter_ns
+from audio.stats import CallbackStats
+from benchmarks.common import time_per_call
+
+SAMPLE_RATE = 44100
+BLOCK_SIZES = [64, 256, 1024]
+LIMIT = 0.01  # Instrumentation may take at most this fraction of the callback budget
+
+def instrumented(stats, frames):
+    # What ToneGenerator.audio_callback adds around each render
+    started = perf_counter_ns()
+    stats.record(frames, perf_counter_ns() - started, False)
+
+def main():
+    stats = CallbackStats(SAMPLE_RATE)
+    cost = time_per_call(lambda: instrumented(stats, 256), calls=20000)
+    print(f"instrumentation: {cost:.2f} µs per callback")
+    print(f"{'frames':>8} {'budget µs':>10} {'overhead':>10}")
+    failed = False
+    for frames in BLOCK_SIZES:
+        budget = frames / SAMPLE_RATE * 1e6
+        print(f"{frames:>8} {budget:>10.0f} {cost / budget:>10.4%}")
+        failed = failed or cost / budget > LIMIT
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+from audio.oscillator import Oscillator, WAVE_TYPES
+from audio.waveform import generate_sine_wave, generate_square_wave, generate_triangle_wave, generate_sawtooth_wave
+from benchmarks.common import time_per_call
+
+SAMPLE_RATE = 44100
+BLOCK_SIZES = [256, 1024, 4096]
+GENERATORS = {
+    "sine": lambda duration: generate_sine_wave(440, duration, SAMPLE_RATE, 0.5, 0),
+    "square": lambda duration: generate_square_wave(440, duration, SAMPLE_RATE, 0.5, 0.5),
+    "triangle": lambda duration: generate_triangle_wave(440, duration, SAMPLE_RATE, 0.5, 0),
+    "sawtooth": lambda duration: generate_sawtooth_wave(440, duration, SAMPLE_RATE, 0.5, 0),
+}
+
+def main():
+    print(f"{'wave':>9} {'block':>6} {'generate (us)':>14} {'direct (us)':>12} {'wavetable (us)':>15}")
+    for wave_type in WAVE_TYPES:
+        for frames in BLOCK_SIZES:
+            generate = GENERATORS[wave_type]
+            direct = Oscillator(wave_type, 440, SAMPLE_RATE, 0.5, max_frames=frames)
+            wavetable = Oscillator(wave_type, 440, SAMPLE_RATE, 0.5, max_frames=frames, mode="wavetable")
+            out = direct.render(frames)
+            wavetable.render(frames, out)  # Builds and caches the tables
+
+            generate_us = time_per_call(lambda: generate(frames / SAMPLE_RATE))
+            direct_us = time_per_call(lambda: direct.render(frames, out))
+            wavetable_us = time_per_call(lambda: wavetable.render(frames, out))
+            print(f"{wave_type:>9} {frames:>6} {generate_us:>14.1f} {direct_us:>12.1f} {wavetable_us:>15.1f}")
+
+if __name__ == "__main__":
+    main()
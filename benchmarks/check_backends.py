@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+from audio.config import AudioConfig
+from audio.mixer import Mixer
+from audio.playback import ToneGenerator
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_RATE = 44100
+RUN_SECONDS = 0.5
+
+def clocked_frames(speed, source_voices=16):
+    # Frames the null backend delivers in RUN_SECONDS of wall time
+    tone_generator = ToneGenerator(AudioConfig(sample_rate=SAMPLE_RATE, blocksize=256, backend="null", speed=speed))
+    mixer = Mixer(SAMPLE_RATE, capacity=source_voices, max_frames=256)
+    for voice in range(source_voices):
+        mixer.add_voice("sawtooth", 110 * (voice + 1), 0.5 / source_voices, pan=voice / (source_voices - 1))
+    tone_generator.start(mixer)
+    time.sleep(RUN_SECONDS)
+    frames = tone_generator.stream.frames
+    underflows = tone_generator.stats.underflows
+    tone_generator.stop()
+    return frames, underflows
+
+def main():
+    failures = []
+    for speed in (1.0, 4.0):
+        frames, underflows = clocked_frames(speed)
+        rate = frames / RUN_SECONDS / SAMPLE_RATE
+        print(f"null backend at speed {speed:g}: {rate:.2f}x real time, {underflows} underflows")
+        if abs(rate - speed) > 0.15 * speed:
+            failures.append(f"speed {speed:g} ran at {rate:.2f}x")
+
+    frames, _ = clocked_frames(0.0)
+    print(f"null backend unthrottled: {frames / RUN_SECONDS / SAMPLE_RATE:.0f}x real time with 16 voices")
+
+    # The pipe backend through the real CLI: stdout must carry nothing but samples
+    result = subprocess.run([sys.executable, "main.py", "--mode", "cli", "--backend", "pipe", "--speed", "0",
+                             "--duration", "1", "--frequency", "1000", "--sample_format", "int16"],
+                            cwd=REPO_ROOT, stdin=subprocess.PIPE, capture_output=True, timeout=30)
+    if result.returncode or len(result.stdout) % 4:
+        failures.append(f"pipe backend exited with {result.returncode} and {len(result.stdout)} bytes")
+    else:
+        samples = np.frombuffer(result.stdout, dtype=np.int16).reshape(-1, 2)
+        window = samples[SAMPLE_RATE // 10:SAMPLE_RATE // 10 + SAMPLE_RATE, 0].astype(np.float64)
+        peak = np.argmax(np.abs(np.fft.rfft(window))) * SAMPLE_RATE / len(window)
+        print(f"pipe backend: {len(samples) / SAMPLE_RATE:.2f} s of int16 stereo, peak at {peak:.0f} Hz")
+        if len(samples) < SAMPLE_RATE or abs(peak - 1000) > 1:
+            failures.append(f"pipe output was {len(samples)} frames peaking at {peak:.0f} Hz")
+
+    # A full-scale square on the left channel must hit both rails of the integer
+    # format and never wrap: positive half periods stay at the top
+    for sample_format, dtype in (("int16", np.int16), ("int32", np.int32)):
+        result = subprocess.run([sys.executable, "main.py", "--mode", "cli", "--backend", "pipe", "--speed", "0",
+                                 "--duration", "0.5", "--frequency", "100", "--wave_type", "square", "--duty_cycle",
+                                 "0.5", "--volume", "1", "--pan", "0", "--sample_format", sample_format],
+                                cwd=REPO_ROOT, stdin=subprocess.PIPE, capture_output=True, timeout=30)
+        # Steady state only, between the attack and the release
+        left = np.frombuffer(result.stdout, dtype=dtype).reshape(-1, 2)[SAMPLE_RATE // 10:4 * SAMPLE_RATE // 10, 0]
+        limits = np.iinfo(dtype)
+        high, low = np.mean(left == limits.max), np.mean(left == limits.min)
+        print(f"{sample_format} full-scale square: {high:.1%} at {limits.max}, {low:.1%} at {limits.min}")
+        if result.returncode or abs(high - 0.5) > 0.01 or abs(low - 0.5) > 0.01:
+            failures.append(f"{sample_format} full-scale square is {high:.1%} high and {low:.1%} low")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
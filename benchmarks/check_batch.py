@@ -0,0 +1,94 @@
+import filecmp
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from audio.batch import normalize_spec, render_chunk, run_batch
+
+# Long tones through the batch renderer: with a cache directory the samples
+# stream into the cached .npy, so memory stays bounded by the chunk size
+# whatever the duration, and the files match uncached renders. Noise and
+# multisine entries render like the CLI's, and bad ones fail at load time.
+
+SAMPLE_RATE = 44100
+LONG_DURATION = 600.0
+MEMORY_LIMIT = 4 * 2 ** 20  # Traced bytes allowed while rendering a long tone
+
+def read_float_wav(path):
+    # Samples of a WAV written with subtype FLOAT, whose data chunk is last
+    with open(path, "rb") as wav:
+        data = wav.read()
+    return np.frombuffer(data[data.index(b"data") + 8:], dtype="<f4")
+
+def main():
+    failures = []
+    directory = tempfile.mkdtemp()
+    cache_dir = os.path.join(directory, "cache")
+
+    spec = normalize_spec({"output": "long.wav", "wave_type": "square", "frequency": 441, "duration": LONG_DURATION,
+                           "sample_rate": SAMPLE_RATE})
+    tracemalloc.start()
+    start = time.perf_counter()
+    (output, seconds, error, cached), = render_chunk([spec], os.path.join(directory, "cached"), cache_dir)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    tone_bytes = int(LONG_DURATION * SAMPLE_RATE) * 4
+    print(f"{LONG_DURATION:.0f} s tone ({tone_bytes / 2 ** 20:.0f} MB of samples) through the cache: "
+          f"{elapsed:.1f} s, {peak / 2 ** 20:.2f} MB peak traced memory")
+    if error is not None:
+        failures.append(f"cached render failed: {error}")
+    elif peak > MEMORY_LIMIT:
+        failures.append(f"rendering a long cached tone peaked at {peak} bytes")
+
+    # The same manifest through the process pool, with and without the cache;
+    # the second cached run reuses the first one's .npy
+    specs = [spec, normalize_spec({"output": "short.wav", "frequency": 1000, "duration": 2.5,
+                                   "sample_rate": SAMPLE_RATE})]
+    plain = run_batch(specs, os.path.join(directory, "plain"), workers=2)
+    reused = run_batch(specs, os.path.join(directory, "reused"), workers=2, cache_dir=cache_dir)
+    if plain["failed"] or reused["failed"]:
+        failures.append(f"batch failures: {plain['failed'] + reused['failed']}")
+    if reused["cache_hits"] < 1:
+        failures.append("the second cached run rendered the long tone again")
+    for name in ("long.wav", "short.wav"):
+        for variant in ("cached", "reused"):
+            path = os.path.join(directory, variant, name)
+            if os.path.exists(path) and not filecmp.cmp(path, os.path.join(directory, "plain", name), shallow=False):
+                failures.append(f"{variant} {name} differs from the uncached render")
+
+    # Stimuli in a manifest, rendered twice: the seed fixes the noise
+    specs = [normalize_spec(spec, index) for index, spec in enumerate([
+        {"output": "pink.wav", "wave_type": "pink", "seed": "7", "volume": 1.0, "subtype": "FLOAT"},
+        {"output": "multisine.wav", "wave_type": "multisine", "frequency": 100, "end_frequency": 10000, "tones": 8,
+         "subtype": "FLOAT"},
+    ])]
+    first = run_batch(specs, os.path.join(directory, "stimuli"), workers=2, cache_dir=cache_dir)
+    second = run_batch(specs, os.path.join(directory, "again"), workers=2)
+    if first["failed"] or second["failed"] or first["cache_hits"]:
+        failures.append(f"stimuli: {first['failed'] + second['failed']}, {first['cache_hits']} cache hits")
+    else:
+        for name in ("pink.wav", "multisine.wav"):
+            if not filecmp.cmp(os.path.join(directory, "stimuli", name), os.path.join(directory, "again", name),
+                               shallow=False):
+                failures.append(f"{name} differs between runs")
+        pink = read_float_wav(os.path.join(directory, "stimuli", "pink.wav"))
+        if not 0 < np.max(np.abs(pink)) <= 1.0:
+            failures.append(f"pink noise at full volume peaks at {np.max(np.abs(pink)):.4f}")
+    for bad in ({"wave_type": "multisine"}, {"wave_type": "multisine", "frequency": 500, "end_frequency": 400},
+                {"wave_type": "noise"}, {"wave_type": "white", "tones": 0}):
+        try:
+            normalize_spec({"output": "bad.wav", **bad})
+            failures.append(f"{bad} was accepted")
+        except ValueError:
+            pass
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import sys
+import tempfile
+import time
+import numpy as np
+from audio.cache import WaveformCache
+from audio.oscillator import Oscillator
+
+SAMPLE_RATE = 44100
+DURATION = 5.0
+
+def check_memory_tier():
+    failures = []
+    one_tone = int(DURATION * SAMPLE_RATE) * 4
+    cache = WaveformCache(max_bytes=int(2.5 * one_tone))
+    for frequency in (220, 330, 220, 440, 550, 220):
+        cache.tone("sine", frequency, DURATION, SAMPLE_RATE, 0.5)
+    stats = cache.stats()
+    # Room for two tones: 440 evicts 330 rather than the recently used 220,
+    # then 550 evicts 220 and 220 evicts 440
+    if (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) != (1, 5, 3, 2):
+        failures.append(f"unexpected LRU behaviour: {stats}")
+    if stats["bytes"] > cache.max_bytes:
+        failures.append("memory tier exceeds its budget")
+    if cache.tone("sine", 220, DURATION, SAMPLE_RATE, 0.5).flags.writeable:
+        failures.append("cached arrays are writeable")
+    if cache.tone("sine", 220.0, DURATION, SAMPLE_RATE, 0.5) is not cache.tone("sine", 220, DURATION, SAMPLE_RATE, 0.5):
+        failures.append("220 and 220.0 are cached separately")
+    return failures
+
+def check_disk_tier():
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        first = WaveformCache(directory=directory)
+        start = time.perf_counter()
+        rendered = first.tone("square", 1000, DURATION, SAMPLE_RATE, 0.5, duty_cycle=0.25)
+        render_ms = (time.perf_counter() - start) * 1000
+        # A second cache on the same directory stands in for another process
+        second = WaveformCache(directory=directory)
+        start = time.perf_counter()
+        loaded = second.tone("square", 1000, DURATION, SAMPLE_RATE, 0.5, duty_cycle=0.25)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"render {render_ms:.1f} ms, memory-mapped load {load_ms:.2f} ms")
+        if second.disk_hits != 1 or not isinstance(loaded, np.memmap):
+            failures.append("second cache did not map the saved render")
+        if not np.array_equal(rendered, loaded):
+            failures.append("disk tier returned different samples")
+
+    # Cached tones match streaming the oscillator block by block
+    oscillator = Oscillator("square", 1000, SAMPLE_RATE, 0.5, 0, 0.25)
+    streamed = np.concatenate([oscillator.render(512) for _ in range(len(rendered) // 512 + 1)])[:len(rendered)]
+    if not np.array_equal(streamed, rendered):
+        failures.append("cached tone differs from the streamed oscillator")
+    return failures
+
+def main():
+    failures = check_memory_tier() + check_disk_tier()
+    for failure in failures:
+        print("FAIL:", failure)
+    if not failures:
+        print("waveform cache OK")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import sys
+import numpy as np
+from audio.envelope import Envelope
+
+SAMPLE_RATE = 48000
+BLOCK_SIZES = [1, 37, 256, 4096]
+
+def render(block_size, shape):
+    # Gate on, hold for 0.1 s, release; identical whatever the block size
+    envelope = Envelope(SAMPLE_RATE, attack=0.01, decay=0.02, sustain=0.5, release=0.03, shape=shape,
+                        max_frames=block_size)
+    envelope.gate_on()
+    total = int(0.2 * SAMPLE_RATE)
+    release_at = int(0.1 * SAMPLE_RATE)
+    out = np.empty(total)
+    position = 0
+    while position < total:
+        frames = min(block_size, total - position)
+        if position <= release_at < position + frames:
+            # Split the block so the gate changes on the same sample every time
+            frames = release_at - position or frames
+        if position == release_at:
+            envelope.gate_off()
+        out[position:position + frames] = envelope.fill(out[position:position + frames])
+        position += frames
+    return out, envelope
+
+def main():
+    failures = []
+    for shape in ("cosine", "linear"):
+        reference, envelope = render(BLOCK_SIZES[0], shape)
+        for block_size in BLOCK_SIZES[1:]:
+            out, _ = render(block_size, shape)
+            if np.abs(out - reference).max() > 1e-12:
+                failures.append(f"{shape}: blocks of {block_size} differ from single samples")
+        if not envelope.finished or reference[-1] != 0.0:
+            failures.append(f"{shape}: release did not finish")
+        if abs(reference[int(0.05 * SAMPLE_RATE)] - 0.5) > 1e-12:
+            failures.append(f"{shape}: sustain level is {reference[int(0.05 * SAMPLE_RATE)]}")
+        # Raised-cosine segments start and end with almost no slope
+        slope = np.abs(np.diff(reference))
+        print(f"{shape:>7}: largest step {slope.max():.2e}, first step {reference[0]:.2e}")
+        if shape == "cosine" and reference[0] > 1e-4:
+            failures.append("cosine attack does not start smoothly")
+    for failure in failures:
+        print("FAIL:", failure)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
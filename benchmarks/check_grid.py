@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from multiprocessing import get_context
+import numpy as np
+from audio.grid import attach_shared_grid, create_shared_grid, open_memmap_grid, render_grid
+from audio.waveform import generate_sawtooth_wave, generate_sine_wave, generate_square_wave, generate_triangle_wave
+
+# render_grid against the per-tone generators it replaces: identical rows,
+# temporaries within the memory budget, output shared with another process
+# through shared memory and a memory-mapped file, and the speed-up
+
+SAMPLE_RATE = 48000
+GENERATORS = {
+    "sine": lambda frequency, amplitude, phase_shift, duty_cycle, duration: generate_sine_wave(
+        frequency, duration, SAMPLE_RATE, amplitude, phase_shift),
+    "square": lambda frequency, amplitude, phase_shift, duty_cycle, duration: generate_square_wave(
+        frequency, duration, SAMPLE_RATE, amplitude, duty_cycle, phase_shift=phase_shift),
+    "triangle": lambda frequency, amplitude, phase_shift, duty_cycle, duration: generate_triangle_wave(
+        frequency, duration, SAMPLE_RATE, amplitude, phase_shift),
+    "sawtooth": lambda frequency, amplitude, phase_shift, duty_cycle, duration: generate_sawtooth_wave(
+        frequency, duration, SAMPLE_RATE, amplitude, phase_shift),
+}
+
+def row_sums(name, rows, frames, path, results):
+    # Runs in a worker process: reads both outputs in place and reports a checksum per row
+    shm, shared = attach_shared_grid(name, rows, frames)
+    mapped = np.load(path, mmap_mode="r")
+    results.put((shared.sum(axis=1, dtype=np.float64).tolist(), mapped.sum(axis=1, dtype=np.float64).tolist()))
+    del shared
+    shm.close()
+
+def main():
+    failures = []
+
+    # Every row equals its generator call, with whole-row tiles and with a
+    # budget small enough to split rows and cross the generators' block boundaries
+    frequency = np.array([55.0, 1037.0, 4567.0])[:, None, None]
+    amplitude = np.array([0.25, 1.0])[None, :, None]
+    phase_shift = np.array([0.0, 90.0])
+    duty_cycle = 0.3
+    for wave_type, generate in GENERATORS.items():
+        for max_bytes in (None, 200000):
+            options = {"max_bytes": max_bytes} if max_bytes else {}
+            grid = render_grid(wave_type, frequency, amplitude, phase_shift, 1.5, SAMPLE_RATE, duty_cycle, **options)
+            for row, parameters in enumerate(np.broadcast(frequency, amplitude, phase_shift, duty_cycle)):
+                if not np.array_equal(grid[row], generate(*map(float, parameters), 1.5)):
+                    failures.append(f"{wave_type} row {row} ({parameters}) differs from the generator")
+                    break
+
+    # Temporaries stay within the budget; only the output grows with the grid
+    for max_bytes in (1 * 2 ** 20, 8 * 2 ** 20):
+        out = np.empty((2000, SAMPLE_RATE), dtype=np.float32)
+        tracemalloc.start()
+        render_grid("square", np.linspace(100, 5000, 2000), 0.5, 0, 1, SAMPLE_RATE, out=out, max_bytes=max_bytes)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{out.nbytes / 2 ** 20:.0f} MB grid with a {max_bytes / 2 ** 20:.0f} MB budget: "
+              f"{peak / 2 ** 20:.2f} MB of temporaries")
+        if peak > 1.1 * max_bytes + 2 ** 20:
+            failures.append(f"temporaries peaked at {peak} bytes with a {max_bytes} byte budget")
+
+    # Shared memory and a .npy memmap are filled in place and read by another process without copying
+    frequency = np.geomspace(100, 8000, 64)
+    rows, frames = len(frequency), SAMPLE_RATE // 2
+    path = os.path.join(tempfile.mkdtemp(), "grid.npy")
+    shm, shared = create_shared_grid(rows, frames)
+    mapped = open_memmap_grid(path, rows, frames)
+    try:
+        render_grid("triangle", frequency, 0.5, 0, 0.5, SAMPLE_RATE, out=shared)
+        render_grid("triangle", frequency, 0.5, 0, 0.5, SAMPLE_RATE, out=mapped)
+        mapped.flush()
+        context = get_context("spawn")
+        results = context.Queue()
+        worker = context.Process(target=row_sums, args=(shm.name, rows, frames, path, results))
+        worker.start()
+        shared_sums, mapped_sums = results.get(timeout=60)
+        worker.join()
+        expected = shared.sum(axis=1, dtype=np.float64)
+        if not np.array_equal(shared_sums, expected) or not np.array_equal(mapped_sums, expected):
+            failures.append("the worker read different samples from shared memory or the memmap")
+    finally:
+        del shared, mapped
+        shm.close()
+        shm.unlink()
+
+    # Many short tones: one Python call per tone against one call for the grid
+    print(f"\n{'wave':>9} {'tones':>6} {'loop (s)':>9} {'grid (s)':>9} {'speed-up':>9}")
+    frequency = np.linspace(100, 5000, 10000)
+    for wave_type, generate in GENERATORS.items():
+        start = time.perf_counter()
+        for value in frequency:
+            generate(value, 0.5, 0, 0.5, 0.02)
+        loop = time.perf_counter() - start
+        start = time.perf_counter()
+        render_grid(wave_type, frequency, 0.5, 0, 0.02, SAMPLE_RATE)
+        grid = time.perf_counter() - start
+        print(f"{wave_type:>9} {len(frequency):>6} {loop:>9.3f} {grid:>9.3f} {loop / grid:>8.1f}x")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sys
+import numpy as np
+from audio.mixer import Mixer
+from audio.routing import Router, pan_gains
+from benchmarks.common import time_per_call
+
+SAMPLE_RATE = 48000
+BLOCK_SIZE = 256
+CHANNEL_COUNTS = [2, 8, 16, 32]
+
+def check_pan_law():
+    failures = []
+    positions = np.linspace(0, 1, 1001)
+    stereo = pan_gains(positions, 2)
+    if np.abs(stereo[:, 0] - np.cos(positions * np.pi / 2)).max() > 1e-12:
+        failures.append("two-channel pan law differs from cos/sin")
+    for channels in CHANNEL_COUNTS:
+        for ring in (False, True):
+            power = (pan_gains(positions, channels, ring) ** 2).sum(axis=1)
+            if np.abs(power - 1).max() > 1e-12:
+                failures.append(f"{channels} channels{' (ring)' if ring else ''}: power varies with position")
+        # Position k / (channels - 1) sits exactly on speaker k
+        on_speaker = pan_gains(np.arange(channels) / (channels - 1), channels)
+        if np.abs(on_speaker - np.eye(channels)).max() > 1e-12:
+            failures.append(f"{channels} channels: speaker positions are off")
+    return failures
+
+def check_crossfade():
+    # Retargeting mid-crossfade never jumps: output of a constant input
+    # moves by at most one ramp step per sample
+    failures = []
+    router = Router(pan_gains(0.0, 8)[None, :], ramp_frames=480, max_frames=BLOCK_SIZE)
+    inputs = np.ones((BLOCK_SIZE, 1), dtype=np.float32)
+    out = np.empty((BLOCK_SIZE, 8), dtype=np.float32)
+    changes = {1: 0.9, 2: 0.2, 5: 0.6}  # Block -> new pan position
+    blocks = []
+    for block in range(12):
+        if block in changes:
+            router.set(pan_gains(changes[block], 8)[None, :])
+        blocks.append(router.process(inputs, out).copy())
+    signal = np.concatenate(blocks)
+    if np.abs(np.diff(signal, axis=0)).max() > 2.0 / 480:
+        failures.append("routing change is not smooth")
+    if np.abs(signal[-1] - pan_gains(0.6, 8)).max() > 1e-6:
+        failures.append("routing did not settle on the last matrix")
+    return failures
+
+def report_cost():
+    print(f"{'channels':>8} {'mixer 64 voices us':>20} {'route 2->N us':>14} {'budget us':>10}")
+    budget = BLOCK_SIZE / SAMPLE_RATE * 1e6
+    for channels in CHANNEL_COUNTS:
+        mixer = Mixer(SAMPLE_RATE, capacity=64, max_frames=BLOCK_SIZE, channels=channels)
+        for voice in range(64):
+            mixer.add_voice("sine", 100 + voice * 10, 0.01, pan=voice / 63)
+        out = np.empty((BLOCK_SIZE, channels), dtype=np.float32)
+        mixer_us = time_per_call(lambda: mixer.render(BLOCK_SIZE, out=out))
+        router = Router(np.eye(2, channels)[::-1], max_frames=BLOCK_SIZE)
+        inputs = np.ones((BLOCK_SIZE, 2), dtype=np.float32)
+        route_us = time_per_call(lambda: router.process(inputs, out))
+        print(f"{channels:>8} {mixer_us:>20.1f} {route_us:>14.1f} {budget:>10.0f}")
+
+def main():
+    failures = check_pan_law() + check_crossfade()
+    report_cost()
+    for failure in failures:
+        print("FAIL:", failure)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
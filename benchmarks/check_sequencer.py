@@ -0,0 +1,138 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from audio.sequencer import Sequencer, load_sequence, normalize_event
+
+SAMPLE_RATE = 48000
+BLOCK_SIZES = [1, 64, 256, 1000, 4096]
+# Events that must be rejected when the file is loaded, not when they play
+BAD_EVENTS = [
+    {"start": 0, "duration": 1, "ramps": [{"duration": 0.1, "frequency": 300}]},
+    {"start": 0, "duration": 1, "ramps": [{"time": 0.1, "wave_type": "noise"}]},
+    {"start": 0, "duration": 1, "ramps": [{"time": 0.1, "frequency": "high"}]},
+    {"start": 0, "duration": 1, "ramps": [{"time": 0.1, "duration": -1}]},
+    {"start": 0, "duration": 1, "ramps": {"time": 0.1}},
+    {"start": 0, "duration": 1, "volume": [1]},
+    {"start": 0, "duration": 1, "frequency": "nan"},
+    {"start": 0, "duration": 1, "sustain": 2},
+    {"start": 0, "duration": 1, "duty_cycle": 1.5},
+    "not an event",
+]
+ALLOCATION_SLACK = 4096  # Bytes a block may allocate in Python objects (dict entries, floats)
+
+def first_sound(channel, threshold=1e-6):
+    return int(np.flatnonzero(np.abs(channel) > threshold)[0])
+
+def render(events, frames, block_size):
+    sequencer = Sequencer([normalize_event(event, index) for index, event in enumerate(events)], SAMPLE_RATE,
+                          max_frames=block_size, dtype=np.float64)
+    out = np.empty((frames, 2))
+    for start in range(0, frames, block_size):
+        sequencer.render(min(block_size, frames - start), out=out[start:start + block_size])
+    return out
+
+def check_onsets():
+    # Onsets and ends land on exactly the same sample whatever the block size
+    failures = []
+    events = [
+        {"start": 0.0123, "duration": 0.05, "frequency": 1000, "pan": 0.0, "phase_shift": 90, "attack": 0, "release": 0},
+        {"start": 0.0811, "duration": 0.02, "frequency": 1500, "pan": 1.0, "phase_shift": 90, "attack": 0, "release": 0},
+    ]
+    frames = int(0.2 * SAMPLE_RATE)
+    reference = None
+    for block_size in BLOCK_SIZES:
+        out = render(events, frames, block_size)
+        left_start, right_start = first_sound(out[:, 0]), first_sound(out[:, 1])
+        left_end = frames - first_sound(out[::-1, 0])
+        if left_start != round(0.0123 * SAMPLE_RATE) or right_start != round(0.0811 * SAMPLE_RATE):
+            failures.append(f"blocks of {block_size}: onsets at {left_start}, {right_start}")
+        if left_end != round(0.0123 * SAMPLE_RATE) + round(0.05 * SAMPLE_RATE):
+            failures.append(f"blocks of {block_size}: first event ends at {left_end}")
+        if reference is None:
+            reference = out
+        elif np.abs(out - reference).max() > 1e-9:
+            failures.append(f"blocks of {block_size} differ from blocks of {BLOCK_SIZES[0]}")
+    return failures
+
+def check_ramp():
+    # A frequency ramp ends at the requested frequency
+    events = [{"start": 0, "duration": 1.0, "frequency": 200, "volume": 1.0,
+               "ramps": [{"time": 0.25, "duration": 0.25, "frequency": 800}]}]
+    out = render(events, SAMPLE_RATE, 512)[:, 0]
+    tail = out[int(0.6 * SAMPLE_RATE):int(0.9 * SAMPLE_RATE)]
+    rising = np.count_nonzero((tail[:-1] < 0) & (tail[1:] >= 0))
+    measured = rising / (len(tail) / SAMPLE_RATE)
+    return [] if abs(measured - 800) < 5 else [f"ramp reached {measured:.0f} Hz instead of 800 Hz"]
+
+def check_validation():
+    # Bad values fail at load time with a ValueError naming the event
+    failures = []
+    directory = tempfile.mkdtemp()
+    for number, event in enumerate(BAD_EVENTS):
+        path = os.path.join(directory, f"bad{number}.json")
+        with open(path, "w") as sequence:
+            json.dump([{"start": 0, "duration": 1}, event], sequence)
+        try:
+            load_sequence(path)
+            failures.append(f"{event} was accepted")
+        except ValueError as error:
+            if "event 1" not in str(error):
+                failures.append(f"{event} was rejected without its index: {error}")
+        except Exception as error:
+            failures.append(f"{event} raised {error!r} instead of ValueError")
+    path = os.path.join(directory, "object.json")
+    with open(path, "w") as sequence:
+        json.dump({"tones": []}, sequence)
+    try:
+        load_sequence(path)
+        failures.append("an object without 'events' was accepted")
+    except ValueError:
+        pass
+    return failures
+
+def check_allocation():
+    # Starting and stopping events on the audio thread reuses pooled voices
+    events = [{"start": index * 0.01, "duration": 0.025, "frequency": 200 + index, "pan": index % 5 / 4,
+               "ramps": [{"time": 0.005, "duration": 0.01, "frequency": 400}]} for index in range(400)]
+    sequencer = Sequencer([normalize_event(event, index) for index, event in enumerate(events)], SAMPLE_RATE, 256)
+    out = np.empty((256, 2), dtype=np.float32)
+    sequencer.render(256, out=out)
+    tracemalloc.start()
+    worst = 0
+    while not sequencer.finished:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        sequencer.render(256, out=out)
+        worst = max(worst, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    print(f"largest allocation in a block while events start and stop: {worst} bytes")
+    return [] if worst <= ALLOCATION_SLACK else [f"a block allocated {worst} bytes"]
+
+def check_long_program():
+    # An hour of back-to-back tones renders in bounded time
+    events = [{"start": index * 0.5, "duration": 0.4, "frequency": 200 + index % 50 * 10} for index in range(7200)]
+    sequencer = Sequencer([normalize_event(event, index) for index, event in enumerate(events)], SAMPLE_RATE, 1024)
+    out = np.empty((1024, 2), dtype=np.float32)
+    started = time.perf_counter()
+    blocks = 0
+    while not sequencer.finished:
+        sequencer.render(1024, out=out)
+        blocks += 1
+    elapsed = time.perf_counter() - started
+    print(f"one hour program, 7200 events: {elapsed:.2f} s ({blocks * 1024 / SAMPLE_RATE / elapsed:.0f}x real time)")
+    return []
+
+def main():
+    failures = check_onsets() + check_ramp() + check_validation() + check_allocation() + check_long_program()
+    for failure in failures:
+        print("FAIL:", failure)
+    if not failures:
+        print("sequencer timing OK")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from audio.client import ToneClient
+from audio.config import AudioConfig
+from audio.server import REQUEST_LIMIT, ToneServer
+
+# Runs a tone server on the null backend, so no sound device is needed,
+# and measures control round trips from several clients at once
+
+def run_server(server, ready):
+    asyncio.run(server.serve(ready=ready.set))
+
+def client_session(path, updates, latencies, failures):
+    client = ToneClient(path)
+    try:
+        voice = client.request("start", frequency=220, volume=0.05)["voice"]
+        for update in range(updates):
+            start = time.perf_counter()
+            client.request("update", voice=voice, frequency=220 + update, pan=update % 11 / 10)
+            latencies.append(time.perf_counter() - start)
+        client.request("stop", voice=voice)
+    except Exception as error:
+        failures.append(repr(error))
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the tone server and measure control round-trip latency")
+    parser.add_argument("--clients", type=int, default=8, help="Clients sending commands at once")
+    parser.add_argument("--updates", type=int, default=250, help="Updates sent by each client")
+    parser.add_argument("--budget_ms", type=float, default=10.0, help="Largest acceptable p99 round trip")
+    args = parser.parse_args()
+
+    failures = []
+    path = os.path.join(tempfile.mkdtemp(), "tone.sock")
+    server = ToneServer(AudioConfig(blocksize=256, backend="null"), path)
+    ready = threading.Event()
+    thread = threading.Thread(target=run_server, args=(server, ready))
+    thread.start()
+    if not ready.wait(5):
+        sys.exit("Server did not start")
+
+    control = ToneClient(path)
+    voice = control.request("start", frequency=440, volume=0.5)["voice"]
+    time.sleep(0.05)
+    if np.max(np.abs(server.tone_generator.snapshot(1024))) < 0.1:
+        failures.append("started voice is not audible")
+    control.request("stop", voice=voice)
+    # Each must get an error response on a connection that stays usable, and
+    # none may reach the audio thread
+    bad_file = os.path.join(tempfile.mkdtemp(), "no_events.json")
+    with open(bad_file, "w") as sequence:
+        sequence.write('{"tones": []}')
+    ramp = {"start": 0, "duration": 0.5}
+    for command, fields in [("bogus", {}), ("update", {"voice": 999}), ("start", {"wave_type": "noise"}),
+                            ("start", {"colour": 1}), ("start", {"frequency": "nan"}), ("sequence", {}),
+                            ("sequence", {"events": [{**ramp, "ramps": [{"frequency": 300}]}]}),
+                            ("sequence", {"events": [{**ramp, "ramps": [{"time": 0.1, "wave_type": "noise"}]}]}),
+                            ("sequence", {"events": {"start": 0}}), ("sequence", {"path": bad_file})]:
+        try:
+            control.request(command, **fields)
+            failures.append(f"{command} {fields} was accepted")
+        except RuntimeError:
+            pass
+        except ConnectionError:
+            failures.append(f"{command} {fields} dropped the connection")
+            control.close()
+            control = ToneClient(path)
+    if control.request("ping") != {}:
+        failures.append("connection unusable after bad requests")
+    sequence = control.request("sequence", events=[{"start": 0, "duration": 0.1, "frequency": 330}])
+    if sequence["events"] != 1:
+        failures.append(f"sequence response: {sequence}")
+    # Past asyncio's default 64 KiB line limit, and past the server's own
+    events = [{"start": index * 0.001, "duration": 0.001, "frequency": 330} for index in range(2000)]
+    try:
+        if control.request("sequence", events=events)["events"] != len(events):
+            failures.append("long sequence request lost events")
+    except (RuntimeError, ConnectionError) as error:
+        failures.append(f"long sequence request failed: {error!r}")
+        control.close()
+        control = ToneClient(path)
+    try:
+        control.request("ping", padding="x" * REQUEST_LIMIT)
+        failures.append("request over the size limit was accepted")
+    except RuntimeError:
+        pass
+    except ConnectionError:
+        failures.append("request over the size limit dropped the connection")
+        control.close()
+        control = ToneClient(path)
+    if control.request("ping") != {}:
+        failures.append("connection unusable after an oversized request")
+
+    latencies = []
+    sessions = [threading.Thread(target=client_session, args=(path, args.updates, latencies, failures))
+                for _ in range(args.clients)]
+    start = time.perf_counter()
+    for session in sessions:
+        session.start()
+    for session in sessions:
+        session.join()
+    elapsed = time.perf_counter() - start
+
+    stats = control.request("stats")
+    if stats["voices"]:
+        failures.append(f"voices left playing: {stats['voices']}")
+    if not stats["stats"]["callbacks"]:
+        failures.append("audio callback never ran")
+    control.request("shutdown")
+    control.close()
+    thread.join(5)
+    if thread.is_alive() or os.path.exists(path):
+        failures.append("server did not shut down cleanly")
+
+    latencies = np.array(latencies) * 1000
+    p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+    print(f"{len(latencies)} updates from {args.clients} clients in {elapsed:.2f} s "
+          f"({len(latencies) / elapsed:.0f}/s): round trip p50 {p50:.2f} ms, p99 {p99:.2f} ms, "
+          f"max {latencies.max() if len(latencies) else 0.0:.2f} ms; {stats['stats']['callbacks']} callbacks, "
+          f"{stats['stats']['underflows']} underflows")
+    if p99 > args.budget_ms:
+        failures.append(f"p99 round trip {p99:.2f} ms is over the {args.budget_ms} ms budget")
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import sys
+import numpy as np
+from waveform_visualizer.spectrum import WINDOWS, SpectrumAnalyzer
+
+# THD and SNR readouts against signals whose values are known analytically,
+# through every display window and off-bin frequencies
+
+SAMPLE_RATE = 44100
+SIZE = 8192
+TOLERANCE_DB = 0.5
+FREQUENCIES = [1000.0, 997.3, 2111.9]  # Ninth harmonics stay below Nyquist
+
+def analyze(samples, window):
+    analyzer = SpectrumAnalyzer(None, SAMPLE_RATE, SIZE, window, averaging="none")
+    return analyzer.analyze(samples)[2]
+
+def tones(frequency, amplitudes):
+    # Sum of harmonics 1..n of frequency with the given amplitudes
+    t = np.arange(SIZE) / SAMPLE_RATE
+    return sum(amplitude * np.sin(2 * np.pi * frequency * harmonic * t)
+               for harmonic, amplitude in enumerate(amplitudes, 1))
+
+def main():
+    failures = []
+    rng = np.random.default_rng(3)
+    odd = [1 / harmonic if harmonic % 2 else 0.0 for harmonic in range(1, 10)]
+    cases = {
+        # name: (signal for a frequency, expected THD or None, expected SNR or None, minimum SNR)
+        "pure sine": (lambda frequency: tones(frequency, [0.5]), None, None, 140.0),
+        "1% + 0.5% harmonics": (lambda frequency: tones(frequency, [1.0, 0.01, 0.005]),
+                                20 * np.log10(np.hypot(0.01, 0.005)), None, 140.0),
+        "square to 9th harmonic": (lambda frequency: tones(frequency, odd),
+                                   10 * np.log10(sum(value ** 2 for value in odd[1:])), None, 140.0),
+        "sine in white noise": (lambda frequency: tones(frequency, [1.0]) + 1e-3 * rng.standard_normal(SIZE),
+                                None, 10 * np.log10(0.5 / 1e-6), 0.0),
+        # Full-scale sine rounded to 16 bits: 6.02 * 16 + 1.76 dB
+        "16-bit sine": (lambda frequency: np.rint(tones(frequency, [32767.0])) / 32768, None, 98.09, 0.0),
+    }
+    print(f"{'signal':>24} {'window':>9} {'Hz':>8} {'THD (dB)':>9} {'SNR (dB)':>9}")
+    for name, (signal, thd, snr, minimum) in cases.items():
+        for frequency in FREQUENCIES:
+            samples = signal(frequency)
+            for window in WINDOWS:
+                measured = analyze(samples, window)
+                print(f"{name:>24} {window:>9} {frequency:>8.1f} {measured['thd_db']:>9.2f} "
+                      f"{measured['snr_db']:>9.2f}")
+                label = f"{name} at {frequency} Hz through {window}"
+                if abs(measured["frequency"] - frequency) > 0.01:
+                    failures.append(f"{label} reads {measured['frequency']:.3f} Hz")
+                if thd is not None and abs(measured["thd_db"] - thd) > TOLERANCE_DB:
+                    failures.append(f"{label} reads THD {measured['thd_db']:.2f} dB, expected {thd:.2f}")
+                if thd is None and snr is None and measured["thd_db"] > -140.0:
+                    failures.append(f"{label} reads THD {measured['thd_db']:.2f} dB")
+                if snr is not None and abs(measured["snr_db"] - snr) > TOLERANCE_DB:
+                    failures.append(f"{label} reads SNR {measured['snr_db']:.2f} dB, expected {snr:.2f}")
+                if measured["snr_db"] < minimum:
+                    failures.append(f"{label} reads SNR {measured['snr_db']:.2f} dB, leakage counted as noise")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import sys
+import numpy as np
+from audio.stimulus import NOISE_COLORS, NOISE_CREST, PINK_GAINS, PINK_POLES, PINK_TAPS, FilterBank, MultiSine, \
+    NoiseSource
+from benchmarks.common import time_per_call
+
+# Reproducibility, spectral slope and level of the noise sources, the
+# multisine's bins and crest factor, and what they cost per block
+
+SAMPLE_RATE = 48000
+AMPLITUDE = 0.5
+# Expected slope in dB per octave, measured between these frequencies
+SLOPES = {"white": 0.0, "pink": -3.0, "brown": -6.0}
+SLOPE_BAND = (100.0, 8000.0)
+SLOPE_TOLERANCE = 0.5
+
+def render_in_blocks(source, sizes):
+    return np.concatenate([source.render(size) for size in sizes])
+
+def slope(samples):
+    # Least-squares fit of the averaged spectrum in dB against octaves
+    segments = samples[:len(samples) // 4096 * 4096].reshape(-1, 4096) * np.hanning(4096)
+    power = np.mean(np.abs(np.fft.rfft(segments, axis=1)) ** 2, axis=0)
+    frequencies = np.fft.rfftfreq(4096, 1 / SAMPLE_RATE)
+    band = (frequencies >= SLOPE_BAND[0]) & (frequencies <= SLOPE_BAND[1])
+    return np.polyfit(np.log2(frequencies[band]), 10 * np.log10(power[band]), 1)[0]
+
+def main():
+    failures = []
+    rng = np.random.default_rng(1)
+
+    # The block-wise filter matches a sample-by-sample recursion across uneven blocks
+    bank = FilterBank(PINK_POLES, PINK_GAINS, PINK_TAPS)
+    x = rng.standard_normal(3000)
+    filtered = np.concatenate([bank.process(x[start:stop], np.empty(stop - start))
+                               for start, stop in [(0, 1), (1, 7), (7, 700), (700, 3000)]])
+    state, previous, expected = np.zeros(len(PINK_POLES)), 0.0, np.empty(len(x))
+    for n, sample in enumerate(x):
+        state = np.multiply(PINK_POLES, state) + np.multiply(PINK_GAINS, sample)
+        expected[n] = state.sum() + PINK_TAPS[0] * sample + PINK_TAPS[1] * previous
+        previous = sample
+    if np.max(np.abs(filtered - expected)) > 1e-9:
+        failures.append(f"FilterBank differs from the recursion by {np.max(np.abs(filtered - expected)):.2e}")
+
+    print(f"{'noise':>6} {'slope (dB/oct)':>15} {'rms':>7} {'peak':>6}")
+    sizes = rng.integers(1, 2000, size=400)
+    for color in NOISE_COLORS:
+        # Same seed, same samples, however the stream is split into blocks
+        whole = NoiseSource(color, SAMPLE_RATE, AMPLITUDE, seed=7, dtype=np.float64).render(int(sizes.sum()))
+        blocks = render_in_blocks(NoiseSource(color, SAMPLE_RATE, AMPLITUDE, seed=7, dtype=np.float64), sizes)
+        if np.max(np.abs(whole - blocks)) > 1e-12:
+            failures.append(f"{color} noise depends on the block sizes")
+        other = NoiseSource(color, SAMPLE_RATE, AMPLITUDE, seed=8, dtype=np.float64).render(1000)
+        if np.allclose(other, whole[:1000]):
+            failures.append(f"{color} noise ignores the seed")
+
+        samples = NoiseSource(color, SAMPLE_RATE, AMPLITUDE, seed=1, dtype=np.float64).render(20 * SAMPLE_RATE)
+        measured = slope(samples)
+        rms = np.sqrt(np.mean(samples ** 2))
+        print(f"{color:>6} {measured:>15.2f} {rms:>7.4f} {np.max(np.abs(samples)):>6.3f}")
+        if abs(measured - SLOPES[color]) > SLOPE_TOLERANCE:
+            failures.append(f"{color} noise slopes {measured:.2f} dB/octave")
+        if abs(rms - AMPLITUDE / NOISE_CREST) > 0.1 * AMPLITUDE / NOISE_CREST:
+            failures.append(f"{color} noise RMS is {rms:.4f}")
+        # Twenty seconds of Gaussian samples pass 4 sigma dozens of times; none may pass the amplitude
+        if np.max(np.abs(samples)) > AMPLITUDE:
+            failures.append(f"{color} noise peaks at {np.max(np.abs(samples)):.4f}, above its amplitude")
+
+    print(f"\n{'multisine':>20} {'tones':>6} {'crest':>6}")
+    cases = {"10 Hz grid": np.arange(100, 1100, 10), "log 100-10k Hz": np.geomspace(100, 10000, 32),
+             "log 20-20k Hz": np.geomspace(20, 20000, 200)}
+    for name, frequencies in cases.items():
+        multisine = MultiSine(frequencies, SAMPLE_RATE, AMPLITUDE, dtype=np.float64)
+        samples = render_in_blocks(multisine, [1000] * (3 * SAMPLE_RATE // 1000))
+        # Periodic with a one second frame: every tone sits exactly on a 1 Hz bin
+        spectrum = np.abs(np.fft.rfft(samples[SAMPLE_RATE:2 * SAMPLE_RATE]))
+        found = np.flatnonzero(spectrum > 1e-3 * spectrum.max())
+        crest = np.max(np.abs(samples)) / np.sqrt(np.mean(samples ** 2))
+        print(f"{name:>20} {len(multisine.frequencies):>6} {crest:>6.2f}")
+        if not np.array_equal(found, np.rint(multisine.frequencies).astype(int)):
+            failures.append(f"{name} multisine has energy at {len(found)} bins, not its tones")
+        if np.ptp(spectrum[found]) > 1e-6 * spectrum.max():
+            failures.append(f"{name} multisine tones are not equal in level")
+        if abs(np.max(np.abs(samples)) - AMPLITUDE) > 1e-9 or abs(crest - multisine.crest_factor) > 1e-6:
+            failures.append(f"{name} multisine peaks at {np.max(np.abs(samples)):.3f}")
+        # Better than random phases, whose crest factor is about 4 over a second
+        if crest > 3.5 or name == "10 Hz grid" and crest > 1.7:
+            failures.append(f"{name} multisine crest factor is {crest:.2f}")
+
+    print(f"\n{'source':>10} {'block (us)':>11}")
+    block = np.empty(256, dtype=np.float32)
+    for color in NOISE_COLORS:
+        noise = NoiseSource(color, SAMPLE_RATE, AMPLITUDE)
+        print(f"{color:>10} {time_per_call(lambda: noise.render(256, out=block), calls=2000):>11.1f}")
+    multisine = MultiSine(np.geomspace(100, 10000, 32), SAMPLE_RATE, AMPLITUDE)
+    print(f"{'multisine':>10} {time_per_call(lambda: multisine.render(256, out=block), calls=2000):>11.1f}")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
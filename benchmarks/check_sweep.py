@@ -0,0 +1,70 @@
+import sys
+import numpy as np
+from audio.oscillator import Sweep
+from audio.waveform import SWEEP_METHODS, generate_sweep, sweep_frequency
+
+SAMPLE_RATE = 48000
+DURATION = 4.0
+START_FREQUENCY = 20.0
+END_FREQUENCY = 20000.0
+STEPS = 8
+TOLERANCE = 0.005  # Relative frequency error allowed
+BLOCK_SIZES = [64, 256, 1000, 4096]
+
+def measured_frequency(samples):
+    # Frequency between successive rising zero crossings (interpolated to
+    # sub-sample accuracy), reported at the midpoint between them
+    samples = samples.astype(np.float64)
+    rising = np.flatnonzero((samples[:-1] < 0) & (samples[1:] >= 0))
+    crossings = rising + samples[rising] / (samples[rising] - samples[rising + 1])
+    periods = np.diff(crossings) / SAMPLE_RATE
+    midpoints = (crossings[:-1] + crossings[1:]) / 2 / SAMPLE_RATE
+    return midpoints, 1 / periods
+
+def check(method):
+    failures = []
+    reference = generate_sweep(START_FREQUENCY, END_FREQUENCY, DURATION, SAMPLE_RATE, 1.0, method, STEPS,
+                               dtype=np.float64)
+
+    # Measured instantaneous frequency against the analytic one. Periods
+    # spanning a step change are skipped, and the top of the range is left
+    # out where only a couple of samples fall in each period.
+    times, frequencies = measured_frequency(reference)
+    expected = sweep_frequency(times, START_FREQUENCY, END_FREQUENCY, DURATION, method, STEPS)
+    usable = expected < SAMPLE_RATE / 8
+    if method == "stepped":
+        period_start = times - 0.5 / frequencies
+        period_end = times + 0.5 / frequencies
+        step_time = DURATION / STEPS
+        usable &= np.floor(period_start / step_time) == np.floor(period_end / step_time)
+    error = np.abs(frequencies[usable] - expected[usable]) / expected[usable]
+    if error.max() > TOLERANCE:
+        failures.append(f"frequency off by {error.max():.3%}")
+
+    # Streaming in blocks of any size matches the one-shot render
+    for block_size in BLOCK_SIZES:
+        sweep = Sweep(START_FREQUENCY, END_FREQUENCY, DURATION, SAMPLE_RATE, 1.0, method, STEPS, dtype=np.float64)
+        blocks = [sweep.render(block_size) for _ in range(len(reference) // block_size + 2)]
+        streamed = np.concatenate(blocks)
+        if np.abs(streamed[:len(reference)] - reference).max() > 1e-6:
+            failures.append(f"streamed in blocks of {block_size} differs from generate_sweep")
+        if np.any(streamed[len(reference):]):
+            failures.append(f"not silent after the sweep ends (blocks of {block_size})")
+
+    # Continuous output: no sample-to-sample jump larger than the fastest
+    # sine slope allows
+    largest_step = 2 * np.pi * max(START_FREQUENCY, END_FREQUENCY) / SAMPLE_RATE
+    if np.abs(np.diff(reference)).max() > largest_step * 1.01:
+        failures.append("discontinuity in output")
+    return error.max(), failures
+
+def main():
+    failed = False
+    for method in SWEEP_METHODS:
+        worst, failures = check(method)
+        print(f"{method:>12}: worst frequency error {worst:.4%}" + ("" if not failures else "  FAIL: " + "; ".join(failures)))
+        failed = failed or bool(failures)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
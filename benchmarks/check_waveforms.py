@@ -0,0 +1,94 @@
+import sys
+import numpy as np
+from audio.oscillator import Oscillator
+from audio.waveform import generate_sawtooth_wave, generate_square_wave, generate_triangle_wave
+from benchmarks.common import time_per_call
+
+# Correctness of the periodic generators (duty cycle, phase, shape), their
+# agreement with the streaming Oscillator, how much aliasing PolyBLEP
+# removes, and what it costs
+
+SAMPLE_RATE = 48000
+GENERATORS = {
+    "square": lambda frequency, phase_shift, **options: generate_square_wave(
+        frequency, 1, SAMPLE_RATE, 1.0, 0.3, dtype=np.float64, phase_shift=phase_shift, **options),
+    "triangle": lambda frequency, phase_shift, **options: generate_triangle_wave(
+        frequency, 1, SAMPLE_RATE, 1.0, phase_shift, dtype=np.float64, **options),
+    "sawtooth": lambda frequency, phase_shift, **options: generate_sawtooth_wave(
+        frequency, 1, SAMPLE_RATE, 1.0, phase_shift, dtype=np.float64, **options),
+}
+# (frequency, required improvement over the naive shape in dB, largest alias level in dB)
+# Periods are not a whole number of samples, or the aliases would land on harmonics
+PURITY_CASES = [(1037.0, 10.0, {"square": -30.0, "sawtooth": -30.0, "triangle": -55.0}),
+                (4567.0, 10.0, {"square": -20.0, "sawtooth": -20.0, "triangle": -33.0})]
+
+def alias_level(samples, frequency):
+    # Power outside the harmonics of `frequency` relative to the power in
+    # them, in dB; anything that is not a harmonic is aliasing
+    window = np.blackman(len(samples))
+    power = np.abs(np.fft.rfft(samples * window)) ** 2
+    frequencies = np.fft.rfftfreq(len(samples), 1 / SAMPLE_RATE)
+    width = 6 * SAMPLE_RATE / len(samples)  # Main lobe of the window
+    harmonic = frequencies < width
+    for k in range(1, int(SAMPLE_RATE / 2 / frequency) + 1):
+        harmonic |= np.abs(frequencies - k * frequency) <= width
+    return 10 * np.log10(power[~harmonic].sum() / power[harmonic].sum())
+
+def main():
+    failures = []
+
+    # Duty cycle is a fraction of the period, not seconds
+    square = generate_square_wave(100, 1, SAMPLE_RATE, 1.0, 0.25, band_limited=False)
+    high = np.mean(square > 0)
+    if abs(high - 0.25) > 1e-3 or abs(square.mean() + 0.5) > 1e-3:
+        failures.append(f"square with duty 0.25 is high {high:.3f} of the time, mean {square.mean():.3f}")
+
+    # Phase shift moves every shape by the right fraction of a period (480 samples at 100 Hz)
+    for wave_type, generate in GENERATORS.items():
+        shifted = generate(100, 90)
+        expected = np.roll(generate(100, 0), -120)
+        if np.max(np.abs(shifted - expected)) > 1e-9:
+            failures.append(f"{wave_type} phase shift of 90 degrees is not a quarter period")
+
+    triangle = generate_triangle_wave(100, 1, SAMPLE_RATE, 1.0, 0, band_limited=False)
+    if abs(triangle.mean()) > 1e-6 or triangle.min() != -1.0 or abs(triangle.max() - 1.0) > 1e-9:
+        failures.append(f"triangle spans {triangle.min():.3f} to {triangle.max():.3f}, mean {triangle.mean():.4f}")
+
+    # The streaming oscillator produces the same band-limited samples block by block
+    for wave_type, generate in GENERATORS.items():
+        oscillator = Oscillator(wave_type, 1234.5, SAMPLE_RATE, 1.0, 30, duty_cycle=0.3, mode="polyblep",
+                                dtype=np.float64)
+        streamed = np.concatenate([oscillator.render(256) for _ in range(SAMPLE_RATE // 256)])
+        error = np.max(np.abs(streamed - generate(1234.5, 30)[:len(streamed)]))
+        if error > 1e-6:
+            failures.append(f"{wave_type} Oscillator polyblep differs from the generator by {error:.2e}")
+
+    print(f"{'wave':>9} {'freq':>7} {'naive (dB)':>11} {'polyblep (dB)':>14}")
+    for frequency, improvement, ceilings in PURITY_CASES:
+        for wave_type, generate in GENERATORS.items():
+            naive = alias_level(generate(frequency, 0, band_limited=False), frequency)
+            band_limited = alias_level(generate(frequency, 0), frequency)
+            print(f"{wave_type:>9} {frequency:>7.0f} {naive:>11.1f} {band_limited:>14.1f}")
+            if band_limited > naive - improvement or band_limited > ceilings[wave_type]:
+                failures.append(f"{wave_type} at {frequency:.0f} Hz aliases at {band_limited:.1f} dB")
+
+    print(f"\n{'wave':>9} {'1 s naive (us)':>15} {'1 s polyblep (us)':>18} {'block direct (us)':>18} "
+          f"{'block polyblep (us)':>20}")
+    out = np.empty(SAMPLE_RATE, dtype=np.float64)
+    block = np.empty(256, dtype=np.float32)
+    for wave_type, generate in GENERATORS.items():
+        naive = time_per_call(lambda: generate(440, 0, out=out, band_limited=False), calls=10)
+        band_limited = time_per_call(lambda: generate(440, 0, out=out), calls=10)
+        direct = Oscillator(wave_type, 440, SAMPLE_RATE, 1.0, max_frames=256)
+        polyblep = Oscillator(wave_type, 440, SAMPLE_RATE, 1.0, max_frames=256, mode="polyblep")
+        direct_us = time_per_call(lambda: direct.render(256, out=block), calls=1000)
+        polyblep_us = time_per_call(lambda: polyblep.render(256, out=block), calls=1000)
+        print(f"{wave_type:>9} {naive:>15.0f} {band_limited:>18.0f} {direct_us:>18.1f} {polyblep_us:>20.1f}")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import struct
+import sys
+import tempfile
+import numpy as np
+from audio.writers import SUBTYPES, WavWriter, check_output, encode_samples
+
+# Full-scale samples survive encoding in every PCM width, and WAV headers
+# carry what strict readers require
+
+EDGES = np.array([[1.0, -1.0], [0.99999, -0.99999], [0.5, -0.5], [0.0, 0.0]], dtype=np.float32)
+
+def decode(data, width):
+    if width == 3:
+        padded = np.zeros((len(data) // 3, 4), dtype=np.uint8)
+        padded[:, 1:] = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        return padded.view("<i4").ravel() >> 8  # Sign-extend the 24-bit values
+    return np.frombuffer(data, dtype=f"<i{width}")
+
+def chunks(path):
+    # (id, body) of every chunk in a RIFF file
+    with open(path, "rb") as wav:
+        data = wav.read()
+    found, position = {}, 12
+    while position + 8 <= len(data):
+        name, size = data[position:position + 4], struct.unpack("<I", data[position + 4:position + 8])[0]
+        found[name] = data[position + 8:position + 8 + size]
+        position += 8 + size + size % 2
+    return found
+
+def main():
+    failures = []
+    for subtype, (width, is_float) in SUBTYPES.items():
+        if is_float:
+            continue
+        scale = 2 ** (8 * width - 1)
+        samples = decode(encode_samples(EDGES, subtype), width).reshape(-1, 2)
+        expected = np.clip(np.rint(EDGES.astype(np.float64) * scale), -scale, scale - 1)
+        print(f"{subtype}: +1.0 -> {samples[0, 0]}, -1.0 -> {samples[0, 1]}")
+        if not np.array_equal(samples, expected):
+            failures.append(f"{subtype} encodes {EDGES[:, 0].tolist()} as {samples[:, 0].tolist()}")
+
+    directory = tempfile.mkdtemp()
+    for subtype, (width, is_float) in SUBTYPES.items():
+        path = os.path.join(directory, f"{subtype}.wav")
+        writer = WavWriter(path, 48000, 2, subtype)
+        writer.write(EDGES)
+        writer.write(EDGES[:3])
+        writer.close()
+        found = chunks(path)
+        fmt = found[b"fmt "]
+        if struct.unpack("<H", fmt[14:16])[0] != 8 * width or len(found[b"data"]) != 7 * 2 * width:
+            failures.append(f"{subtype} WAV has a bad fmt or data chunk")
+        if is_float and (len(fmt) != 18 or fmt[16:18] != b"\0\0" or found.get(b"fact") != struct.pack("<I", 7)):
+            failures.append(f"{subtype} WAV lacks cbSize or a fact chunk with the frame count")
+
+    for path, subtype in (("out.xyz", "PCM_16"), ("out.wav", "PCM_8")):
+        try:
+            check_output(path, subtype)
+            failures.append(f"check_output accepted {path} with {subtype}")
+        except ValueError:
+            pass
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import time
+
+def time_per_call(func, calls=200, repeat=5):
+    # Best-of-`repeat` mean time per call in microseconds
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e6
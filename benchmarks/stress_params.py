@@ -0,0 +1,92 @@
+import random
+import sys
+import threading
+import tracemalloc
+import numpy as np
+from audio.config import AudioConfig
+from audio.oscillator import Oscillator
+from audio.playback import ToneGenerator
+
+SAMPLE_RATE = 44100
+BLOCK_SIZE = 64
+BLOCKS = 20000
+# Allocation is measured on larger blocks, where any block-sized temporary
+# (8 KB of stereo float32) stands well clear of the Python-object slack
+ALLOCATION_FRAMES = 1024
+ALLOCATION_SLACK = 4096
+
+def hammer_updates(tone_generator, done):
+    # Every update carries values derived from the same k, so a torn read of the
+    # parameter block would show up as a mismatched pair
+    while not done.is_set():
+        k = random.randint(1, 1000)
+        tone_generator.update(frequency=100.0 * k, volume=k / 1000.0, pan=k / 1000.0)
+
+def drive_callback(tone_generator, errors):
+    outdata = np.zeros((BLOCK_SIZE, 2), dtype=np.float32)
+    for block in range(BLOCKS):
+        tone_generator.audio_callback(outdata, BLOCK_SIZE, None, None)
+        params = tone_generator._applied_params
+        if params.frequency is not None and not (params.frequency / 100.0 == params.volume * 1000.0 == params.pan * 1000.0):
+            errors.append(params)
+        if not np.isfinite(outdata).all() or np.abs(outdata).max() > 1.0:
+            errors.append(("bad output", block))
+
+def callback_allocation(tone_generator, blocks=1000):
+    # Largest transient allocation made by a single callback that applies a
+    # parameter change. Measured on one thread so the producer is not counted.
+    outdata = np.zeros((ALLOCATION_FRAMES, 2), dtype=np.float32)
+    tone_generator.audio_callback(outdata, ALLOCATION_FRAMES, None, None)  # Grows the buffers once
+    worst = 0
+    tracemalloc.start()
+    for block in range(blocks):
+        tone_generator.update(frequency=200.0 + block, volume=0.25 + (block % 2) * 0.25, pan=block % 5 / 4)
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        tone_generator.audio_callback(outdata, ALLOCATION_FRAMES, None, None)
+        worst = max(worst, tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return worst
+
+def rejected_updates(tone_generator):
+    # Invalid values must raise in update() and never reach the callback
+    failures = []
+    published = tone_generator._params
+    for fields in [{"wave_type": "sqaure"}, {"frequency": float("nan")}, {"frequency": -1.0}, {"volume": float("inf")},
+                   {"volume": -0.5}, {"pan": 1.5}, {"duty_cycle": -0.1}, {"phase_shift": "north"}]:
+        try:
+            tone_generator.update(**fields)
+            failures.append(f"update({fields}) was accepted")
+        except ValueError:
+            pass
+    if tone_generator._params is not published:
+        failures.append("a rejected update changed the published parameters")
+    return failures
+
+def main():
+    tone_generator = ToneGenerator(AudioConfig(sample_rate=SAMPLE_RATE))
+    tone_generator.source = Oscillator("sine", 440, SAMPLE_RATE, 0.5)
+    tone_generator.envelope.gate_on()
+
+    done = threading.Event()
+    errors = []
+    producer = threading.Thread(target=hammer_updates, args=(tone_generator, done), daemon=True)
+    consumer = threading.Thread(target=drive_callback, args=(tone_generator, errors))
+    producer.start()
+    consumer.start()
+    consumer.join()
+    done.set()
+    producer.join()
+
+    failures = rejected_updates(tone_generator)
+    allocated = callback_allocation(tone_generator)
+    print(f"{BLOCKS} blocks, {len(errors)} inconsistent parameter blocks, "
+          f"at most {allocated} bytes allocated by one callback")
+    if allocated > ALLOCATION_SLACK:
+        failures.append(f"a callback applying a parameter change allocated {allocated} bytes")
+    for failure in failures:
+        print("FAIL:", failure)
+    return 1 if errors or failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
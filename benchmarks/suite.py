@@ -0,0 +1,202 @@
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+import numpy as np
+from audio.config import AudioConfig
+from audio.grid import render_grid
+from audio.mixer import Mixer
+from audio.oscillator import Oscillator
+from audio.playback import ToneGenerator
+from audio.stimulus import NOISE_COLORS, NoiseSource
+from audio.waveform import generate_sawtooth_wave, generate_sine_wave, generate_square_wave, generate_triangle_wave
+from benchmarks.common import time_per_call
+
+# Runs without a sound device or a display: the callback is driven by
+# FakeStream and the plots are drawn on matplotlib's Agg canvas. Results are
+# saved as JSON and, given a baseline from an earlier run, any case that got
+# slower (or allocates more) by more than the threshold fails the run. A
+# callback that allocates more than CALLBACK_ALLOCATION_LIMIT fails it always.
+
+GENERATORS = {
+    "sine": lambda duration, sample_rate, out, dtype: generate_sine_wave(440, duration, sample_rate, 0.5, 0, out, dtype),
+    "square": lambda duration, sample_rate, out, dtype: generate_square_wave(440, duration, sample_rate, 0.5, 0.5, out, dtype),
+    "triangle": lambda duration, sample_rate, out, dtype: generate_triangle_wave(440, duration, sample_rate, 0.5, 0, out, dtype),
+    "sawtooth": lambda duration, sample_rate, out, dtype: generate_sawtooth_wave(440, duration, sample_rate, 0.5, 0, out, dtype),
+}
+DURATIONS = [1, 10]
+SAMPLE_RATES = [44100, 96000]
+DTYPES = ["float32", "float64"]
+BLOCK_SIZES = [64, 256, 1024]
+SAMPLE_FORMATS = ["float32", "int16"]
+MIXER_VOICES = 32
+GRID_TONES = [256, 4096]  # Rows of a parameter grid, each GRID_SECONDS long
+GRID_SECONDS = 0.05
+ALLOCATION_BLOCKS = 50
+ALLOCATION_SLACK = 1024  # Bytes an allocation figure may grow by before it counts as a regression
+# Bytes a callback may allocate in Python objects whatever the baseline; a
+# block-sized temporary at 1024 frames is several times this
+CALLBACK_ALLOCATION_LIMIT = 4096
+
+class FakeStream:
+    # Stands in for sounddevice.OutputStream: owns a device buffer in the
+    # stream's sample format and hands it to the callback one block at a time
+    def __init__(self, callback, frames, channels, dtype):
+        self.callback = callback
+        self.frames = frames
+        self.outdata = np.zeros((frames, channels), dtype=dtype)
+
+    def pull(self):
+        self.callback(self.outdata, self.frames, None, None)
+
+def make_source(name, sample_rate, frames):
+    if name == "oscillator":
+        return Oscillator("sine", 440, sample_rate, 0.5, max_frames=frames)
+    if name in NOISE_COLORS:
+        return NoiseSource(name, sample_rate, 0.5, max_frames=frames)
+    mixer = Mixer(sample_rate, capacity=MIXER_VOICES, max_frames=frames)
+    for voice in range(MIXER_VOICES):
+        mixer.add_voice(["sine", "square", "triangle", "sawtooth"][voice % 4], 110 * (voice + 1), 0.5 / MIXER_VOICES,
+                        pan=voice / (MIXER_VOICES - 1))
+    return mixer
+
+def make_stream(source_name, frames, sample_format, sample_rate=44100):
+    config = AudioConfig(sample_rate=sample_rate, blocksize=frames, sample_format=sample_format)
+    tone_generator = ToneGenerator(config, max_frames=frames)
+    tone_generator.prepare(make_source(source_name, sample_rate, frames))
+    stream = FakeStream(tone_generator.audio_callback, frames, config.channels, sample_format)
+    for _ in range(10):
+        stream.pull()  # Past the attack, and any lazily built state
+    return stream
+
+def block_allocation(func, blocks=ALLOCATION_BLOCKS):
+    # Largest transient allocation made by a single call, in bytes
+    func()
+    tracemalloc.start()
+    worst = 0
+    for _ in range(blocks):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        worst = max(worst, peak - before)
+    tracemalloc.stop()
+    return worst
+
+def bench_generators(results):
+    for wave_type, generate in GENERATORS.items():
+        for duration in DURATIONS:
+            for sample_rate in SAMPLE_RATES:
+                for dtype in DTYPES:
+                    out = np.empty(int(duration * sample_rate), dtype=dtype)
+                    calls = 2 if duration >= 10 else 10
+                    us = time_per_call(lambda: generate(duration, sample_rate, out, dtype), calls=calls, repeat=3)
+                    results[f"generate/{wave_type}/{duration}s/{sample_rate}/{dtype}"] = {"us": us}
+
+def bench_grid(results):
+    for wave_type in GENERATORS:
+        for tones in GRID_TONES:
+            frequency = np.geomspace(20, 20000, tones)
+            out = np.empty((tones, int(GRID_SECONDS * 44100)), dtype=np.float32)
+            us = time_per_call(lambda: render_grid(wave_type, frequency, 0.5, 0, GRID_SECONDS, 44100, out=out),
+                               calls=2, repeat=3)
+            results[f"grid/{wave_type}/{tones}"] = {"us": us}
+
+def bench_oscillator(results):
+    for sample_rate in SAMPLE_RATES:
+        for dtype in DTYPES:
+            for frames in BLOCK_SIZES:
+                oscillator = Oscillator("sine", 440, sample_rate, 0.5, max_frames=frames, dtype=dtype)
+                out = np.empty(frames, dtype=dtype)
+                render = lambda: oscillator.render(frames, out=out)
+                results[f"oscillator/{sample_rate}/{dtype}/{frames}"] = {
+                    "us": time_per_call(render, calls=500), "alloc_bytes": block_allocation(render)}
+
+def bench_callback(results):
+    for source_name in ("oscillator", "mixer") + NOISE_COLORS:
+        for sample_format in SAMPLE_FORMATS:
+            for frames in BLOCK_SIZES:
+                stream = make_stream(source_name, frames, sample_format)
+                us = time_per_call(stream.pull, calls=500)
+                results[f"callback/{source_name}/{sample_format}/{frames}"] = {
+                    "us": us, "load": us * 1e-6 * 44100 / frames, "alloc_bytes": block_allocation(stream.pull)}
+
+def bench_visualization(results):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from waveform_visualizer.scope import ScopePlot
+    from waveform_visualizer.spectrum import SpectrumAnalyzer
+
+    sample_rate = 44100
+    samples = generate_sine_wave(440, 1, sample_rate, 0.5, 0)
+    scope = ScopePlot(sample_rate)
+    scope.figure.set_size_inches(6.4, 4.8)
+    scope.attach(FigureCanvasAgg(scope.figure))
+    snapshot = samples[:2 * scope.length]
+    results["scope/update"] = {"us": time_per_call(lambda: scope.update(snapshot), calls=50)}
+    results["scope/full_redraw"] = {"us": time_per_call(scope.canvas.draw, calls=5, repeat=3)}
+
+    for size in (4096, 16384):
+        analyzer = SpectrumAnalyzer(lambda length: samples[:length], sample_rate, size=size)
+        results[f"spectrum/analyze/{size}"] = {"us": time_per_call(lambda: analyzer.analyze(samples), calls=50)}
+
+def compare(results, baseline, threshold):
+    # Cases measurably worse than the baseline; cases missing from either side are skipped
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["us"] > previous["us"] * (1 + threshold):
+            regressions.append(f"{name}: {previous['us']:.1f} -> {current['us']:.1f} us")
+        if "alloc_bytes" in current and "alloc_bytes" in previous \
+                and current["alloc_bytes"] > previous["alloc_bytes"] * (1 + threshold) + ALLOCATION_SLACK:
+            regressions.append(f"{name}: {previous['alloc_bytes']} -> {current['alloc_bytes']} bytes per block")
+    return regressions
+
+def allocating_callbacks(results):
+    return [f"{name}: {result['alloc_bytes']} bytes per block" for name, result in results.items()
+            if name.startswith("callback/") and result["alloc_bytes"] > CALLBACK_ALLOCATION_LIMIT]
+
+SUITES = {"generate": bench_generators, "grid": bench_grid, "oscillator": bench_oscillator,
+          "callback": bench_callback, "visualization": bench_visualization}
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark suite for the generation, callback and visualization paths")
+    parser.add_argument("--only", type=str, choices=list(SUITES), action="append", help="Run only the given suites")
+    parser.add_argument("--output", type=str, default=None, help="Save the results as JSON here")
+    parser.add_argument("--baseline", type=str, default=None, help="Results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Fractional slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or SUITES:
+        SUITES[name](results)
+
+    print(f"{'case':<44} {'us':>12} {'alloc (B)':>10}")
+    for name, result in results.items():
+        print(f"{name:<44} {result['us']:>12.1f} {result.get('alloc_bytes', ''):>10}")
+
+    if args.output:
+        environment = {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                       "processor": platform.processor()}
+        with open(args.output, "w") as output:
+            json.dump({"environment": environment, "results": results}, output, indent=2)
+
+    allocating = allocating_callbacks(results)
+    for case in allocating:
+        print("ALLOCATES", case)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if not regressions:
+            print(f"No regressions beyond {args.threshold:.0%} of the baseline")
+    if allocating or regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
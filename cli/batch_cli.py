@@ -0,0 +1,31 @@
+import argparse
+import sys
+from audio.batch import load_manifest, run_batch
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tone Generator batch renderer")
+    parser.add_argument("manifest", type=str, help="JSON, JSONL or CSV file of tone specs, each with an 'output' file name")
+    parser.add_argument("--output_dir", type=str, default=".", help="Directory the outputs are written to")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default is one per core)")
+    parser.add_argument("--overwrite", action="store_true", help="Render specs whose output already exists instead of skipping them")
+    parser.add_argument("--cache_dir", type=str, default=None, help="Share rendered samples between workers and runs through this directory")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    specs = load_manifest(args.manifest)
+    summary = run_batch(specs, args.output_dir, workers=args.workers, overwrite=args.overwrite, cache_dir=args.cache_dir)
+
+    elapsed = max(summary["elapsed"], 1e-9)
+    print(f"Rendered {summary['rendered']} of {summary['total']} tones "
+          f"({summary['skipped']} already done, {len(summary['failed'])} failed) in {elapsed:.2f} s: "
+          f"{summary['rendered'] / elapsed:.1f} tones/s, {summary['audio_seconds'] / elapsed:.0f}x real time.")
+    if args.cache_dir:
+        print(f"{summary['cache_hits']} of {summary['rendered']} tones reused cached samples.")
+    for output, error in summary["failed"]:
+        print(f"  {output}: {error}", file=sys.stderr)
+    if summary["failed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
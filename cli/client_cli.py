@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import sys
+from audio.client import DEFAULT_SOCKET, ToneClient
+
+WAVE_TYPES = ["sine", "square", "triangle", "sawtooth"]
+
+def add_voice_arguments(parser, defaults):
+    # Defaults of None leave a field unchanged on update
+    parser.add_argument("--wave_type", type=str, choices=WAVE_TYPES, default="sine" if defaults else None, help="Waveform type")
+    parser.add_argument("--frequency", type=float, default=440.0 if defaults else None, help="Frequency in Hz")
+    parser.add_argument("--volume", type=float, default=0.5 if defaults else None, help="Volume level (0.0 to 1.0)")
+    parser.add_argument("--pan", type=float, default=0.5 if defaults else None, help="Pan position (0.0 to 1.0)")
+    parser.add_argument("--phase_shift", type=float, default=0.0 if defaults else None, help="Phase shift in degrees")
+    parser.add_argument("--duty_cycle", type=float, default=0.5 if defaults else None, help="Duty cycle for square waves")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Control a running Tone Generator server")
+    parser.add_argument("--socket", type=str, default=DEFAULT_SOCKET, help="Path of the server's Unix domain socket")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    start = commands.add_parser("start", help="Start a voice and print its id")
+    add_voice_arguments(start, defaults=True)
+    update = commands.add_parser("update", help="Change a playing voice")
+    update.add_argument("voice", type=int, help="Voice id printed by start")
+    add_voice_arguments(update, defaults=False)
+    stop = commands.add_parser("stop", help="Stop one voice, or everything")
+    stop.add_argument("voice", type=int, nargs="?", default=None, help="Voice id (default stops all voices and the sequence)")
+    sequence = commands.add_parser("sequence", help="Play a JSON or JSONL sequence file")
+    sequence.add_argument("path", type=str, help="Sequence file")
+    commands.add_parser("stats", help="Print callback stats and what is playing")
+    commands.add_parser("ping", help="Check that the server is running")
+    commands.add_parser("shutdown", help="Stop the server")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    fields = {name: value for name, value in vars(args).items()
+              if name not in ("socket", "command") and value is not None}
+    if args.command == "sequence":
+        fields["path"] = os.path.abspath(args.path)  # The server may run in another directory
+    try:
+        client = ToneClient(args.socket)
+    except OSError as error:
+        sys.exit(f"Cannot reach the tone server at {args.socket}: {error}")
+    try:
+        response = client.request(args.command, **fields)
+    except RuntimeError as error:
+        sys.exit(f"Error: {error}")
+    finally:
+        client.close()
+    print(json.dumps(response, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,70 @@
 import argparse
+import os
 import time
 import sys
 import threading
-from audio.playback import ToneGenerator
-from audio.waveform import generate_sine_wave, generate_square_wave, generate_triangle_wave, generate_sawtooth_wave
+import numpy as np
+from audio.config import add_audio_arguments, config_from_args
+from audio.oscillator import Oscillator, Sweep
+from audio.render import render_to_file
+from audio.sequencer import Sequencer, load_sequence
+from audio.stimulus import NOISE_COLORS, STIMULUS_TYPES, MultiSine, NoiseSource
+from audio.stats import StatsWriter, format_summary
+from audio.writers import SUBTYPES, check_output
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Tone Generator CLI")
-    parser.add_argument("--frequency", type=float, default=440, help="Frequency of the tone in Hz")
+    parser.add_argument("--frequency", type=float, default=440, help="Frequency of the tone in Hz (start frequency of a sweep)")
     parser.add_argument("--duration", type=float, help="Duration of the tone in seconds (default is infinite)")
     parser.add_argument("--volume", type=float, default=0.5, help="Volume level (0.0 to 1.0)")
-    parser.add_argument("--wave_type", type=str, choices=["sine", "square", "triangle", "sawtooth"], default="sine", help="Waveform type")
+    parser.add_argument("--wave_type", type=str, choices=["sine", "square", "triangle", "sawtooth"] + list(STIMULUS_TYPES), default="sine", help="Waveform type, or a noise or multisine test stimulus")
     parser.add_argument("--duty_cycle", type=float, default=None, help="Duty cycle for square wave (0.01 to 1.0, required for square wave)")
     parser.add_argument("--phase_shift", type=float, default=0, help="Phase shift in degrees (0 to 360)")
-    parser.add_argument("--pan", type=float, default=0.5, help="Pan control (0.0 for full left, 1.0 for full right)")
-    
+    parser.add_argument("--pan", type=float, default=0.5, help="Pan control (0.0 for full left, 1.0 for full right; spread across all channels)")
+    parser.add_argument("--oscillator", type=str, choices=["direct", "wavetable", "polyblep"], default="direct", help="Synthesis mode (wavetable and polyblep are band-limited and do not alias at high frequencies)")
+    parser.add_argument("--sweep", type=str, choices=["linear", "exponential", "stepped"], default=None, help="Sweep from --frequency to --end_frequency over --duration")
+    parser.add_argument("--end_frequency", type=float, default=None, help="Final frequency of a sweep in Hz")
+    parser.add_argument("--steps", type=int, default=10, help="Number of frequencies held by a stepped sweep")
+    parser.add_argument("--tones", type=int, default=32, help="Number of log-spaced tones from --frequency to --end_frequency in a multisine")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for noise; the same seed gives the same samples")
+    parser.add_argument("--sequence", type=str, default=None, help="Play a JSON or JSONL file of timed tone events instead of a single tone")
+    parser.add_argument("--stats", action="store_true", help="Print audio callback timing and underflow counts while playing")
+    parser.add_argument("--stats_file", type=str, default=None, help="Keep callback stats in this file while playing (.prom for Prometheus text, JSON otherwise)")
+    parser.add_argument("--stats_interval", type=float, default=1.0, help="Seconds between --stats reports and --stats_file updates")
+    parser.add_argument("--output", type=str, default=None, help="Render to this file (.wav, .flac, .raw) instead of playing; requires --duration")
+    parser.add_argument("--subtype", type=str, choices=list(SUBTYPES), default="PCM_16", help="Sample format for --output")
+    add_audio_arguments(parser)
+
     args = parser.parse_args()
 
+    if args.output and not args.duration and not args.sequence:
+        parser.error("--output requires --duration.")
+    if args.output:
+        try:
+            check_output(args.output, args.subtype)
+        except ValueError as error:
+            parser.error(str(error))
+    if args.output and (args.stats or args.stats_file or args.auto_tune):
+        parser.error("--stats, --stats_file and --auto_tune apply to playback, not --output.")
+    if args.auto_tune and args.backend != "sounddevice":
+        parser.error("--auto_tune probes the sound device; it cannot be used with --backend null or pipe.")
+    if args.sequence and args.sweep:
+        parser.error("--sequence cannot be combined with --sweep.")
+
+    if args.sweep and (not args.duration or args.end_frequency is None):
+        parser.error("--sweep requires --duration and --end_frequency.")
+    if args.sweep == "exponential" and (args.frequency <= 0 or args.end_frequency <= 0):
+        parser.error("An exponential sweep needs positive start and end frequencies.")
+    if args.steps < 1:
+        parser.error("--steps must be at least 1.")
+    if args.wave_type in STIMULUS_TYPES and (args.sweep or args.sequence):
+        parser.error("--sweep and --sequence cannot be used with noise or multisine stimuli.")
+    if args.wave_type == "multisine" and (args.end_frequency is None or args.end_frequency <= args.frequency
+                                          or args.frequency <= 0):
+        parser.error("A multisine needs --end_frequency above a positive --frequency.")
+    if args.tones < 1:
+        parser.error("--tones must be at least 1.")
+
     # Ensure duty_cycle is provided if square wave is selected
     if args.wave_type == "square" and args.duty_cycle is None:
         parser.error("--duty_cycle must be specified when --wave_type is 'square'.")
@@ -28,38 +76,125 @@ def parse_args():
     return args
 
 def listen_for_quit(tone_generator):
+    # Reads the file descriptor directly: a daemon thread blocked in input()
+    # holds the stdin buffer lock, which aborts interpreter shutdown
     while True:
-        user_input = input()
-        if user_input.lower() == 'q':
+        user_input = os.read(sys.stdin.fileno(), 1024)
+        if not user_input:
+            threading.Event().wait()  # stdin is closed (as under CI); play until interrupted
+        if user_input.strip().lower() == b'q':
             tone_generator.stop()
             sys.exit()
 
-def main():
-    args = parse_args()
-    tone_generator = ToneGenerator()
+def build_source(args, sample_rate):
+    # Samples are produced block by block, so memory use does not depend on the duration
+    if args.sequence:
+        return Sequencer(load_sequence(args.sequence), sample_rate, channels=args.channels)
+    if args.wave_type in NOISE_COLORS:
+        return NoiseSource(args.wave_type, sample_rate, args.volume, seed=args.seed)
+    if args.wave_type == "multisine":
+        return MultiSine(np.geomspace(args.frequency, args.end_frequency, args.tones), sample_rate, args.volume)
+    duty_cycle = args.duty_cycle if args.duty_cycle is not None else 0.5
+    if args.sweep:
+        return Sweep(args.frequency, args.end_frequency, args.duration, sample_rate, args.volume, args.sweep,
+                     args.steps, wave_type=args.wave_type, duty_cycle=duty_cycle)
+    return Oscillator(args.wave_type, args.frequency, sample_rate, args.volume, args.phase_shift,
+                      duty_cycle=duty_cycle, mode=args.oscillator)
+
+def describe(args, source):
+    if args.wave_type in NOISE_COLORS:
+        return f"{args.wave_type} noise (seed {args.seed})"
+    if args.wave_type == "multisine":
+        return (f"multisine of {len(source.frequencies)} tones from {source.frequencies[0]:g} to "
+                f"{source.frequencies[-1]:g} Hz (crest factor {source.crest_factor:.2f})")
+    if args.sweep:
+        return f"{args.wave_type} wave sweeping {args.frequency} to {args.end_frequency} Hz"
+    return f"{args.wave_type} wave at {args.frequency} Hz"
 
-    waveform_type = args.wave_type
-    sample_rate = tone_generator.sample_rate
+def render(args):
+    # Offline render; never touches the sound device
+    sample_rate = config_from_args(args).sample_rate
+    source = build_source(args, sample_rate)
+    duration = args.duration or source.length / sample_rate  # A sequence runs to its last event by default
+    start = time.perf_counter()
+    frames = render_to_file(source, args.output, duration, sample_rate, pan=args.pan, subtype=args.subtype,
+                            channels=args.channels)
+    elapsed = time.perf_counter() - start
+    description = args.sequence if args.sequence else describe(args, source)
+    print(f"Rendered {frames / sample_rate:.2f} s of {description} to {args.output} "
+          f"in {elapsed:.2f} s ({frames / sample_rate / max(elapsed, 1e-9):.0f}x real time).")
 
-    if waveform_type == "sine":
-        waveform = generate_sine_wave(args.frequency, args.duration or 1.0, sample_rate, args.volume, args.phase_shift)
-    elif waveform_type == "square":
-        waveform = generate_square_wave(args.frequency, args.duration or 1.0, sample_rate, args.volume, args.duty_cycle)
-    elif waveform_type == "triangle":
-        waveform = generate_triangle_wave(args.frequency, args.duration or 1.0, sample_rate, args.volume, args.phase_shift)
-    elif waveform_type == "sawtooth":
-        waveform = generate_sawtooth_wave(args.frequency, args.duration or 1.0, sample_rate, args.volume, args.phase_shift)
+def play(args):
+    from audio.playback import ToneGenerator  # Imported here so rendering does not need a sound device
+
+    config = config_from_args(args)
+    if args.auto_tune:
+        config = tune(config)
+    tone_generator = ToneGenerator(config)
+    oscillator = build_source(args, tone_generator.sample_rate)
+
+    tone_generator.start(oscillator, pan=args.pan)
+    status = sys.stderr if config.backend == "pipe" else sys.stdout  # The pipe backend writes samples to stdout
+    if args.sequence:
+        print(f"Playing {args.sequence} ({oscillator.length / tone_generator.sample_rate:.1f} s). Press 'q' to quit.",
+              file=status)
+    else:
+        print(f"Playing {describe(args, oscillator)}. Press 'q' to quit.", file=status)
+
+    stats_writer = StatsWriter(tone_generator.stats, args.stats_file, args.stats_interval) if args.stats_file else None
+    if stats_writer:
+        stats_writer.start()
+    if args.stats:
+        reporter = threading.Thread(target=report_stats, args=(tone_generator, args.stats_interval), daemon=True)
+        reporter.start()
+    try:
+        wait_for_end(args, tone_generator, oscillator)
+    finally:
+        if stats_writer:
+            stats_writer.stop()
+        if args.stats:
+            print(f"Callback stats: {format_summary(tone_generator.stats.snapshot())}", file=sys.stderr)
+
+def tune(config):
+    from audio.playback import auto_tune
+
+    print("Probing block sizes...")
+    config, latency = auto_tune(config)
+    if latency is None:
+        print("No block size ran without underflows; using the host defaults.")
+    else:
+        print(f"Using {config.blocksize} frames per block ({latency * 1000:.1f} ms output latency).")
+    return config
 
-    tone_generator.start(waveform)
-    print(f"Playing {waveform_type} wave at {args.frequency} Hz. Press 'q' to quit.")
+def report_stats(tone_generator, interval):
+    while True:
+        time.sleep(interval)
+        print(format_summary(tone_generator.stats.snapshot()), file=sys.stderr)
 
-    if args.duration:
+def wait_for_end(args, tone_generator, oscillator):
+    if args.sequence and not args.duration:
+        # Event timing is sample-accurate inside the sequencer; this only
+        # decides when to close the stream once the last event has ended
+        quit_listener = threading.Thread(target=listen_for_quit, args=(tone_generator,))
+        quit_listener.daemon = True
+        quit_listener.start()
+        try:
+            while not oscillator.finished:
+                time.sleep(0.05)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            tone_generator.stop()
+    elif args.duration:
         quit_listener = threading.Thread(target=listen_for_quit, args=(tone_generator,))
         quit_listener.daemon = True
         quit_listener.start()
 
         try:
-            time.sleep(args.duration)
+            if tone_generator.config.backend == "sounddevice":
+                time.sleep(args.duration)
+            else:
+                wait_for_frames(tone_generator, args.duration * tone_generator.sample_rate)
         except KeyboardInterrupt:
             pass
         finally:
@@ -67,5 +202,18 @@ def main():
     else:
         listen_for_quit(tone_generator)
 
+def wait_for_frames(tone_generator, frames):
+    # The null and pipe backends may run faster or slower than real time, so
+    # count samples played rather than seconds
+    while tone_generator.stats.frames < frames:
+        time.sleep(0.005)
+
+def main():
+    args = parse_args()
+    if args.output:
+        render(args)
+    else:
+        play(args)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,33 @@
+import argparse
+import asyncio
+import signal
+from audio.client import DEFAULT_SOCKET
+from audio.config import add_audio_arguments, config_from_args
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tone Generator server: one audio stream controlled over a local socket")
+    parser.add_argument("--socket", type=str, default=DEFAULT_SOCKET, help="Path of the Unix domain socket to listen on")
+    parser.add_argument("--voices", type=int, default=64, help="Maximum number of voices playing at once")
+    add_audio_arguments(parser)
+    return parser.parse_args()
+
+async def run(server):
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, server.shutdown)
+    await server.serve(ready=lambda: print(f"Listening on {server.path}. Stop with Ctrl+C or a 'shutdown' command.",
+                                           flush=True))
+
+def main():
+    args = parse_args()
+    from audio.playback import auto_tune
+    from audio.server import ToneServer
+
+    config = config_from_args(args)
+    if args.auto_tune:
+        config, _ = auto_tune(config)
+        print(f"Using {config.blocksize or 'the host default'} frames per block.")
+    asyncio.run(run(ToneServer(config, args.socket, args.voices)))
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,23 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk
-from audio.playback import ToneGenerator
-from audio.waveform import generate_sine_wave, generate_square_wave, generate_triangle_wave, generate_sawtooth_wave
+from audio.config import add_audio_arguments, config_from_args
+from audio.playback import ToneGenerator, auto_tune
+from audio.oscillator import Oscillator
 from waveform_visualizer.waveform_visualizer import WaveformVisualizer  # Import the new module
+from waveform_visualizer.spectrum_visualizer import SpectrumVisualizer
+
+STATS_REFRESH_MS = 500
 
 class ToneGeneratorGUI(tk.Tk):
-    def __init__(self):
+    def __init__(self, config=None):
         super().__init__()
         self.title("Tone Generator")
-        self.geometry("500x500")  # Adjusted to be a bit taller for the dark mode button
-        self.tone_generator = ToneGenerator()
+        self.geometry("500x580")  # Adjusted to be a bit taller for the dark mode and spectrum buttons and stats readout
+        self.tone_generator = ToneGenerator(config)
         self.is_playing = False  # Track if the tone is currently playing
-        self.duration = 1.0  # Default duration
-        self.waveform_visualizer = WaveformVisualizer(self, self.get_current_waveform_snapshot)  # Initialize the visualizer
+        self.waveform_visualizer = WaveformVisualizer(self, self.get_current_waveform_snapshot, self.tone_generator.sample_rate)  # Initialize the visualizer
+        self.spectrum_visualizer = SpectrumVisualizer(self, self.get_current_waveform_snapshot, self.tone_generator.sample_rate)
         self.dark_mode = False  # Track if dark mode is enabled
         self.style = ttk.Style()  # Create a style object for ttk widgets
         self.create_widgets()
@@ -58,6 +63,10 @@ class ToneGeneratorGUI(tk.Tk):
         self.waveform_button = ttk.Button(self, text="Show Waveform", command=self.toggle_waveform_window)
         self.waveform_button.pack(fill=tk.X, padx=5, pady=5)
 
+        # Show/Hide Spectrum Button
+        self.spectrum_button = ttk.Button(self, text="Show Spectrum", command=self.toggle_spectrum_window)
+        self.spectrum_button.pack(fill=tk.X, padx=5, pady=5)
+
         # Toggle Dark Mode Button
         self.dark_mode_button = ttk.Button(self, text="Toggle Dark Mode", command=self.toggle_dark_mode)
         self.dark_mode_button.pack(fill=tk.X, padx=5, pady=5)
@@ -66,6 +75,11 @@ class ToneGeneratorGUI(tk.Tk):
         self.indicator_dot = tk.Canvas(self, width=20, height=20, bg="black")
         self.indicator_dot.pack(pady=10)
 
+        # Audio callback load and underflow readout
+        self.stats_label = ttk.Label(self, text="", anchor="center")
+        self.stats_label.pack(fill=tk.X, padx=5)
+        self.update_stats()
+
         # Bind sliders to automatically update the tone if it's playing
         self.frequency_scale.config(command=self.update_tone)
         self.volume_scale.config(command=self.update_tone)
@@ -165,13 +179,10 @@ class ToneGeneratorGUI(tk.Tk):
         phase = self.phase_scale.get()
 
         waveform_type = self.waveform_var.get()
-        if waveform_type == "square":
-            duty_cycle = self.duty_cycle_scale.get() / 100.0  # Convert to a fraction
-            waveform = generate_square_wave(frequency, self.duration, self.tone_generator.sample_rate, volume, duty_cycle)
-        else:
-            waveform = self.get_waveform(waveform_type, frequency, volume, phase)
+        duty_cycle = self.duty_cycle_scale.get() / 100.0  # Convert to a fraction
+        oscillator = Oscillator(waveform_type, frequency, self.tone_generator.sample_rate, volume, phase, duty_cycle)
 
-        self.tone_generator.start(waveform, pan=pan)
+        self.tone_generator.start(oscillator, pan=pan)
         self.is_playing = True
         self.start_button.config(state="disabled")  # Disable the Start button
         self.update_indicator()
@@ -182,21 +193,32 @@ class ToneGeneratorGUI(tk.Tk):
         self.start_button.config(state="normal")  # Re-enable the Start button
         self.update_indicator()
 
-    def get_waveform(self, waveform_type, frequency, volume, phase):
-        if waveform_type == "sine":
-            return generate_sine_wave(frequency, self.duration, self.tone_generator.sample_rate, volume, phase)
-        elif waveform_type == "triangle":
-            return generate_triangle_wave(frequency, self.duration, self.tone_generator.sample_rate, volume, phase)
-        elif waveform_type == "sawtooth":
-            return generate_sawtooth_wave(frequency, self.duration, self.tone_generator.sample_rate, volume, phase)
-
     def toggle_waveform_window(self):
         self.waveform_visualizer.toggle_window()
 
+    def toggle_spectrum_window(self):
+        self.spectrum_visualizer.toggle_window()
+
     def update_tone(self, event):
+        # Retune the running tone without reopening the stream
         if self.is_playing:
-            self.stop_tone()
-            self.start_tone()
+            try:
+                self.tone_generator.update(
+                    frequency=self.frequency_scale.get(),
+                    volume=self.volume_scale.get(),
+                    pan=self.pan_scale.get(),
+                    phase_shift=self.phase_scale.get(),
+                    duty_cycle=self.duty_cycle_scale.get() / 100.0,
+                    wave_type=self.waveform_var.get(),
+                )
+            except ValueError:
+                pass  # e.g. a wave type still being typed into the combobox; keep the current tone
+
+    def update_stats(self):
+        stats = self.tone_generator.stats.snapshot()
+        self.stats_label.config(text=f"Underflows: {stats['underflows']}   Load: {stats['mean_load']:.1%} "
+                                     f"(max {stats['max_load']:.1%})   Render p99: < {stats['p99_us']:.0f} µs")
+        self.after(STATS_REFRESH_MS, self.update_stats)
 
     def update_indicator(self):
         color = "green" if self.is_playing else "black"
@@ -205,17 +227,28 @@ class ToneGeneratorGUI(tk.Tk):
     def quit_application(self, event=None):
         self.stop_tone()
         self.waveform_visualizer.close_window()
+        self.spectrum_visualizer.close_window()
         self.destroy()
 
-    def get_current_waveform_snapshot(self):
-        # Fetch a snapshot of the current waveform without interrupting the playback
-        if self.tone_generator.waveform is not None:
-            # Return a small snapshot of the waveform
-            snapshot_length = min(4410, len(self.tone_generator.waveform))  # Get a snapshot of 0.1 seconds
-            return self.tone_generator.waveform[:snapshot_length]
-        return None
+    def get_current_waveform_snapshot(self, length=4410):
+        # Fetch the most recently played samples without interrupting the playback
+        return self.tone_generator.snapshot(length)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tone Generator GUI")
+    add_audio_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    config = config_from_args(args)
+    if args.auto_tune:
+        config, latency = auto_tune(config)
+        if latency is not None:
+            print(f"Using {config.blocksize} frames per block ({latency * 1000:.1f} ms output latency).")
+    app = ToneGeneratorGUI(config)
+    app.mainloop()
 
 if __name__ == "__main__":
-    app = ToneGeneratorGUI()
-    app.mainloop()
+    main()
 
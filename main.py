@@ -1,25 +1,42 @@
 import sys
 import argparse
-from gui.main_gui import ToneGeneratorGUI
-from cli.main_cli import main as cli_main
+
+# Each mode imports only what it needs: the CLI never loads tkinter or
+# matplotlib, batch rendering never loads sounddevice either, and the server
+# client loads nothing beyond the standard library
 
 def main():
     parser = argparse.ArgumentParser(description="Tone Generator Application")
-    parser.add_argument("--mode", choices=["gui", "cli"], required=True, help="Select the mode to run the application: GUI or CLI")
+    parser.add_argument("--mode", choices=["gui", "cli", "batch", "server", "client"], required=True, help="Select the mode to run the application: GUI, CLI, batch rendering, the tone server or its client")
     
     # Pass remaining arguments to the CLI parser if in CLI mode
     args, unknown = parser.parse_known_args()
 
     if args.mode == "gui":
-        # Launch the GUI application
-        app = ToneGeneratorGUI()
-        app.mainloop()
+        # Launch the GUI application, passing audio device options through
+        from gui.main_gui import main as gui_main
+        sys.argv = [sys.argv[0]] + unknown
+        gui_main()
     elif args.mode == "cli":
         # Pass unknown arguments to the CLI main function
+        from cli.main_cli import main as cli_main
         sys.argv = [sys.argv[0]] + unknown
         cli_main()
+    elif args.mode == "batch":
+        # Render a manifest of tone specs to files
+        from cli.batch_cli import main as batch_main
+        sys.argv = [sys.argv[0]] + unknown
+        batch_main()
+    elif args.mode == "server":
+        # Own the audio device and take commands over a local socket
+        from cli.server_cli import main as server_main
+        sys.argv = [sys.argv[0]] + unknown
+        server_main()
+    elif args.mode == "client":
+        # Send one command to a running server
+        from cli.client_cli import main as client_main
+        sys.argv = [sys.argv[0]] + unknown
+        client_main()
 
 if __name__ == "__main__":
     main()
-
-
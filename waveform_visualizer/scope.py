@@ -0,0 +1,83 @@
+import numpy as np
+from matplotlib.figure import Figure
+
+SPAN = 0.02  # Seconds of signal shown across the scope
+
+def find_trigger(samples, length, level=0.0):
+    # Index of the first rising crossing of `level` that still leaves `length`
+    # samples after it, so successive frames line up on the same point of the
+    # cycle. Falls back to the most recent window when nothing crosses.
+    search = samples[:len(samples) - length + 1]
+    if len(search) < 2:
+        return max(len(samples) - length, 0)
+    crossings = np.flatnonzero((search[:-1] < level) & (search[1:] >= level))
+    if len(crossings) == 0:
+        return len(samples) - length
+    return int(crossings[0]) + 1
+
+def decimate_minmax(samples, width, out=None):
+    # Reduce samples to `width` columns, keeping each column's min and max so
+    # peaks survive decimation. Returns 2 * width values ordered
+    # min0, max0, min1, max1, ... ready to draw as one polyline.
+    if out is None:
+        out = np.empty(2 * width, dtype=samples.dtype)
+    per_column = len(samples) // width
+    if per_column < 1:
+        # Fewer samples than columns: stretch them instead
+        columns = np.linspace(0, len(samples) - 1, width).astype(np.intp)
+        out[0::2] = samples[columns]
+        out[1::2] = samples[columns]
+        return out
+    columns = samples[:per_column * width].reshape(width, per_column)
+    np.min(columns, axis=1, out=out[0::2])
+    np.max(columns, axis=1, out=out[1::2])
+    return out
+
+class ScopePlot:
+    # The oscilloscope figure, independent of any GUI toolkit. The axes are
+    # fixed, so each update only restores a cached background and blits one
+    # decimated line instead of redrawing the whole figure.
+    def __init__(self, sample_rate, span=SPAN):
+        self.sample_rate = sample_rate
+        self.span = span
+        self.length = int(span * sample_rate)  # Samples shown across the plot
+        self.canvas = None
+        self.background = None
+        self.columns = 0
+
+        # Create the matplotlib figure and axis with fixed limits
+        self.figure = Figure()
+        self.ax = self.figure.add_subplot()
+        self.ax.set_title('Waveform')
+        self.ax.set_xlabel('Time (ms)')
+        self.ax.set_ylabel('Amplitude')
+        self.ax.set_xlim(0, span * 1000)
+        self.ax.set_ylim(-1.1, 1.1)
+        self.ax.grid(True)
+        self.plot_line, = self.ax.plot([], [], color='blue', animated=True)  # Set plot color to blue
+
+    def attach(self, canvas):
+        # `canvas` is any matplotlib canvas for self.figure (Tk in the app, Agg when headless)
+        self.canvas = canvas
+        # Re-capture the static background whenever the figure is fully redrawn (e.g. on resize)
+        canvas.mpl_connect('draw_event', self.cache_background)
+        canvas.draw()
+
+    def cache_background(self, event=None):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.columns = max(int(self.ax.bbox.width), 1)
+        # Two points (min, max) per pixel column
+        self.time_axis = np.repeat(np.linspace(0, self.span * 1000, self.columns), 2)
+        self.decimated = np.empty(2 * self.columns, dtype=np.float32)
+
+    def update(self, snapshot):
+        # `snapshot` should hold two spans so a trigger point can be found with a full span after it
+        if snapshot is None or self.background is None:
+            return
+        start = find_trigger(snapshot, self.length)
+        decimate_minmax(snapshot[start:start + self.length], self.columns, out=self.decimated)
+        self.plot_line.set_data(self.time_axis, self.decimated)
+
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.plot_line)
+        self.canvas.blit(self.ax.bbox)
@@ -0,0 +1,188 @@
+from functools import lru_cache
+import threading
+import time
+import numpy as np
+
+WINDOWS = {
+    # Display windows, made periodic by analysis_window
+    "hann": np.hanning,
+    "blackman": np.blackman,
+}
+AVERAGING = ("none", "exponential", "peak")
+MAX_HARMONICS = 10
+# THD and SNR are measured through their own window whatever the display
+# uses: Hann sidelobes near a tone sit only 30-60 dB down, so leakage from the
+# fundamental would read as noise. This 7-term Blackman-Harris window has
+# sidelobes below -180 dB and a main lobe of 7 bins either side; the band
+# summed per tone is one bin wider for tones that fall between bins.
+MEASUREMENT_TERMS = (0.27105140069342, 0.43329793923448, 0.21812299954311, 0.06592544638803,
+                     0.01081174209837, 0.00077658482522, 0.00001388721735)
+MEASUREMENT_LOBE = len(MEASUREMENT_TERMS) + 1
+
+@lru_cache(maxsize=None)
+def analysis_window(name, size):
+    # Window scaled so a full-scale sine reads 0 dB, cached per size
+    window = WINDOWS[name](size + 1)[:-1]
+    window = window * (2 / window.sum())
+    window.setflags(write=False)
+    return window
+
+@lru_cache(maxsize=None)
+def measurement_window(size):
+    # Periodic cosine-sum window with alternating signs, cached per size
+    phase = 2 * np.pi * np.arange(size) / size
+    window = sum((-1) ** k * term * np.cos(k * phase) for k, term in enumerate(MEASUREMENT_TERMS))
+    window.setflags(write=False)
+    return window
+
+@lru_cache(maxsize=None)
+def frequency_axis(size, sample_rate):
+    frequencies = np.fft.rfftfreq(size, 1 / sample_rate)
+    frequencies.setflags(write=False)
+    return frequencies
+
+def measure(power, sample_rate, size, lobe=MEASUREMENT_LOBE):
+    # Fundamental frequency, THD and SNR (both in dB) from a power spectrum
+    # taken through measurement_window. Each tone's power is summed over
+    # +-lobe bins; SNR counts everything that is not DC, the fundamental or a
+    # harmonic as noise. A bin near several tones is counted once.
+    bins = len(power)
+    dc = slice(0, lobe)  # DC sits exactly on bin 0, so its lobe ends a bin sooner
+    fundamental = int(np.argmax(power[lobe:])) + lobe
+    def band(center):
+        return slice(max(center - lobe, 0), min(center + lobe + 1, bins))
+    # The lobe's centroid places the fundamental between bins, so the
+    # harmonic bands stay centred on their tones up to MAX_HARMONICS
+    lobe_power = power[band(fundamental)]
+    indices = np.arange(band(fundamental).start, band(fundamental).stop)
+    peak = float(np.dot(indices, lobe_power) / max(lobe_power.sum(), 1e-30))
+
+    counted = np.zeros(bins, dtype=bool)
+    counted[dc] = True
+    fundamental_band = np.zeros(bins, dtype=bool)
+    fundamental_band[band(fundamental)] = True
+    fundamental_band &= ~counted
+    counted |= fundamental_band
+    harmonic_band = np.zeros(bins, dtype=bool)
+    for harmonic in range(2, MAX_HARMONICS + 1):
+        center = int(round(peak * harmonic))
+        if center >= bins:
+            break
+        harmonic_band[band(center)] = True
+    harmonic_band &= ~counted
+    counted |= harmonic_band
+
+    fundamental_power = max(float(power[fundamental_band].sum()), 1e-30)
+    harmonic_power = max(float(power[harmonic_band].sum()), 1e-30)
+    noise_power = max(float(power[~counted].sum()), 1e-30)
+    return {
+        "frequency": peak * sample_rate / size,
+        "thd_db": float(10 * np.log10(harmonic_power / fundamental_power)),
+        "snr_db": float(10 * np.log10(fundamental_power / noise_power)),
+    }
+
+class SpectrumAnalyzer:
+    # Computes averaged windowed spectra of the played-sample tap on a
+    # background thread. The GUI thread only reads `latest`, which is replaced
+    # as a whole by each analysis pass.
+    def __init__(self, get_samples, sample_rate, size=4096, window="hann", averaging="exponential",
+                 smoothing=0.7, interval=0.033):
+        if window not in WINDOWS:
+            raise ValueError(f"Unsupported window: {window}")
+        if averaging not in AVERAGING:
+            raise ValueError(f"Unsupported averaging: {averaging}")
+        self.get_samples = get_samples
+        self.sample_rate = sample_rate
+        self.size = size
+        self.window = window
+        self.averaging = averaging
+        self.smoothing = smoothing  # Weight of the previous average in exponential mode
+        self.interval = interval
+        self.latest = None  # (frequencies, level in dB, measurements)
+        self._thread = None
+        self._running = threading.Event()
+        self._pending = None  # Settings waiting for the next analysis pass
+        self._allocate()
+
+    def _allocate(self):
+        # Buffers for one analysis size; reallocated only when the size changes
+        self._windowed = np.empty(self.size)
+        self._spectrum = np.empty(self.size // 2 + 1, dtype=np.complex128)
+        self._power = np.empty(self.size // 2 + 1)
+        self._average = None
+        self._measured = None  # Averaged spectrum through measurement_window
+
+    def configure(self, size=None, window=None, averaging=None):
+        # Published as one tuple and applied by the analysis thread at the
+        # start of its next pass, so buffers are never resized under it
+        self._pending = (size, window, averaging)
+
+    def _apply_pending(self):
+        pending, self._pending = self._pending, None
+        size, window, averaging = pending
+        if window is not None:
+            self.window = window
+        if averaging is not None and averaging != self.averaging:
+            self.averaging = averaging
+            self.reset_peak()
+        if size is not None and size != self.size:
+            self.size = size
+            self._allocate()
+
+    def analyze(self, samples):
+        if self._pending is not None:
+            self._apply_pending()
+        size = self.size
+        display = self._power_spectrum(samples, analysis_window(self.window, size))
+        self._average = self._accumulate(self._average, display)
+        self._measured = self._accumulate(self._measured, self._power_spectrum(samples, measurement_window(size)))
+        level = 10 * np.log10(np.maximum(self._average, 1e-20))
+        measurements = measure(self._measured, self.sample_rate, size)
+        self.latest = (frequency_axis(size, self.sample_rate), level, measurements)
+        return self.latest
+
+    def _power_spectrum(self, samples, window):
+        # Into self._power, which the next call overwrites
+        np.multiply(samples[-self.size:], window, out=self._windowed)
+        np.fft.rfft(self._windowed, out=self._spectrum)
+        power = self._power
+        np.abs(self._spectrum, out=power)
+        np.square(power, out=power)
+        return power
+
+    def _accumulate(self, average, power):
+        if self.averaging == "none" or average is None or len(average) != len(power):
+            return power.copy()
+        if self.averaging == "exponential":
+            average *= self.smoothing
+            average += (1 - self.smoothing) * power
+        else:
+            np.maximum(average, power, out=average)
+        return average
+
+    def reset_peak(self):
+        self._average = None
+        self._measured = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while self._running.is_set():
+            started = time.perf_counter()
+            if self._pending is not None:
+                self._apply_pending()
+            samples = self.get_samples(self.size)
+            if samples is not None and len(samples) >= self.size:
+                self.analyze(samples)
+            time.sleep(max(self.interval - (time.perf_counter() - started), 0.0))
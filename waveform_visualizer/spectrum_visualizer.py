@@ -0,0 +1,109 @@
+import tkinter as tk
+from tkinter import Toplevel, ttk
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from waveform_visualizer.spectrum import AVERAGING, WINDOWS, SpectrumAnalyzer
+
+REFRESH_MS = 50
+FFT_SIZES = [1024, 2048, 4096, 8192, 16384]
+
+class SpectrumVisualizer:
+    # Log-frequency spectrum of the played samples with THD/SNR readouts. The
+    # FFTs run on the analyzer's background thread; this window only blits
+    # the latest result.
+    def __init__(self, master, get_waveform_snapshot_callback, sample_rate=44100):
+        self.master = master
+        self.analyzer = SpectrumAnalyzer(get_waveform_snapshot_callback, sample_rate)
+        self.sample_rate = sample_rate
+        self.window = None
+        self.canvas = None
+        self.figure = None
+        self.ax = None
+        self.plot_line = None
+        self.readout = None
+        self.background = None
+        self.is_open = False
+
+    def open_window(self):
+        if self.is_open:
+            self.window.lift()
+            return
+
+        self.window = Toplevel(self.master)
+        self.window.title("Spectrum Analyzer")
+        self.window.protocol("WM_DELETE_WINDOW", self.close_window)
+
+        # Analysis settings
+        controls = ttk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=5, pady=5)
+        self.size_var = tk.StringVar(value=str(self.analyzer.size))
+        self.window_var = tk.StringVar(value=self.analyzer.window)
+        self.averaging_var = tk.StringVar(value=self.analyzer.averaging)
+        for label, variable, values in (("FFT size", self.size_var, [str(size) for size in FFT_SIZES]),
+                                        ("Window", self.window_var, list(WINDOWS)),
+                                        ("Averaging", self.averaging_var, list(AVERAGING))):
+            ttk.Label(controls, text=label).pack(side="left")
+            menu = ttk.Combobox(controls, textvariable=variable, values=values, width=11, state="readonly")
+            menu.pack(side="left", padx=5)
+            menu.bind("<<ComboboxSelected>>", self.on_settings_change)
+
+        # Fixed axes: log frequency from 20 Hz to Nyquist, level in dBFS
+        self.figure = Figure()
+        self.ax = self.figure.add_subplot()
+        self.ax.set_title('Spectrum')
+        self.ax.set_xlabel('Frequency (Hz)')
+        self.ax.set_ylabel('Level (dB)')
+        self.ax.set_xscale('log')
+        self.ax.set_xlim(20, self.sample_rate / 2)
+        self.ax.set_ylim(-140, 10)
+        self.ax.grid(True, which='both')
+        self.plot_line, = self.ax.plot([], [], color='blue', animated=True)
+        self.readout = self.ax.text(0.02, 0.95, '', transform=self.ax.transAxes, va='top', animated=True)
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.window)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.canvas.mpl_connect('draw_event', self.cache_background)
+        self.canvas.draw()
+
+        self.is_open = True
+        self.analyzer.start()
+        self.update_plot()
+
+    def cache_background(self, event=None):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+
+    def on_settings_change(self, event):
+        self.analyzer.configure(size=int(self.size_var.get()), window=self.window_var.get(),
+                                averaging=self.averaging_var.get())
+
+    def update_plot(self):
+        if not self.is_open:
+            return
+
+        latest = self.analyzer.latest
+        if latest is not None and self.background is not None:
+            frequencies, level, measurements = latest
+            self.plot_line.set_data(frequencies[1:], level[1:])  # Skip DC on the log axis
+            self.readout.set_text(f"f0 {measurements['frequency']:.1f} Hz   "
+                                  f"THD {measurements['thd_db']:.1f} dB   SNR {measurements['snr_db']:.1f} dB")
+
+            self.canvas.restore_region(self.background)
+            self.ax.draw_artist(self.plot_line)
+            self.ax.draw_artist(self.readout)
+            self.canvas.blit(self.figure.bbox)
+
+        self.window.after(REFRESH_MS, self.update_plot)
+
+    def close_window(self):
+        self.is_open = False
+        self.analyzer.stop()
+        if self.window is not None:
+            self.window.destroy()
+        self.window = None
+        self.background = None
+
+    def toggle_window(self):
+        if self.is_open:
+            self.close_window()
+        else:
+            self.open_window()
@@ -1,18 +1,20 @@
 import tkinter as tk
 from tkinter import Toplevel
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import numpy as np
+from waveform_visualizer.scope import ScopePlot
+
+REFRESH_MS = 33  # About 30 frames per second
 
 class WaveformVisualizer:
-    def __init__(self, master, get_waveform_snapshot_callback):
+    # Oscilloscope view of the samples actually sent to the device, drawn by
+    # a ScopePlot on a Tk canvas
+    def __init__(self, master, get_waveform_snapshot_callback, sample_rate=44100):
         self.master = master
         self.get_waveform_snapshot_callback = get_waveform_snapshot_callback
+        self.sample_rate = sample_rate
         self.window = None
         self.canvas = None
-        self.figure = None
-        self.ax = None
-        self.plot_line = None
+        self.scope = None
         self.is_open = False
 
     def open_window(self):
@@ -24,19 +26,11 @@ class WaveformVisualizer:
         self.window.title("Waveform Visualization")
         self.window.protocol("WM_DELETE_WINDOW", self.close_window)
 
-        # Create the matplotlib figure and axis
-        self.figure, self.ax = plt.subplots()
-        self.ax.set_title('Waveform')
-        self.ax.set_xlabel('Time')
-        self.ax.set_ylabel('Amplitude')
-        self.ax.grid(True)
-
-        # Create a Tkinter-compatible canvas for matplotlib
-        self.canvas = FigureCanvasTkAgg(self.figure, master=self.window)
+        # Create a Tkinter-compatible canvas for the scope figure
+        self.scope = ScopePlot(self.sample_rate)
+        self.canvas = FigureCanvasTkAgg(self.scope.figure, master=self.window)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-        # Reset the plot line when the window is reopened
-        self.plot_line = None
+        self.scope.attach(self.canvas)
 
         # Start updating the plot
         self.is_open = True
@@ -46,31 +40,20 @@ class WaveformVisualizer:
         if not self.is_open:
             return
 
-        # Get a snapshot of the current waveform
-        waveform_snapshot = self.get_waveform_snapshot_callback()
-        if waveform_snapshot is not None:
-            time_data = np.linspace(0, len(waveform_snapshot) / 44100, len(waveform_snapshot))
-            if self.plot_line is None:
-                self.plot_line, = self.ax.plot(time_data, waveform_snapshot, color='blue')  # Set plot color to blue
-            else:
-                self.plot_line.set_ydata(waveform_snapshot)
-                self.plot_line.set_xdata(time_data)
-            self.ax.relim()
-            self.ax.autoscale_view()
-            self.canvas.draw()
+        self.scope.update(self.get_waveform_snapshot_callback(2 * self.scope.length))
 
         # Schedule the next update
-        self.window.after(100, self.update_plot)  # Update every 100ms
+        self.window.after(REFRESH_MS, self.update_plot)
 
     def close_window(self):
         self.is_open = False
         if self.window is not None:
             self.window.destroy()
         self.window = None  # Reset the window so it can be recreated
+        self.scope = None
 
     def toggle_window(self):
         if self.is_open:
             self.close_window()
         else:
             self.open_window()
-